@@ -1,25 +1,45 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 import time
-import winsound  # Windows only
-import requests  # 🔗 For Django connection
 
-# ===================== 1. SETUP & CONFIGURATION =====================
-mp_pose = mp.solutions.pose
-mp_draw = mp.solutions.drawing_utils
+from Exercises.audio import beep
+from Exercises.capture import FrameGrabber
+from Exercises.hud import HudLayer, ResultScreen
+from Exercises.metrics import FrameMetrics, MetricsReporter
+from Exercises.pose_engine import PoseEngine
+from Exercises.rep_counter import RepCounter
+from Exercises.scheduler import InferenceScheduler
+from Exercises.specs import SQUATS
+from Exercises.uploader import WorkoutUploader  # 🔗 For Django connection
 
-pose = mp_pose.Pose(
+# ===================== 1. SETUP & CONFIGURATION =====================
+engine = PoseEngine(
     min_detection_confidence=0.7,
-    min_tracking_confidence=0.7
+    min_tracking_confidence=0.7,
+    roi=True,  # Infer on a crop around the person, full frame when lost
+    # Skip inference while moving slowly, every frame near the thresholds
+    scheduler=InferenceScheduler.for_spec(SQUATS),
+    smoother=SQUATS.make_filter()  # Per-exercise landmark filter, see specs.py
 )
 
-cap = cv2.VideoCapture(0)
+cap = FrameGrabber(0, mirror=True)  # Threaded reader: newest frame, mirrored (selfie view)
+
+# 🔗 Background uploads to the Django backend (spools to disk when offline)
+uploader = WorkoutUploader()
+
+# Per-stage frame timings, reported to the backend ("M" toggles the HUD)
+metrics = FrameMetrics("squats")
+reporter = MetricsReporter(metrics)
+show_metrics = False
+
+# HUD panels, rendered once and redrawn only where something changed
+hud = HudLayer((380, 200))
+result_screen = ResultScreen()
 
 # ===================== CONSTANTS =====================
 TOTAL_TIME = 40  # seconds (can change to 120 later)
-RATIO_STANDING = 1.6
-RATIO_SQUAT = 1.0
+RATIO_STANDING = SQUATS.reset_at  # 1.6
+RATIO_SQUAT = SQUATS.count_at     # 1.0
 
 # ===================== STATE VARIABLES =====================
 timer_running = False
@@ -28,7 +48,7 @@ elapsed = 0
 remaining = TOTAL_TIME
 
 squat_count = 0
-stage = "up"
+counter = RepCounter(SQUATS)  # up/down stage hysteresis
 last_rep_time = 0
 
 # Alerts & UI
@@ -41,12 +61,6 @@ alert_active = False
 data_sent = False
 
 # ===================== FUNCTIONS =====================
-def beep(freq=800, dur=100):
-    try:
-        winsound.Beep(freq, dur)
-    except:
-        pass
-
 def get_grade(count):
     if count >= 18:
         return "GOOD", (0, 255, 0)
@@ -55,43 +69,17 @@ def get_grade(count):
     else:
         return "BAD", (0, 0, 255)
 
-# 🔗 SEND DATA TO DJANGO BACKEND
-def send_workout_to_backend(count, duration, grade):
-    print("DEBUG: Inside send_workout_to_backend")
-
-    url = "http://127.0.0.1:8000/api/workout/squat/"
-    payload = {
-        "count": count,
-        "duration": duration,
-        "grade": grade
-    }
-
-    try:
-        response = requests.post(url, json=payload)
-
-        print("Status Code:", response.status_code)
-        print("Raw Response:", response.text)
-
-        # Only try JSON if response is not empty
-        if response.text.strip():
-            print("Parsed JSON:", response.json())
-        else:
-            print("WARNING: Empty response from backend")
-
-    except Exception as e:
-        print("Backend exception:", e)
-
-
 # ===================== MAIN LOOP =====================
 while cap.isOpened():
+    metrics.start()
     ret, frame = cap.read()
     if not ret:
         break
+    metrics.mark("read")
 
-    frame = cv2.flip(frame, 1)
     h, w, _ = frame.shape
-    rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(rgb_image)
+    landmarks = engine.process(frame)
+    metrics.mark("pose")
 
     # ===================== TIMER LOGIC =====================
     current_time = time.time()
@@ -119,7 +107,8 @@ while cap.isOpened():
             # 🔗 SEND DATA ONCE
             if not data_sent:
                 grade_text, _ = get_grade(squat_count)
-                send_workout_to_backend(
+                uploader.submit(
+                    "squats",
                     squat_count,
                     TOTAL_TIME,
                     grade_text
@@ -128,32 +117,15 @@ while cap.isOpened():
 
     # ===================== SQUAT LOGIC =====================
     current_ratio = 0.0
-    if results.pose_landmarks:
-        lm = results.pose_landmarks.landmark
-
-        left_hip_vis = lm[mp_pose.PoseLandmark.LEFT_HIP.value].visibility
-        left_ankle_vis = lm[mp_pose.PoseLandmark.LEFT_ANKLE.value].visibility
-
-        if left_hip_vis > 0.5 and left_ankle_vis > 0.5:
-            shoulder_y = lm[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y
-            hip_y = lm[mp_pose.PoseLandmark.LEFT_HIP.value].y
-            ankle_y = lm[mp_pose.PoseLandmark.LEFT_ANKLE.value].y
-
-            torso_height = abs(hip_y - shoulder_y)
-            leg_vertical_height = abs(ankle_y - hip_y)
+    if landmarks is not None:
+        # Leg vertical height / torso height, NaN if hip/ankle not visible
+        ratio = SQUATS.measure(landmarks)
 
-            if torso_height > 0.05:
-                current_ratio = leg_vertical_height / torso_height
+        if not np.isnan(ratio):
+            current_ratio = ratio
 
             if timer_running:
-                if current_ratio > RATIO_STANDING:
-                    stage = "up"
-                    if not alert_active:
-                        feedback = "GO DOWN"
-                        feedback_color = (255, 255, 255)
-
-                elif current_ratio < RATIO_SQUAT and stage == "up":
-                    stage = "down"
+                if counter.update(current_ratio):
                     squat_count += 1
                     last_rep_time = time.time()
                     if not alert_active:
@@ -161,6 +133,11 @@ while cap.isOpened():
                         feedback_color = (0, 255, 0)
                     beep(1000, 150)
 
+                elif current_ratio > RATIO_STANDING:
+                    if not alert_active:
+                        feedback = "GO DOWN"
+                        feedback_color = (255, 255, 255)
+
                 if (time.time() - last_rep_time > 8) and not alert_active:
                     feedback = "DISTRACTED / IDLE"
                     feedback_color = (0, 165, 255)
@@ -169,55 +146,51 @@ while cap.isOpened():
                 feedback = "FULL BODY NOT VISIBLE"
                 feedback_color = (0, 0, 255)
 
+    metrics.mark("logic")
+
     # ===================== UI =====================
     if not timer_running and remaining == 0 and start_time != 0:
         grade_text, grade_color = get_grade(squat_count)
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (50, 50), (w-50, h-50), (0, 0, 0), -1)
-        frame = cv2.addWeighted(overlay, 0.8, frame, 0.2, 0)
-
-        cv2.putText(frame, "WORKOUT OVER", (w//2 - 180, h//2 - 60),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
-        cv2.putText(frame, f"SQUATS: {squat_count}", (w//2 - 120, h//2),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
-        cv2.putText(frame, f"GRADE: {grade_text}", (w//2 - 160, h//2 + 80),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, grade_color, 4)
-
-        cv2.putText(frame, "Press 'S' to Restart", (w//2 - 130, h-80),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (200, 200, 200), 1)
+        result_screen.draw(frame, f"SQUATS: {squat_count}", grade_text, grade_color)
 
     else:
-        cv2.rectangle(frame, (0, 0), (380, 200), (0, 0, 0), -1)
-
-        cv2.putText(frame, f"Elapsed: {elapsed}s", (20, 35),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
+        hud.text("elapsed", f"Elapsed: {elapsed}s", (20, 35), 0.7, (200, 200, 200), 2)
 
         time_color = (0, 0, 255) if remaining <= 10 else (0, 255, 255)
-        cv2.putText(frame, f"Left: {remaining}s", (200, 35),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, time_color, 2)
+        hud.text("left", f"Left: {remaining}s", (200, 35), 0.7, time_color, 2)
 
-        cv2.putText(frame, f"SQUATS: {squat_count}", (20, 90),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
+        hud.text("score", f"SQUATS: {squat_count}", (20, 90), 1.5, (0, 255, 0), 3)
 
         font_scale = 1.0 if alert_active else 0.7
-        cv2.putText(frame, feedback, (20, 150),
-                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, feedback_color, 2)
+        hud.text("feedback", feedback, (20, 150), font_scale, feedback_color, 2)
 
-        cv2.putText(frame, f"Ratio: {current_ratio:.2f}", (20, 185),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100, 100, 100), 1)
+        hud.text("value", f"Ratio: {current_ratio:.2f}", (20, 185), 0.5, (100, 100, 100), 1)
 
-        if results.pose_landmarks:
-            mp_draw.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+        hud.blit(frame)
+
+        if landmarks is not None:
+            engine.draw(frame, landmarks)
+
+    if show_metrics:
+        metrics.draw(frame)
+    metrics.mark("overlay")
 
     cv2.imshow("AI Squat Trainer - Final", frame)
 
     # ===================== INPUTS =====================
     key = cv2.waitKey(1) & 0xFF
+    metrics.mark("display")
+    metrics.end(cap.dropped)
+
     if key == ord('q'):
         break
 
+    if key == ord('m'):
+        show_metrics = not show_metrics
+
     if key == ord('s'):
         squat_count = 0
+        counter.reset()
         elapsed = 0
         remaining = TOTAL_TIME
         start_time = time.time()
@@ -229,4 +202,7 @@ while cap.isOpened():
         beep(800, 300)
 
 cap.release()
+uploader.close()
+reporter.close()
+metrics.dump()
 cv2.destroyAllWindows()
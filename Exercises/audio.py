@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+try:
+    import sounddevice as sd
+except (ImportError, OSError):  # not installed / no PortAudio (headless Linux)
+    sd = None
+
+try:
+    import winsound  # Windows only
+except ImportError:
+    winsound = None
+
+# Tones the trainers use, rendered once up front
+COMMON_TONES = [(600, 50), (800, 100), (800, 300), (1000, 150),
+                (1000, 400), (1100, 100), (1500, 1000)]
+
+
+class AudioCues:
+    """Plays beeps on a background thread so the frame loop never blocks.
+
+    beep() only enqueues; the worker plays through sounddevice when an
+    output device exists, falls back to winsound on Windows, and is silent
+    otherwise. The same tone requested again within `dedup_window` seconds
+    (or while it is still playing) is dropped, so per-frame calls such as
+    the plank bad-form warning do not pile up.
+    """
+
+    def __init__(self, sample_rate=44100, volume=0.3, dedup_window=0.5, max_pending=4):
+        self.sample_rate = sample_rate
+        self.volume = volume
+        self.dedup_window = dedup_window
+
+        self._tones = {}
+        self._last = {}
+        self._queue = queue.Queue(maxsize=max_pending)
+
+        if sd is not None:
+            self.backend = "sounddevice"
+            for freq, dur in COMMON_TONES:
+                self._tone(freq, dur)
+        elif winsound is not None:
+            self.backend = "winsound"
+        else:
+            self.backend = None
+
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def _tone(self, freq, dur):
+        key = (freq, dur)
+        buf = self._tones.get(key)
+        if buf is None:
+            n = int(self.sample_rate * dur / 1000)
+            t = np.arange(n, dtype=np.float32) / self.sample_rate
+            buf = (self.volume * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+            # 5 ms fade in/out so tones don't click
+            ramp = min(n // 2, int(self.sample_rate * 0.005))
+            if ramp:
+                fade = np.linspace(0.0, 1.0, ramp, dtype=np.float32)
+                buf[:ramp] *= fade
+                buf[-ramp:] *= fade[::-1]
+            self._tones[key] = buf
+        return buf
+
+    def beep(self, freq=800, dur=100):
+        """Queues a tone; returns False if it was deduplicated or dropped."""
+        if self.backend is None:
+            return False
+        now = time.monotonic()
+        key = (freq, dur)
+        if now - self._last.get(key, -1e9) < max(self.dedup_window, dur / 1000):
+            return False
+        self._last[key] = now
+        try:
+            self._queue.put_nowait(key)
+        except queue.Full:
+            return False
+        return True
+
+    def _play(self, freq, dur):
+        if self.backend == "sounddevice":
+            sd.play(self._tone(freq, dur), self.sample_rate)
+            sd.wait()
+        elif self.backend == "winsound":
+            winsound.Beep(freq, dur)
+
+    def _worker(self):
+        while True:
+            key = self._queue.get()
+            if key is None:
+                break
+            try:
+                self._play(*key)
+            except Exception:
+                # No usable output device: go silent instead of erroring every beep
+                if self.backend == "sounddevice" and winsound is not None:
+                    self.backend = "winsound"
+                else:
+                    self.backend = None
+
+    def close(self):
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+_cues = None
+
+
+def beep(freq=800, dur=100):
+    """Non-blocking drop-in for the trainers' old winsound-based beep()."""
+    global _cues
+    if _cues is None:
+        _cues = AudioCues()
+    return _cues.beep(freq, dur)
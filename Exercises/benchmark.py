@@ -0,0 +1,263 @@
+import argparse
+import json
+import multiprocessing as mp
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .hud import HudLayer
+from .pose_engine import RUNNING_MODES, PoseEngine
+from .recorder import load_session
+from .rep_counter import RepCounter
+from .scheduler import InferenceScheduler
+from .session_file import SUFFIX
+from .specs import SPECS
+
+try:
+    import resource  # peak RSS on Linux / macOS
+except ImportError:
+    resource = None
+
+# Pipeline stages of a trainer frame, in loop order
+STAGES = ("read", "flip", "cvtColor", "pose", "count", "overlay", "display")
+PERCENTILES = (50, 95, 99)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None if unavailable).
+
+    The peak of the process's whole life: main() runs every clip in a
+    fresh process so the figure belongs to that clip alone.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(samples):
+    """ms latency stats for one stage's per-frame timings (seconds)"""
+    if not samples:
+        return None
+    ms = np.asarray(samples) * 1000.0
+    stats = {f"p{p}": round(float(v), 3) for p, v in zip(PERCENTILES, np.percentile(ms, PERCENTILES))}
+    stats["mean"] = round(float(ms.mean()), 3)
+    stats["max"] = round(float(ms.max()), 3)
+    return stats
+
+
+def draw_hud(frame, hud, count, feedback, value, landmarks):
+    """The overlay every rep trainer draws on a running workout"""
+    hud.text("elapsed", "Elapsed: 0s", (20, 35), 0.7, (200, 200, 200), 2)
+    hud.text("left", "Left: 0s", (200, 35), 0.7, (0, 255, 255), 2)
+    hud.text("score", f"REPS: {count}", (20, 90), 1.5, (0, 255, 0), 3)
+    hud.text("feedback", feedback, (20, 150), 0.7, (255, 255, 255), 2)
+    hud.text("value", f"Value: {value:.2f}", (20, 185), 0.5, (100, 100, 100), 1)
+    hud.blit(frame)
+    if landmarks is not None:
+        PoseEngine.draw(frame, landmarks)
+
+
+def _video_frames(path, engine):
+    """Yields (frame, landmarks, stage times) from a clip, timing read/flip/cvtColor/pose"""
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        raise OSError(f"cannot open video {path}")
+    clock = time.perf_counter
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    index = 0
+    frame = flipped = None  # decoded into / flipped into reused buffers, like FrameGrabber
+    try:
+        while True:
+            t0 = clock()
+            ret, frame = cap.read(frame)
+            t1 = clock()
+            if not ret:
+                break
+            # Recordings are already mirrored: pay for the flip the trainers
+            # do, but keep the recorded orientation for inference
+            flipped = cv2.flip(frame, 1, dst=flipped)
+            t2 = clock()
+            t_video = index / fps  # filters see video time, not benchmark time
+            index += 1
+            if engine.scheduler is None and engine.running_mode != "live_stream":
+                rgb = engine.prepare(frame)
+                t3 = clock()
+                landmarks = engine.smooth(engine.infer(rgb, t_video), t_video)
+                t4 = clock()
+                yield frame, landmarks, {"read": t1 - t0, "flip": t2 - t1,
+                                         "cvtColor": t3 - t2, "pose": t4 - t3}
+            else:
+                # Adaptive skipping and live_stream pipelining decide per
+                # frame; time it as one stage
+                landmarks = engine.process(frame, t_video)
+                t3 = clock()
+                yield frame, landmarks, {"read": t1 - t0, "flip": t2 - t1, "pose": t3 - t2}
+    finally:
+        cap.release()
+
+
+def _session_frames(path, size):
+    """Yields (blank frame, landmarks, {}) from a landmark session (no inference)"""
+    _, landmarks, _ = load_session(path)
+    w, h = size
+    frame = np.zeros((h, w, 3), dtype=np.uint8)
+    for row in landmarks:
+        frame[:] = 0
+        yield frame, (None if np.isnan(row).all() else row.astype(np.float32)), {}
+
+
+def bench_clip(path, exercise, warmup=10, repeat=1, show=False,
+               model_complexity=1, input_width=None, roi=False, adaptive=False, size=(640, 480),
+               running_mode="solutions"):
+    """Runs the trainer pipeline over a clip and returns its stats dict.
+
+    Video files go through every stage. Landmark sessions skip the
+    camera/inference stages, which keeps the benchmark usable without
+    mediapipe. The first `warmup` frames of every pass are not measured.
+    In "live_stream" mode frames arrive faster than real time, so frames
+    sent while the model is busy get the previous pose, as in a trainer.
+    """
+    path = Path(path)
+    spec = SPECS[exercise]
+    engine = None
+    if path.suffix != SUFFIX:
+        engine = PoseEngine(model_complexity=model_complexity, input_width=input_width, roi=roi,
+                            scheduler=InferenceScheduler.for_spec(spec) if adaptive else None,
+                            smoother=spec.make_filter(), running_mode=running_mode)
+
+    timings = {stage: [] for stage in STAGES}
+    clock = time.perf_counter
+    frames = measured = 0
+    count = 0
+    busy = 0.0  # wall time of the measured frames
+
+    for _ in range(repeat):
+        counter = RepCounter(spec)
+        hud = HudLayer((380, 200))
+        source = (_video_frames(path, engine) if engine is not None
+                  else _session_frames(path, size))
+        pass_frames = 0
+        t_frame = clock()
+        for frame, landmarks, stage_times in source:
+            t0 = clock()
+            value = 0.0
+            feedback = "FULL BODY NOT VISIBLE"
+            if landmarks is not None:
+                v = spec.measure(landmarks)
+                if not np.isnan(v):
+                    value = float(v)
+                    feedback = "GO DOWN"
+                    if counter.update(value):
+                        feedback = "GOOD REP!"
+            t1 = clock()
+            draw_hud(frame, hud, counter.count, feedback, value, landmarks)
+            t2 = clock()
+            if show:
+                cv2.imshow("Benchmark", frame)
+                cv2.waitKey(1)
+            t3 = clock()
+
+            if pass_frames >= warmup:
+                for stage, seconds in stage_times.items():
+                    timings[stage].append(seconds)
+                timings["count"].append(t1 - t0)
+                timings["overlay"].append(t2 - t1)
+                if show:
+                    timings["display"].append(t3 - t2)
+                busy += t3 - t_frame
+                measured += 1
+            pass_frames += 1
+            frames += 1
+            t_frame = clock()
+        count = counter.count
+
+    if engine is not None:
+        engine.close()
+    if show:
+        cv2.destroyAllWindows()
+
+    return {
+        "clip": str(path),
+        "exercise": exercise,
+        "frames": frames,
+        "measured_frames": measured,
+        "reps": count,
+        "fps": round(measured / busy, 1) if busy > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {stage: summarize(samples) for stage, samples in timings.items() if samples},
+    }
+
+
+def environment():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+    }
+
+
+def print_report(result):
+    print(f"\n{result['clip']}  [{result['exercise']}]  {result['measured_frames']} frames, "
+          f"{result['fps']} fps, peak RSS {result['peak_rss_mb']} MB, {result['reps']} reps")
+    print(f"  {'stage':<10}" + "".join(f"{k:>10}" for k in ("p50", "p95", "p99", "mean", "max")) + "  (ms)")
+    for stage, stats in result["stages"].items():
+        print(f"  {stage:<10}" + "".join(f"{stats[k]:>10.3f}" for k in ("p50", "p95", "p99", "mean", "max")))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-stage latency / FPS / memory benchmark of the trainer pipeline")
+    parser.add_argument("clips", nargs="+", help="recorded videos or .lmk landmark sessions")
+    parser.add_argument("--exercise", choices=sorted(SPECS),
+                        help="exercise logic to run (default: stored in the session next to the clip)")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured frames per pass")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over each clip")
+    parser.add_argument("--model-complexity", type=int, default=1, choices=(0, 1, 2))
+    parser.add_argument("--input-width", type=int, default=None, help="downscale before inference")
+    parser.add_argument("--roi", action="store_true", help="crop inference to the tracked person")
+    parser.add_argument("--adaptive", action="store_true", help="skip inference on slow-moving frames")
+    parser.add_argument("--running-mode", choices=RUNNING_MODES, default="solutions",
+                        help="pose API: legacy solutions, or the PoseLandmarker in video / live_stream mode")
+    parser.add_argument("--show", action="store_true", help="also time cv2.imshow (needs a display)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = []
+    for clip in args.clips:
+        exercise = args.exercise
+        if exercise is None:
+            session = Path(clip).with_suffix(SUFFIX)
+            exercise = load_session(session)[2] if session.exists() else ""
+        if exercise not in SPECS:
+            parser.error(f"{clip}: no exercise recorded, pass --exercise")
+        # One process per clip: ru_maxrss never goes down, so clips sharing
+        # a process would all report the largest peak so far
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+            result = pool.submit(bench_clip, clip, exercise, warmup=args.warmup, repeat=args.repeat,
+                                 show=args.show, model_complexity=args.model_complexity,
+                                 input_width=args.input_width, roi=args.roi,
+                                 adaptive=args.adaptive, running_mode=args.running_mode).result()
+        results.append(result)
+        print_report(result)
+
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print("\nWrote", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import cv2
+
+
+class FrameGrabber:
+    """Reads camera frames on a background thread.
+
+    Drop-in replacement for cv2.VideoCapture in the trainer loops: the
+    reader thread keeps only the newest frame (latest-frame-wins), so
+    read() never waits on camera I/O that already happened and never
+    hands out a stale frame that is older than the one before it.
+
+    Frames are decoded into three reused buffers instead of a new image
+    per read: one being filled, the newest unread one, and the one the
+    caller got from the last read(), which stays untouched (so it can be
+    drawn on) until read() is called again.
+
+    mirror: flip frames horizontally (the trainers' selfie view) on the
+            reader thread, into the same buffers
+    timeout: read() waits for a new frame as long as the stream is open;
+            waits longer than this are counted in `stalls` (a USB camera
+            hiccup), they don't end the session
+    """
+
+    def __init__(self, source=0, timeout=1.0, mirror=False):
+        self.cap = cv2.VideoCapture(source)
+        self.timeout = timeout
+        self.mirror = mirror
+
+        self._cond = threading.Condition()
+        self._buffers = [None, None, None]
+        self._newest = None  # buffer index of the newest frame
+        self._held = None    # buffer index last handed to read()
+        self._raw = None     # decode buffer when mirroring
+        self._frame_id = 0   # id of the newest frame in the buffer
+        self._read_id = 0    # id of the last frame handed to read()
+        self._running = self.cap.isOpened()
+
+        # Frames overwritten before the main loop picked them up
+        self.dropped = 0
+        # read() calls that waited longer than `timeout` for a frame
+        self.stalls = 0
+
+        self._thread = threading.Thread(target=self._reader, daemon=True)
+        if self._running:
+            self._thread.start()
+
+    def _reader(self):
+        while self._running:
+            with self._cond:
+                i = next(i for i in range(3) if i != self._newest and i != self._held)
+            if self.mirror:
+                ret, self._raw = self.cap.read(self._raw)
+                frame = cv2.flip(self._raw, 1, dst=self._buffers[i]) if ret else None
+            else:
+                ret, frame = self.cap.read(self._buffers[i])
+            with self._cond:
+                if not ret:
+                    self._running = False
+                    self._cond.notify_all()
+                    break
+                if self._frame_id > self._read_id:
+                    self.dropped += 1
+                self._buffers[i] = frame  # a new array only if the size changed
+                self._newest = i
+                self._frame_id += 1
+                self._cond.notify_all()
+
+    def isOpened(self):
+        with self._cond:
+            return self._running or self._frame_id > self._read_id
+
+    def read(self):
+        """Returns (ret, frame) with the newest frame not yet returned.
+
+        ret is False only once the stream has ended and every frame was read.
+        """
+        deadline = time.monotonic() + self.timeout
+        stalled = False
+        with self._cond:
+            while self._frame_id == self._read_id:
+                if not self._running:
+                    return False, None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 and not stalled:
+                    stalled = True
+                    self.stalls += 1
+                self._cond.wait(remaining if remaining > 0 else self.timeout)
+            self._read_id = self._frame_id
+            self._held = self._newest
+            return True, self._buffers[self._held]
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def release(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.timeout)
+        self.cap.release()
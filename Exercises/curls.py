@@ -1,26 +1,48 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 import time
-import winsound
-from collections import deque
 
-# ===================== 1. SETUP =====================
-mp_pose = mp.solutions.pose
-mp_draw = mp.solutions.drawing_utils
+from Exercises.audio import beep
+from Exercises.capture import FrameGrabber
+from Exercises.hud import HudLayer
+from Exercises.landmarks import SHOULDER, ELBOW, WRIST, more_visible_side, to_pixels
+from Exercises.metrics import FrameMetrics, MetricsReporter
+from Exercises.pose_engine import PoseEngine
+from Exercises.rep_counter import RepCounter
+from Exercises.scheduler import InferenceScheduler
+from Exercises.specs import CURLS
+from Exercises.uploader import WorkoutUploader
 
-pose = mp_pose.Pose(
+# ===================== 1. SETUP =====================
+engine = PoseEngine(
     min_detection_confidence=0.7,
-    min_tracking_confidence=0.7
+    min_tracking_confidence=0.7,
+    roi=True,  # Infer on a crop around the person, full frame when lost
+    # Skip inference while moving slowly, every frame near the thresholds
+    scheduler=InferenceScheduler.for_spec(CURLS),
+    smoother=CURLS.make_filter()  # Per-exercise landmark filter, see specs.py
 )
 
-cap = cv2.VideoCapture(0)
+cap = FrameGrabber(0, mirror=True)  # Threaded reader: newest frame, mirrored (selfie view)
+
+# Background uploads to the Django backend (spools to disk when offline)
+uploader = WorkoutUploader()
+
+# Per-stage frame timings, reported to the backend ("M" toggles the HUD)
+metrics = FrameMetrics("curls")
+reporter = MetricsReporter(metrics)
+show_metrics = False
 
 # ===================== CONSTANTS =====================
 TOTAL_TIME = 60
 # Adjusted Thresholds for realistic movement
-ANGLE_EXTENDED = 160  # Arm needs to be straight (Reset point)
-ANGLE_CURLED = 50     # Arm fully bent (Count point) - Relaxed from 35 to 50
+ANGLE_EXTENDED = CURLS.reset_at  # 160: Arm needs to be straight (Reset point)
+ANGLE_CURLED = CURLS.count_at     # 50: Arm fully bent (Count point) - Relaxed from 35 to 50
+TARGET_X = int(np.interp(ANGLE_CURLED, [30, 180], [300, 20]))  # Count point on the angle bar
+
+# HUD panel, rendered once and redrawn only where something changed
+hud = HudLayer((400, 200))
+hud.rect(None, (20, 170), (300, 190), (100, 100, 100)) # Angle bar track
 
 # ===================== VARIABLES =====================
 timer_running = False
@@ -29,41 +51,24 @@ elapsed = 0
 remaining = TOTAL_TIME
 
 curl_count = 0
-stage = "down"
+counter = RepCounter(CURLS)  # down/up stage hysteresis
 feedback = "Press 'S' to Start"
 feedback_color = (0, 255, 255)
 
-# Smoothing Buffer (Stores last 5 angles to remove jitter)
-angle_buffer = deque(maxlen=5)
-
 # Arm Locking (Prevents switching left/right mid-set)
-active_arm = None  # Will be 'left' or 'right'
-
-# ===================== FUNCTIONS =====================
-def calculate_angle(a, b, c):
-    a = np.array(a) # Shoulder
-    b = np.array(b) # Elbow
-    c = np.array(c) # Wrist
-    
-    radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    if angle > 180.0: angle = 360 - angle
-    return angle
-
-def beep(freq=800, dur=100):
-    try: winsound.Beep(freq, dur)
-    except: pass
+active_arm = None  # Will be LEFT or RIGHT
 
 # ===================== MAIN LOOP =====================
 while cap.isOpened():
+    metrics.start()
     ret, frame = cap.read()
     if not ret: break
+    metrics.mark("read")
 
     # 1. Image Processing
-    frame = cv2.flip(frame, 1)
     h, w, _ = frame.shape
-    rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(rgb_image)
+    landmarks = engine.process(frame)
+    metrics.mark("pose")
     
     # 2. Timer Management
     if timer_running:
@@ -73,96 +78,95 @@ while cap.isOpened():
             timer_running = False
             feedback = "TIME OVER"
             beep(1500, 1000)
+            uploader.submit("curls", curl_count, TOTAL_TIME, "")
 
     # 3. Angle Calculation
     current_angle = 0
-    if results.pose_landmarks:
-        lm = results.pose_landmarks.landmark
+    if landmarks is not None:
+        lm = landmarks
         
         # --- ARM LOCKING LOGIC ---
         # Only decide which arm to track when the timer starts
         if active_arm is None:
-            l_vis = lm[mp_pose.PoseLandmark.LEFT_ELBOW.value].visibility
-            r_vis = lm[mp_pose.PoseLandmark.RIGHT_ELBOW.value].visibility
-            active_arm = "left" if l_vis > r_vis else "right"
+            active_arm = more_visible_side(lm, ELBOW)
         
         # Select Landmarks based on locked arm
-        if active_arm == "left":
-            shoulder = [lm[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x, lm[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y]
-            elbow = [lm[mp_pose.PoseLandmark.LEFT_ELBOW.value].x, lm[mp_pose.PoseLandmark.LEFT_ELBOW.value].y]
-            wrist = [lm[mp_pose.PoseLandmark.LEFT_WRIST.value].x, lm[mp_pose.PoseLandmark.LEFT_WRIST.value].y]
-        else:
-            shoulder = [lm[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].x, lm[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].y]
-            elbow = [lm[mp_pose.PoseLandmark.RIGHT_ELBOW.value].x, lm[mp_pose.PoseLandmark.RIGHT_ELBOW.value].y]
-            wrist = [lm[mp_pose.PoseLandmark.RIGHT_WRIST.value].x, lm[mp_pose.PoseLandmark.RIGHT_WRIST.value].y]
-
-        # Calculate Raw Angle
-        raw_angle = calculate_angle(shoulder, elbow, wrist)
-        
-        # --- SMOOTHING LOGIC ---
-        angle_buffer.append(raw_angle)
-        smooth_angle = sum(angle_buffer) / len(angle_buffer)
+        shoulder, elbow, wrist = SHOULDER[active_arm], ELBOW[active_arm], WRIST[active_arm]
+
+        # Landmarks arrive smoothed (5-frame moving average, CURLS.smoothing)
+        smooth_angle = CURLS.measure(lm, side=active_arm)
         current_angle = int(smooth_angle)
 
         # --- CURL REP LOGIC ---
         if timer_running:
-            # DOWN PHASE (Extension)
-            if smooth_angle > ANGLE_EXTENDED:
-                stage = "down"
-                feedback = "CURL UP"
-                feedback_color = (255, 255, 255)
-
             # UP PHASE (Flexion)
             # Only triggers if previous stage was 'down' (Full ROM required)
-            elif smooth_angle < ANGLE_CURLED and stage == "down":
-                stage = "up"
+            if counter.update(smooth_angle):
                 curl_count += 1
                 feedback = "GOOD REP!"
                 feedback_color = (0, 255, 0)
                 beep(1000, 150)
 
+            # DOWN PHASE (Extension)
+            elif smooth_angle > ANGLE_EXTENDED:
+                feedback = "CURL UP"
+                feedback_color = (255, 255, 255)
+
         # Visualization: Draw Arm Skeleton
-        cv2.line(frame, tuple(np.multiply(shoulder, [w, h]).astype(int)), 
-                 tuple(np.multiply(elbow, [w, h]).astype(int)), (255, 255, 255), 3)
-        cv2.line(frame, tuple(np.multiply(elbow, [w, h]).astype(int)), 
-                 tuple(np.multiply(wrist, [w, h]).astype(int)), (255, 255, 255), 3)
-        cv2.circle(frame, tuple(np.multiply(elbow, [w, h]).astype(int)), 10, (0, 0, 255), -1)
+        p_shoulder = to_pixels(lm, shoulder, w, h)
+        p_elbow = to_pixels(lm, elbow, w, h)
+        p_wrist = to_pixels(lm, wrist, w, h)
+        cv2.line(frame, p_shoulder, p_elbow, (255, 255, 255), 3)
+        cv2.line(frame, p_elbow, p_wrist, (255, 255, 255), 3)
+        cv2.circle(frame, p_elbow, 10, (0, 0, 255), -1)
+
+    metrics.mark("logic")
 
     # ===================== UI DRAWING =====================
-    # Background
-    cv2.rectangle(frame, (0, 0), (400, 200), (0, 0, 0), -1)
-    
     # Stats
-    cv2.putText(frame, f"Time: {remaining}s", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-    cv2.putText(frame, f"REPS: {curl_count}", (20, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.8, (0, 255, 0), 4)
-    cv2.putText(frame, f"Stage: {stage}", (250, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
+    hud.text("time", f"Time: {remaining}s", (20, 40), 0.8, (255, 255, 255), 2)
+    hud.text("reps", f"REPS: {curl_count}", (20, 100), 1.8, (0, 255, 0), 4)
+    hud.text("stage", f"Stage: {counter.stage}", (250, 100), 0.6, (200, 200, 200), 1)
     
     # Angle Meter
-    cv2.putText(frame, f"Angle: {current_angle}", (20, 150), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 1)
+    hud.text("angle", f"Angle: {current_angle}", (20, 150), 0.7, (255, 255, 255), 1)
     
-    # Threshold Bars (Visual Guide)
+    # Threshold Bars (Visual Guide), the track is drawn once at setup
     # Map angle 180->30 to x-coordinate 20->300
     bar_x = int(np.interp(current_angle, [30, 180], [300, 20]))
-    cv2.rectangle(frame, (20, 170), (300, 190), (100, 100, 100), -1) # Track
-    cv2.rectangle(frame, (bar_x, 165), (bar_x+10, 195), feedback_color, -1) # Slider
+    hud.rect("slider", (bar_x, 165), (bar_x+10, 195), feedback_color) # Slider
     
     # Target Zones on Bar
-    cv2.line(frame, (int(np.interp(ANGLE_CURLED, [30, 180], [300, 20])), 170), 
-             (int(np.interp(ANGLE_CURLED, [30, 180], [300, 20])), 190), (0, 255, 0), 3) # Green Zone
+    hud.line("target", (TARGET_X, 170), (TARGET_X, 190), (0, 255, 0), 3) # Green Zone
     
-    cv2.putText(frame, feedback, (20, 130), cv2.FONT_HERSHEY_SIMPLEX, 0.7, feedback_color, 2)
+    hud.text("feedback", feedback, (20, 130), 0.7, feedback_color, 2)
+    hud.blit(frame)
+
+    if show_metrics:
+        metrics.draw(frame)
+    metrics.mark("overlay")
 
     cv2.imshow("AI Bicep Trainer", frame)
 
     key = cv2.waitKey(1) & 0xFF
+    metrics.mark("display")
+    metrics.end(cap.dropped)
+
     if key == ord('q'): break
+    if key == ord('m'):
+        show_metrics = not show_metrics
+
     if key == ord('s'):
         # Reset everything
         curl_count = 0
+        counter.reset()
         start_time = time.time()
         timer_running = True
         active_arm = None # Re-calibrate arm
         beep(800, 300)
 
 cap.release()
+uploader.close()
+reporter.close()
+metrics.dump()
 cv2.destroyAllWindows()
\ No newline at end of file
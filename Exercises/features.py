@@ -0,0 +1,94 @@
+import numpy as np
+
+from .landmarks import (
+    LEFT, RIGHT, VIS, SHOULDER, ELBOW, WRIST, HIP, KNEE, ANKLE,
+    angle, extension_ratio, horizontal_angle, vertical_ratio,
+)
+
+# ===================== FEATURE KINDS =====================
+# Every feature is a (kind, a, b, c) row. All rows of one kind are computed
+# together by passing index arrays to the landmark helpers, so a whole
+# table costs one numpy call per kind, for one frame or for a full session.
+ANGLE = "angle"              # angle at B between A and C
+VERTICAL = "vertical"        # vertical B->C span / A->B span
+EXTENSION = "extension"      # A->C distance / (A->B + B->C)
+TILT = "tilt"                # angle of line A-B against the horizontal (C unused)
+
+KERNELS = {
+    ANGLE: lambda lm, a, b, c: angle(lm, a, b, c),
+    VERTICAL: lambda lm, a, b, c: vertical_ratio(lm, a, b, c),
+    EXTENSION: lambda lm, a, b, c: extension_ratio(lm, a, b, c),
+    TILT: lambda lm, a, b, c: horizontal_angle(lm, a, b),
+}
+
+# The metrics the trainers already use, in side-indexed joint form.
+# (name, kind, A, B, C) -> expanded into "left_<name>" and "right_<name>".
+EXERCISE_FEATURES = [
+    ("elbow_angle", ANGLE, SHOULDER, ELBOW, WRIST),       # curls, dips
+    ("shoulder_angle", ANGLE, HIP, SHOULDER, ELBOW),      # lateral raises
+    ("hip_angle", ANGLE, SHOULDER, HIP, ANKLE),           # planks
+    ("knee_angle", ANGLE, HIP, KNEE, ANKLE),
+    ("leg_ratio", VERTICAL, SHOULDER, HIP, ANKLE),        # squats
+    ("thigh_ratio", VERTICAL, SHOULDER, HIP, KNEE),       # lunges
+    ("arm_ratio", EXTENSION, SHOULDER, ELBOW, WRIST),     # pushups
+    ("torso_tilt", TILT, SHOULDER, HIP, HIP),             # crunches
+]
+
+
+class FeatureTable:
+    """Batched joint-angle / ratio kernel over a fixed table of joint triplets.
+
+    table(lm) takes a (33, 4) pose or a stacked (..., 33, 4) session and
+    returns (..., F) float32 values, one column per feature and side.
+    """
+
+    def __init__(self, specs=EXERCISE_FEATURES):
+        self.names = []
+        kinds, triplets = [], []
+        for name, kind, a, b, c in specs:
+            for side, prefix in ((LEFT, "left"), (RIGHT, "right")):
+                self.names.append(f"{prefix}_{name}")
+                kinds.append(kind)
+                triplets.append((a[side], b[side], c[side]))
+
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.triplets = np.array(triplets, dtype=np.intp)
+
+        # Rows grouped by kind, so __call__ does one kernel call per kind
+        kinds = np.array(kinds)
+        self._groups = []
+        for kind, kernel in KERNELS.items():
+            rows = np.flatnonzero(kinds == kind)
+            if len(rows):
+                a, b, c = self.triplets[rows].T
+                self._groups.append((kernel, rows, a, b, c))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __call__(self, lm, out=None):
+        if out is None:
+            out = np.empty(lm.shape[:-2] + (len(self.names),), dtype=np.float32)
+        for kernel, rows, a, b, c in self._groups:
+            out[..., rows] = kernel(lm, a, b, c)
+        return out
+
+    def visibility(self, lm):
+        """(..., F) lowest visibility among the joints of each feature"""
+        return lm[..., self.triplets, VIS].min(axis=-1)
+
+    def column(self, values, name, side=None):
+        """Selects one feature from a table result, e.g. ("elbow_angle", LEFT)"""
+        if side is not None:
+            name = f"{'left' if side == LEFT else 'right'}_{name}"
+        return values[..., self.index[name]]
+
+
+# Default table shared by the trainers, replay and recognition code
+exercise_features = FeatureTable()
+
+
+def joint_angles(lm, triplets):
+    """Angles at B for an (N, 3) table of (A, B, C) indices -> (..., N)"""
+    triplets = np.asarray(triplets, dtype=np.intp)
+    return angle(lm, triplets[:, 0], triplets[:, 1], triplets[:, 2])
@@ -0,0 +1,154 @@
+import math
+
+import numpy as np
+
+# ===================== LANDMARK FILTERS =====================
+# Each filter smooths a whole array (normally the (33, 4) landmark array)
+# element-wise. Calling it costs O(size) no matter how long the window or
+# session is, and nothing is allocated after the first frame: state lives
+# in buffers sized on the first call and the returned array is the
+# filter's own output buffer, overwritten on the next call.
+
+
+class MovingAverage:
+    """Mean of the last `window` samples, kept as a running sum."""
+
+    def __init__(self, window=5):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self._ring = None
+        self._i = 0
+        self._n = 0
+
+    def __call__(self, x, t=None):
+        if self._ring is None:
+            self._ring = np.zeros((self.window,) + np.shape(x), dtype=np.float64)
+            self._sum = np.zeros(np.shape(x), dtype=np.float64)
+            self._out = np.empty(np.shape(x), dtype=np.float32)
+
+        slot = self._ring[self._i]
+        if self._n == self.window:
+            self._sum -= slot
+        else:
+            self._n += 1
+        slot[...] = x
+        self._sum += slot
+        self._i = (self._i + 1) % self.window
+
+        np.divide(self._sum, self._n, out=self._out, casting="unsafe")
+        return self._out
+
+
+class ExponentialFilter:
+    """y += alpha * (x - y); alpha = 1 passes samples through unchanged."""
+
+    def __init__(self, alpha=0.5):
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self._out = None
+
+    def __call__(self, x, t=None):
+        if self._out is None:
+            self._out = np.array(x, dtype=np.float32)
+            self._diff = np.empty_like(self._out)
+            return self._out
+        np.subtract(x, self._out, out=self._diff)
+        self._diff *= self.alpha
+        self._out += self._diff
+        return self._out
+
+
+class OneEuroFilter:
+    """Speed-adaptive low-pass filter (Casiez et al., CHI 2012).
+
+    Smooths heavily while a landmark is still (kills jitter) and lightly
+    while it moves fast (keeps lag low). min_cutoff sets the smoothing at
+    rest, beta how quickly the cutoff rises with speed. beta depends on
+    the units: 4 suits normalized image coordinates, keeping a 2 Hz rep at
+    full amplitude while cutting jitter at rest to about a third.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=4.0, d_cutoff=1.0, rate=30.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.rate = rate  # assumed frames per second when no t is given
+        self.reset()
+
+    def reset(self):
+        self._out = None
+        self._t = None
+
+    def __call__(self, x, t=None):
+        if self._out is None:
+            self._out = np.array(x, dtype=np.float32)
+            self._dx = np.zeros_like(self._out)
+            self._diff = np.empty_like(self._out)
+            self._tmp = np.empty_like(self._out)
+            self._den = np.empty_like(self._out)
+            self._t = t
+            return self._out
+
+        dt = 1.0 / self.rate
+        if t is not None and self._t is not None and t > self._t:
+            dt = t - self._t
+        self._t = t
+
+        # Low-passed speed: dx += a_d * ((x - y) / dt - dx)
+        np.subtract(x, self._out, out=self._diff)
+        np.divide(self._diff, dt, out=self._tmp)
+        self._tmp -= self._dx
+        r = 2 * math.pi * self.d_cutoff * dt
+        self._tmp *= r / (1.0 + r)
+        self._dx += self._tmp
+
+        # Per-element cutoff = min_cutoff + beta * |dx|, alpha = r / (1 + r)
+        np.abs(self._dx, out=self._tmp)
+        self._tmp *= self.beta
+        self._tmp += self.min_cutoff
+        self._tmp *= 2 * math.pi * dt
+        np.add(self._tmp, 1.0, out=self._den)
+        self._tmp /= self._den
+
+        # y += alpha * (x - y)
+        self._diff *= self._tmp
+        self._out += self._diff
+        return self._out
+
+
+FILTERS = {
+    "moving_average": MovingAverage,
+    "exponential": ExponentialFilter,
+    "one_euro": OneEuroFilter,
+}
+
+
+def make_filter(smoothing):
+    """Builds a filter from a spec's smoothing entry, e.g.
+    ("moving_average", {"window": 5}); None means no filtering."""
+    if smoothing is None:
+        return None
+    kind, params = smoothing
+    return FILTERS[kind](**params)
+
+
+def filter_session(filt, times, landmarks):
+    """Runs a filter over a recorded (N, 33, 4) session, frame by frame.
+
+    Rows where nobody was detected (all NaN) stay NaN and reset the
+    filter, exactly like PoseEngine does live.
+    """
+    out = np.array(landmarks, dtype=np.float32)
+    if filt is None:
+        return out
+    filt.reset()
+    for i, t in enumerate(times):
+        if np.isnan(out[i]).all():
+            filt.reset()
+        else:
+            out[i] = filt(out[i], t)
+    return out
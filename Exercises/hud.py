@@ -0,0 +1,161 @@
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+class HudLayer:
+    """A HUD panel rendered once and composited onto every frame.
+
+    The panel keeps its own BGR image plus an ink mask (where something
+    was drawn). Static elements (name=None) are drawn once into the base
+    image. Named elements are redrawn only when their arguments change:
+    only the area they cover is restored from the base and redrawn, so an
+    unchanged HUD costs one copy per frame and no cv2.putText at all.
+
+    size:       (width, height) of the panel in pixels
+    background: panel colour; opacity 1 replaces the frame under the
+                panel, below 1 blends it in place (ink stays opaque)
+    """
+
+    def __init__(self, size, background=(0, 0, 0), opacity=1.0):
+        w, h = size
+        self.size = size
+        self.opacity = opacity
+        self._base = np.empty((h, w, 3), dtype=np.uint8)
+        self._base[:] = background
+        self._base_mask = np.zeros((h, w), dtype=np.uint8)
+        self.image = self._base.copy()
+        self.mask = self._base_mask.copy()  # nonzero where ink
+        self._fill = self._base.copy() if opacity < 1 else None
+        self._items = {}  # name -> (kind, args, box)
+
+    # --- Drawing ---
+    def text(self, name, text, org, scale, color, thickness=1):
+        self._set(name, "text", (text, org, scale, color, thickness))
+
+    def rect(self, name, pt1, pt2, color, thickness=-1):
+        self._set(name, "rect", (pt1, pt2, color, thickness))
+
+    def line(self, name, pt1, pt2, color, thickness=1):
+        self._set(name, "line", (pt1, pt2, color, thickness))
+
+    def clear(self):
+        """Removes every named element, keeping the static ones"""
+        self._items.clear()
+        np.copyto(self.image, self._base)
+        np.copyto(self.mask, self._base_mask)
+
+    def _set(self, name, kind, args):
+        if name is None:
+            for image, mask in ((self._base, self._base_mask), (self.image, self.mask)):
+                _draw(image, mask, kind, args)
+            return
+        old = self._items.get(name)
+        if old is not None and old[:2] == (kind, args):
+            return
+
+        box = self._box(kind, args)
+        self._items[name] = (kind, args, box)  # keeps its place in the drawing order
+        self._redraw(box if old is None else _union(box, old[2]))
+
+    def remove(self, name):
+        """Takes a named element off the panel (no-op if it isn't there)"""
+        old = self._items.pop(name, None)
+        if old is not None:
+            self._redraw(old[2])
+
+    def _redraw(self, box):
+        """Restores an area from the base and redraws, in order and clipped
+        to it, everything that touches it (drawing twice isn't idempotent
+        with anti-aliased edges, so nothing outside it is touched)"""
+        x0, y0, x1, y1 = box
+        if x1 <= x0 or y1 <= y0:
+            return  # entirely outside the panel
+        image, mask = self.image[y0:y1, x0:x1], self.mask[y0:y1, x0:x1]
+        image[:] = self._base[y0:y1, x0:x1]
+        mask[:] = self._base_mask[y0:y1, x0:x1]
+        for kind, args, other in self._items.values():
+            if _overlaps(other, box):
+                _draw(image, mask, kind, args, (x0, y0))
+
+    def _box(self, kind, args):
+        """Pixel area (x0, y0, x1, y1) an element can touch, clipped to the panel"""
+        if kind == "text":
+            text, (x, y), scale, _, thickness = args
+            (tw, th), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+            box = (x, y - th, x + tw, y + baseline)
+        else:
+            (xa, ya), (xb, yb), _, thickness = args
+            box = (min(xa, xb), min(ya, yb), max(xa, xb), max(ya, yb))
+            thickness = max(thickness, 1)
+        pad = thickness + 1
+        w, h = self.size
+        return (min(max(box[0] - pad, 0), w), min(max(box[1] - pad, 0), h),
+                min(max(box[2] + pad + 1, 0), w), min(max(box[3] + pad + 1, 0), h))
+
+    # --- Compositing ---
+    def blit(self, frame, origin=(0, 0)):
+        """Composites the panel onto frame at origin (x, y), in place"""
+        x, y = origin
+        fh, fw = frame.shape[:2]
+        w, h = self.size
+        x1, y1 = min(x + w, fw), min(y + h, fh)
+        if x1 <= x or y1 <= y:
+            return
+        roi = frame[y:y1, x:x1]
+        image = self.image[:y1 - y, :x1 - x]
+        if self.opacity >= 1:
+            np.copyto(roi, image)
+            return
+        cv2.addWeighted(roi, 1.0 - self.opacity, self._fill[:y1 - y, :x1 - x], self.opacity,
+                        0, dst=roi)
+        cv2.copyTo(image, self.mask[:y1 - y, :x1 - x], roi)
+
+
+def _draw(image, mask, kind, args, offset=(0, 0)):
+    """Draws an element into image and its ink into mask; offset is the
+    panel position of image[0, 0] when drawing into a sub-area"""
+    dx, dy = offset
+    if kind == "text":
+        text, (x, y), scale, color, thickness = args
+        org = (x - dx, y - dy)
+        cv2.putText(image, text, org, FONT, scale, color, thickness)
+        cv2.putText(mask, text, org, FONT, scale, 255, thickness)
+        return
+    draw = cv2.rectangle if kind == "rect" else cv2.line
+    (xa, ya), (xb, yb), color, thickness = args
+    pt1, pt2 = (xa - dx, ya - dy), (xb - dx, yb - dy)
+    draw(image, pt1, pt2, color, thickness)
+    draw(mask, pt1, pt2, 255, thickness)
+
+
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _union(a, b):
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+class ResultScreen:
+    """The translucent "WORKOUT OVER" screen of the timed trainers.
+
+    Covers the frame with a 50 px margin at 80% opacity, with the text
+    laid out as before; built on first use for the camera's frame size.
+    """
+
+    def __init__(self):
+        self.layer = None
+
+    def draw(self, frame, score, grade_text, grade_color):
+        h, w = frame.shape[:2]
+        # cv2.rectangle((50, 50), (w - 50, h - 50)) as before, corners included
+        if self.layer is None or self.layer.size != (w - 99, h - 99):
+            # Positions are relative to the panel origin (50, 50)
+            self.layer = HudLayer((w - 99, h - 99), opacity=0.8)
+            self.layer.text(None, "WORKOUT OVER", (w//2 - 230, h//2 - 110), 1.5, (255, 255, 255), 3)
+            self.layer.text(None, "Press 'S' to Restart", (w//2 - 180, h - 130), 0.8, (200, 200, 200), 1)
+        self.layer.text("score", score, (w//2 - 170, h//2 - 50), 1.5, (255, 255, 255), 3)
+        self.layer.text("grade", f"GRADE: {grade_text}", (w//2 - 210, h//2 + 30), 1.5, grade_color, 4)
+        self.layer.blit(frame, (50, 50))
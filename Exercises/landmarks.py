@@ -0,0 +1,126 @@
+import numpy as np
+
+# ===================== LANDMARK ARRAY LAYOUT =====================
+# One pose = (33, 4) float32 array, columns (x, y, z, visibility).
+# x/y are normalized to the image (0 = left/top, 1 = right/bottom).
+# Every helper below also accepts stacked poses of shape (..., 33, 4),
+# so the same code runs on one frame or on a whole recorded session.
+NUM_LANDMARKS = 33
+X, Y, Z, VIS = 0, 1, 2, 3
+
+NOSE = 0
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_ELBOW, RIGHT_ELBOW = 13, 14
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_KNEE, RIGHT_KNEE = 25, 26
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+
+# Side-indexed joints: SHOULDER[LEFT] / SHOULDER[RIGHT]
+LEFT, RIGHT = 0, 1
+SHOULDER = (LEFT_SHOULDER, RIGHT_SHOULDER)
+ELBOW = (LEFT_ELBOW, RIGHT_ELBOW)
+WRIST = (LEFT_WRIST, RIGHT_WRIST)
+HIP = (LEFT_HIP, RIGHT_HIP)
+KNEE = (LEFT_KNEE, RIGHT_KNEE)
+ANKLE = (LEFT_ANKLE, RIGHT_ANKLE)
+
+# Same edges as mp_pose.POSE_CONNECTIONS, as an (N, 2) index table
+POSE_CONNECTIONS = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8),
+    (9, 10), (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21),
+    (17, 19), (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20),
+    (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+    (27, 29), (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+], dtype=np.intp)
+
+# Landmark each index turns into when the image is mirrored: left and
+# right swap (eyes, ears, mouth corners, limbs), the nose stays
+MIRROR = np.array([
+    0, 4, 5, 6, 1, 2, 3, 8, 7, 10, 9, 12, 11, 14, 13, 16, 15,
+    18, 17, 20, 19, 22, 21, 24, 23, 26, 25, 28, 27, 30, 29, 32, 31,
+], dtype=np.intp)
+
+
+def empty():
+    return np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+
+
+def to_array(landmark_list, out=None):
+    """Copies a MediaPipe landmark list into a (33, 4) float32 array."""
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+    for i, l in enumerate(landmark_list):
+        out[i, 0] = l.x
+        out[i, 1] = l.y
+        out[i, 2] = l.z
+        out[i, 3] = l.visibility
+    return out
+
+
+def mirror(lm, out=None):
+    """Landmarks as they'd come from the horizontally flipped image.
+
+    x -> 1 - x and left/right swapped, so inference on the raw camera
+    frame can stand in for cv2.flip + inference. out (same shape as lm,
+    not lm itself) avoids the allocation.
+    """
+    out = np.take(lm, MIRROR, axis=-2, out=out)
+    np.subtract(1.0, out[..., X], out=out[..., X])
+    return out
+
+
+# ===================== GEOMETRY HELPERS =====================
+# Results come back as numpy scalars for a single pose ([()] unwraps the
+# 0-d array) and as arrays for stacked poses.
+def more_visible_side(lm, joint):
+    """LEFT or RIGHT, whichever side of `joint` (e.g. HIP) is more visible"""
+    return LEFT if lm[joint[LEFT], VIS] > lm[joint[RIGHT], VIS] else RIGHT
+
+
+def angle(lm, a, b, c):
+    """Angle at point B between A and C, in degrees (0 - 180)"""
+    ab = lm[..., a, :2] - lm[..., b, :2]
+    cb = lm[..., c, :2] - lm[..., b, :2]
+    radians = np.arctan2(cb[..., 1], cb[..., 0]) - np.arctan2(ab[..., 1], ab[..., 0])
+    deg = np.abs(np.degrees(radians))
+    return np.where(deg > 180.0, 360.0 - deg, deg)[()]
+
+
+def horizontal_angle(lm, a, b):
+    """Angle of line AB relative to the horizontal axis, in degrees (0 - 90)"""
+    d = np.abs(lm[..., a, :2] - lm[..., b, :2])
+    return np.degrees(np.arctan2(d[..., 1], d[..., 0]))[()]
+
+
+def distance(lm, a, b):
+    """2D distance between two landmarks"""
+    d = lm[..., a, :2] - lm[..., b, :2]
+    return np.hypot(d[..., 0], d[..., 1])[()]
+
+
+def extension_ratio(lm, a, b, c):
+    """Straight-line A->C distance divided by the A->B->C path length.
+
+    ~1.0 when the limb is fully extended, drops as it bends at B.
+    """
+    path = distance(lm, a, b) + distance(lm, b, c)
+    valid = path > 0
+    return np.where(valid, distance(lm, a, c) / np.where(valid, path, 1.0), 0.0)[()]
+
+
+def vertical_ratio(lm, top, mid, bottom, min_height=0.05):
+    """Vertical span mid->bottom divided by top->mid.
+
+    Returns 0 where the top->mid span is shorter than min_height, which
+    is how the trainers guard against a collapsed torso measurement.
+    """
+    upper = np.abs(lm[..., mid, Y] - lm[..., top, Y])
+    lower = np.abs(lm[..., bottom, Y] - lm[..., mid, Y])
+    valid = upper > min_height
+    return np.where(valid, lower / np.where(valid, upper, 1.0), 0.0)[()]
+
+
+def to_pixels(lm, idx, w, h):
+    """(x, y) pixel tuple for one landmark"""
+    return int(lm[idx, X] * w), int(lm[idx, Y] * h)
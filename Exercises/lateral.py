@@ -1,92 +1,87 @@
 import cv2
-import mediapipe as mp
-import numpy as np
 import time
-import winsound
 
-# ===================== 1. SETUP & CONFIGURATION =====================
-mp_pose = mp.solutions.pose
-mp_draw = mp.solutions.drawing_utils
+from Exercises.audio import beep
+from Exercises.capture import FrameGrabber
+from Exercises.hud import HudLayer
+from Exercises.landmarks import SHOULDER, more_visible_side, to_pixels
+from Exercises.metrics import FrameMetrics, MetricsReporter
+from Exercises.pose_engine import PoseEngine
+from Exercises.rep_counter import RepCounter
+from Exercises.scheduler import InferenceScheduler
+from Exercises.specs import LATERAL_RAISES
+from Exercises.uploader import WorkoutUploader
 
-pose = mp_pose.Pose(
+# ===================== 1. SETUP & CONFIGURATION =====================
+engine = PoseEngine(
     min_detection_confidence=0.7,
-    min_tracking_confidence=0.7
+    min_tracking_confidence=0.7,
+    roi=True,  # Infer on a crop around the person, full frame when lost
+    # Skip inference while moving slowly, every frame near the thresholds
+    scheduler=InferenceScheduler.for_spec(LATERAL_RAISES)
 )
 
-cap = cv2.VideoCapture(0)
+cap = FrameGrabber(0, mirror=True)  # Threaded reader: newest frame, mirrored (selfie view)
+
+# Background uploads to the Django backend (spools to disk when offline)
+uploader = WorkoutUploader()
+
+# Per-stage frame timings, reported to the backend ("M" toggles the HUD)
+metrics = FrameMetrics("lateral_raises")
+reporter = MetricsReporter(metrics)
+show_metrics = False
+
+# HUD panel, rendered once and redrawn only where something changed
+hud = HudLayer((450, 180))
 
 # ===================== CONSTANTS =====================
 TOTAL_TIME = 60 
 # Angle relative to torso (Shoulder-Hip-Elbow)
-ANGLE_DOWN = 20    # Arms at sides
-ANGLE_UP = 75      # Arms raised (approx shoulder height)
-
-# ===================== FUNCTIONS =====================
-def calculate_angle(a, b, c):
-    """Calculates angle at B (Shoulder) between A (Hip) and C (Elbow)"""
-    a = np.array(a) # Hip
-    b = np.array(b) # Shoulder
-    c = np.array(c) # Elbow
-    
-    radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    
-    if angle > 180.0:
-        angle = 360 - angle
-    return angle
-
-def beep(freq=800, dur=100):
-    try: winsound.Beep(freq, dur)
-    except: pass
+ANGLE_DOWN = LATERAL_RAISES.reset_at  # 20: Arms at sides
+ANGLE_UP = LATERAL_RAISES.count_at    # 75: Arms raised (approx shoulder height)
 
 # ===================== STATE VARIABLES =====================
 timer_running = False
 start_time = 0
 remaining = TOTAL_TIME
 raise_count = 0
-stage = "down"
+counter = RepCounter(LATERAL_RAISES)  # down/up stage hysteresis
 feedback = "Press 'S' to Start"
 feedback_color = (0, 255, 255)
 
 # ===================== MAIN LOOP =====================
 while cap.isOpened():
+    metrics.start()
     ret, frame = cap.read()
     if not ret: break
+    metrics.mark("read")
 
-    frame = cv2.flip(frame, 1)
     h, w, _ = frame.shape
-    rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(rgb_image)
+    landmarks = engine.process(frame)
+    metrics.mark("pose")
     
     if timer_running:
         elapsed = int(time.time() - start_time)
         remaining = max(0, TOTAL_TIME - elapsed)
-        if remaining <= 0: timer_running = False
+        if remaining <= 0:
+            timer_running = False
+            uploader.submit("lateral_raises", raise_count, TOTAL_TIME, "")
 
     current_angle = 0
-    if results.pose_landmarks:
-        lm = results.pose_landmarks.landmark
+    if landmarks is not None:
+        lm = landmarks
         
         # We track the arm with better visibility
-        l_vis = lm[mp_pose.PoseLandmark.LEFT_SHOULDER.value].visibility
-        r_vis = lm[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].visibility
-        
-        if l_vis > r_vis:
-            hip = [lm[mp_pose.PoseLandmark.LEFT_HIP.value].x, lm[mp_pose.PoseLandmark.LEFT_HIP.value].y]
-            shoulder = [lm[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x, lm[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y]
-            elbow = [lm[mp_pose.PoseLandmark.LEFT_ELBOW.value].x, lm[mp_pose.PoseLandmark.LEFT_ELBOW.value].y]
-        else:
-            hip = [lm[mp_pose.PoseLandmark.RIGHT_HIP.value].x, lm[mp_pose.PoseLandmark.RIGHT_HIP.value].y]
-            shoulder = [lm[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].x, lm[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].y]
-            elbow = [lm[mp_pose.PoseLandmark.RIGHT_ELBOW.value].x, lm[mp_pose.PoseLandmark.RIGHT_ELBOW.value].y]
+        side = more_visible_side(lm, SHOULDER)
+        shoulder = SHOULDER[side]
 
-        current_angle = calculate_angle(hip, shoulder, elbow)
+        # Angle at the shoulder between hip and elbow
+        current_angle = LATERAL_RAISES.measure(lm, side=side)
 
         # --- RAISE LOGIC ---
         if timer_running:
             # 1. Reached the top (Shoulder height)
-            if current_angle > ANGLE_UP and stage == "down":
-                stage = "up"
+            if counter.update(current_angle):
                 raise_count += 1
                 feedback = "GOOD RAISE!"
                 feedback_color = (0, 255, 0)
@@ -94,7 +89,6 @@ while cap.isOpened():
             
             # 2. Returned to bottom
             if current_angle < ANGLE_DOWN:
-                stage = "down"
                 feedback = "RAISE ARMS"
                 feedback_color = (255, 255, 255)
 
@@ -103,25 +97,41 @@ while cap.isOpened():
                 feedback = "TOO HIGH! STOP AT SHOULDERS"
                 feedback_color = (0, 0, 255)
 
+    metrics.mark("logic")
+
     # ===================== DRAWING UI =====================
-    cv2.rectangle(frame, (0, 0), (450, 180), (0, 0, 0), -1)
-    cv2.putText(frame, f"Time: {remaining}s", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-    cv2.putText(frame, f"RAISES: {raise_count}", (20, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
-    cv2.putText(frame, feedback, (20, 150), cv2.FONT_HERSHEY_SIMPLEX, 0.7, feedback_color, 2)
+    hud.text("time", f"Time: {remaining}s", (20, 40), 0.7, (255, 255, 255), 2)
+    hud.text("reps", f"RAISES: {raise_count}", (20, 100), 1.5, (0, 255, 0), 3)
+    hud.text("feedback", feedback, (20, 150), 0.7, feedback_color, 2)
+    hud.blit(frame)
 
-    if results.pose_landmarks:
-        mp_draw.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+    if landmarks is not None:
+        engine.draw(frame, landmarks)
         # Visual cue for angle
         cv2.putText(frame, f"{int(current_angle)} deg", 
-                    tuple(np.multiply(shoulder, [w, h]).astype(int)), 
+                    to_pixels(lm, shoulder, w, h), 
                     cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
 
+    if show_metrics:
+        metrics.draw(frame)
+    metrics.mark("overlay")
+
     cv2.imshow("AI Lateral Raise Trainer", frame)
 
     key = cv2.waitKey(1) & 0xFF
+    metrics.mark("display")
+    metrics.end(cap.dropped)
+
     if key == ord('q'): break
+    if key == ord('m'):
+        show_metrics = not show_metrics
+
     if key == ord('s'):
         raise_count, start_time, timer_running = 0, time.time(), True
+        counter.reset()
 
 cap.release()
+uploader.close()
+reporter.close()
+metrics.dump()
 cv2.destroyAllWindows()
\ No newline at end of file
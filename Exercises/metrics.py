@@ -0,0 +1,189 @@
+import json
+import socket
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+
+DEFAULT_METRICS_URL = "http://127.0.0.1:8000/api/metrics/"
+DEFAULT_METRICS_DIR = Path.home() / ".ai_fitness" / "metrics"
+PERCENTILES = (50, 95, 99)
+
+
+class RingBuffer:
+    """Fixed-capacity float64 history. push() is O(1) and never allocates."""
+
+    def __init__(self, capacity):
+        self._data = np.zeros(capacity, dtype=np.float64)
+        self._i = 0
+        self.total = 0  # samples ever pushed
+
+    def push(self, value):
+        self._data[self._i] = value
+        self._i = (self._i + 1) % len(self._data)
+        self.total += 1
+
+    def __len__(self):
+        return min(self.total, len(self._data))
+
+    def values(self):
+        """The retained samples (unordered; fine for percentiles and means)"""
+        return self._data[:len(self)]
+
+    def stats(self, scale=1000.0):
+        """p50/p95/p99/mean of the retained samples, in ms by default"""
+        if not len(self):
+            return None
+        values = self.values() * scale
+        stats = {f"p{p}": round(float(v), 3) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+        stats["mean"] = round(float(values.mean()), 3)
+        return stats
+
+
+class FrameMetrics:
+    """Per-frame stage timings of a trainer loop, kept in ring buffers.
+
+    Usage per frame:
+        metrics.start()               # top of the loop
+        metrics.mark("read")          # time since the previous mark
+        ...
+        metrics.end(dropped=cap.dropped)
+
+    Only the last `capacity` frames are kept, so memory stays flat for
+    sessions of any length and a slow kiosk shows up in the p95/p99.
+    """
+
+    def __init__(self, name="", capacity=600, clock=time.perf_counter):
+        self.name = name
+        self.capacity = capacity
+        self.clock = clock
+
+        self.stages = {}                          # stage -> RingBuffer, in loop order
+        self.frame_times = RingBuffer(capacity)   # start() -> end(): work per frame
+        self.intervals = RingBuffer(capacity)     # start() -> next start(): real frame rate
+        self.frames = 0
+        self.dropped = 0
+
+        self._start = None
+        self._last = None
+        self._hud_lines = []
+        self._hud_at = 0.0
+        self._hud = None
+
+    # ===================== RECORDING =====================
+    def start(self):
+        now = self.clock()
+        if self._start is not None:
+            self.intervals.push(now - self._start)
+        self._start = self._last = now
+
+    def mark(self, stage):
+        now = self.clock()
+        buf = self.stages.get(stage)
+        if buf is None:
+            buf = self.stages[stage] = RingBuffer(self.capacity)
+        buf.push(now - self._last)
+        self._last = now
+
+    def end(self, dropped=None):
+        self.frame_times.push(self.clock() - self._start)
+        self.frames += 1
+        if dropped is not None:
+            self.dropped = dropped
+
+    # ===================== READING =====================
+    def fps(self):
+        if not len(self.intervals):
+            return 0.0
+        return float(1.0 / self.intervals.values().mean())
+
+    def snapshot(self):
+        """JSON-ready summary of the retained window"""
+        return {
+            "name": self.name,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "fps": round(self.fps(), 2),
+            "frame": self.frame_times.stats(),
+            "stages": {stage: buf.stats() for stage, buf in self.stages.items()},
+        }
+
+    def dump(self, path=None):
+        """Writes snapshot() as JSON (default ~/.ai_fitness/metrics/<name>.json)"""
+        path = Path(path) if path else DEFAULT_METRICS_DIR / f"{self.name or 'trainer'}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        return path
+
+    # ===================== HUD =====================
+    def draw(self, frame, refresh=0.5):
+        """Draws an FPS / latency box in the top-right corner of frame.
+
+        The text is recomputed at most every `refresh` seconds and drawn
+        through a cached HudLayer, so the HUD itself stays out of the
+        numbers it reports.
+        """
+        from .hud import HudLayer
+
+        now = self.clock()
+        if now - self._hud_at >= refresh:
+            self._hud_at = now
+            lines = [f"FPS {self.fps():5.1f}  dropped {self.dropped}"]
+            frame_stats = self.frame_times.stats()
+            if frame_stats:
+                lines.append(f"frame p50 {frame_stats['p50']:.1f} p95 {frame_stats['p95']:.1f} ms")
+            for stage, buf in self.stages.items():
+                stats = buf.stats()
+                if stats:
+                    lines.append(f"{stage:<8}p50 {stats['p50']:.1f} p95 {stats['p95']:.1f} ms")
+            self._hud_lines = lines
+
+        size = (310, 21 + 20 * len(self._hud_lines))
+        if self._hud is None or self._hud.size != size:
+            self._hud = HudLayer(size)
+        for i, line in enumerate(self._hud_lines):
+            self._hud.text(i, line, (10, 25 + 20 * i), 0.45, (0, 255, 255), 1)
+        self._hud.blit(frame, (frame.shape[1] - 310, 0))
+
+
+class MetricsReporter:
+    """Posts FrameMetrics snapshots to the Django backend in the background.
+
+    Never blocks the frame loop; failed posts are simply skipped (the
+    next snapshot supersedes them). close() sends one final snapshot.
+    """
+
+    def __init__(self, metrics, url=DEFAULT_METRICS_URL, interval=30.0,
+                 device=None, timeout=(3.05, 5)):
+        self.metrics = metrics
+        self.url = url
+        self.interval = interval
+        self.device = device or socket.gethostname()
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def _post(self):
+        if not self.metrics.frames:
+            return
+        payload = dict(self.metrics.snapshot(), device=self.device)
+        try:
+            self.session.post(self.url, json=payload, timeout=self.timeout)
+        except requests.RequestException:
+            pass
+
+    def _worker(self):
+        while not self._stop.wait(self.interval):
+            self._post()
+
+    def close(self, timeout=5.0):
+        self._stop.set()
+        self._thread.join(timeout)
+        self._post()
+        self.session.close()
@@ -1,19 +1,35 @@
 import cv2
-import mediapipe as mp
-import numpy as np
 import time
-import winsound  # Windows only
 
-# ===================== 1. SETUP & CONFIGURATION =====================
-mp_pose = mp.solutions.pose
-mp_draw = mp.solutions.drawing_utils
+from Exercises.audio import beep
+from Exercises.capture import FrameGrabber
+from Exercises.hud import HudLayer, ResultScreen
+from Exercises.landmarks import SHOULDER, HIP, ANKLE, X, Y, VIS, angle, more_visible_side
+from Exercises.metrics import FrameMetrics, MetricsReporter
+from Exercises.pose_engine import PoseEngine
+from Exercises.scheduler import InferenceScheduler
+from Exercises.uploader import WorkoutUploader
 
-pose = mp_pose.Pose(
+# ===================== 1. SETUP & CONFIGURATION =====================
+engine = PoseEngine(
     min_detection_confidence=0.7,
-    min_tracking_confidence=0.7
+    min_tracking_confidence=0.7,
+    roi=True  # Infer on a crop around the person, full frame when lost
 )
 
-cap = cv2.VideoCapture(0)
+cap = FrameGrabber(0, mirror=True)  # Threaded reader: newest frame, mirrored (selfie view)
+
+# Background uploads to the Django backend (spools to disk when offline)
+uploader = WorkoutUploader()
+
+# Per-stage frame timings, reported to the backend ("M" toggles the HUD)
+metrics = FrameMetrics("planks")
+reporter = MetricsReporter(metrics)
+show_metrics = False
+
+# HUD panels, rendered once and redrawn only where something changed
+hud = HudLayer((380, 200))
+result_screen = ResultScreen()
 
 # ===================== CONSTANTS =====================
 TOTAL_TIME = 120  # 2 Minutes
@@ -43,12 +59,6 @@ feedback_color = (0, 255, 255) # Yellow
 alert_active = False 
 
 # ===================== FUNCTIONS =====================
-def beep(freq=800, dur=100):
-    try:
-        winsound.Beep(freq, dur)
-    except:
-        pass
-
 def get_grade(seconds_held):
     if seconds_held >= 60:
         return "GOOD", (0, 255, 0)      
@@ -57,26 +67,23 @@ def get_grade(seconds_held):
     else:
         return "BAD", (0, 0, 255)       
 
-def calculate_angle(a, b, c):
-    a = np.array(a) # First
-    b = np.array(b) # Mid
-    c = np.array(c) # End
-    
-    radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-    angle = np.abs(radians*180.0/np.pi)
-    
-    if angle > 180.0:
-        angle = 360-angle
-        
-    return angle
+def body_line_angle(lm):
+    # Shoulder-hip-ankle angle on the more visible side
+    side = more_visible_side(lm, HIP)
+    return angle(lm, SHOULDER[side], HIP[side], ANKLE[side])
+
+# Holds barely move: skip inference, except close to the form limits
+engine.scheduler = InferenceScheduler(body_line_angle, (ANGLE_MIN, ANGLE_MAX), band=5)
 
 # ===================== MAIN LOOP =====================
 last_timestamp = time.time()
 
 while cap.isOpened():
+    metrics.start()
     ret, frame = cap.read()
     if not ret:
         break
+    metrics.mark("read")
 
     # Calculate Delta Time (for accurate hold counting)
     current_time = time.time()
@@ -84,10 +91,9 @@ while cap.isOpened():
     last_timestamp = current_time
 
     # 1. Prepare Frame
-    frame = cv2.flip(frame, 1) 
     h, w, _ = frame.shape
-    rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(rgb_image)
+    landmarks = engine.process(frame)
+    metrics.mark("pose")
     
     # 2. Timer Logic (Global 2-min Limit)
     if timer_running:
@@ -109,40 +115,27 @@ while cap.isOpened():
             timer_running = False
             feedback = "TIME OVER"
             beep(1500, 1000) 
+            uploader.submit("planks", int(total_hold_time), TOTAL_TIME, get_grade(total_hold_time)[0])
 
     # 3. Plank Logic (Form Check)
     current_angle = 0.0
     
-    if results.pose_landmarks:
-        lm = results.pose_landmarks.landmark
+    if landmarks is not None:
+        lm = landmarks
         
         # Auto-detect side logic
-        left_hip_vis = lm[mp_pose.PoseLandmark.LEFT_HIP.value].visibility
-        right_hip_vis = lm[mp_pose.PoseLandmark.RIGHT_HIP.value].visibility
-
-        if left_hip_vis > right_hip_vis:
-            shoulder_lm = mp_pose.PoseLandmark.LEFT_SHOULDER
-            hip_lm = mp_pose.PoseLandmark.LEFT_HIP
-            ankle_lm = mp_pose.PoseLandmark.LEFT_ANKLE
-        else:
-            shoulder_lm = mp_pose.PoseLandmark.RIGHT_SHOULDER
-            hip_lm = mp_pose.PoseLandmark.RIGHT_HIP
-            ankle_lm = mp_pose.PoseLandmark.RIGHT_ANKLE
-
-        # Get Coordinates
-        shoulder = [lm[shoulder_lm.value].x, lm[shoulder_lm.value].y]
-        hip = [lm[hip_lm.value].x, lm[hip_lm.value].y]
-        ankle = [lm[ankle_lm.value].x, lm[ankle_lm.value].y]
+        side = more_visible_side(lm, HIP)
+        shoulder, hip, ankle = SHOULDER[side], HIP[side], ANKLE[side]
         
         # Visibility Check
-        if lm[hip_lm.value].visibility > 0.5:
+        if lm[hip, VIS] > 0.5:
             
             # --- ANGLE CALCULATION ---
-            current_angle = calculate_angle(shoulder, hip, ankle)
+            current_angle = angle(lm, shoulder, hip, ankle)
             
             # --- HORIZONTAL CHECK ---
             # Ensure body is horizontal (X dist > Y dist)
-            is_horizontal = abs(shoulder[0] - ankle[0]) > abs(shoulder[1] - ankle[1])
+            is_horizontal = abs(lm[shoulder, X] - lm[ankle, X]) > abs(lm[shoulder, Y] - lm[ankle, Y])
 
             # --- COUNTING LOGIC ---
             if timer_running:
@@ -180,58 +173,54 @@ while cap.isOpened():
                 feedback = "BODY NOT VISIBLE"
                 feedback_color = (0, 0, 255)
 
+    metrics.mark("logic")
+
     # ===================== DRAWING UI =====================
     
     # 4. Result Screen
     if not timer_running and remaining == 0 and start_time != 0:
         grade_text, grade_color = get_grade(total_hold_time)
         
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (50, 50), (w-50, h-50), (0,0,0), -1)
-        frame = cv2.addWeighted(overlay, 0.8, frame, 0.2, 0)
-        
-        cv2.putText(frame, "WORKOUT OVER", (w//2 - 180, h//2 - 60), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
-        cv2.putText(frame, f"HELD: {int(total_hold_time)}s", (w//2 - 120, h//2), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
-        cv2.putText(frame, f"GRADE: {grade_text}", (w//2 - 160, h//2 + 80), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, grade_color, 4)
-        cv2.putText(frame, "Press 'S' to Restart", (w//2 - 130, h-80), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (200, 200, 200), 1)
+        result_screen.draw(frame, f"HELD: {int(total_hold_time)}s", grade_text, grade_color)
 
     # 5. Active UI
     else:
-        cv2.rectangle(frame, (0, 0), (380, 200), (0, 0, 0), -1)
-
-        cv2.putText(frame, f"Elapsed: {elapsed}s", (20, 35), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
+        hud.text("elapsed", f"Elapsed: {elapsed}s", (20, 35), 0.7, (200, 200, 200), 2)
         
         time_color = (0, 0, 255) if remaining <= 10 else (0, 255, 255)
-        cv2.putText(frame, f"Left: {remaining}s", (200, 35), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, time_color, 2)
+        hud.text("left", f"Left: {remaining}s", (200, 35), 0.7, time_color, 2)
 
         # Show Total Time Held (This is the "Score")
         hold_color = (0, 255, 0) if form_good else (255, 255, 255)
-        cv2.putText(frame, f"HELD: {int(total_hold_time)}s", (20, 90), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, hold_color, 3)
+        hud.text("score", f"HELD: {int(total_hold_time)}s", (20, 90), 1.5, hold_color, 3)
 
         font_scale = 1.0 if alert_active else 0.7
-        cv2.putText(frame, feedback, (20, 150), 
-                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, feedback_color, 2)
+        hud.text("feedback", feedback, (20, 150), font_scale, feedback_color, 2)
         
         # Show Angle for debugging
-        cv2.putText(frame, f"Hip Angle: {int(current_angle)}", (20, 185), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100, 100, 100), 1)
+        hud.text("value", f"Hip Angle: {int(current_angle)}", (20, 185), 0.5, (100, 100, 100), 1)
 
-        if results.pose_landmarks:
-            mp_draw.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+        hud.blit(frame)
+
+        if landmarks is not None:
+            engine.draw(frame, landmarks)
+
+    if show_metrics:
+        metrics.draw(frame)
+    metrics.mark("overlay")
 
     cv2.imshow("AI Plank Trainer", frame)
 
     # ===================== INPUTS =====================
     key = cv2.waitKey(1) & 0xFF
+    metrics.mark("display")
+    metrics.end(cap.dropped)
+
     if key == ord('q'):
         break
+    if key == ord('m'):
+        show_metrics = not show_metrics
+
     if key == ord('s'):
         total_hold_time = 0
         elapsed = 0
@@ -244,4 +233,7 @@ while cap.isOpened():
         beep(800, 300)
 
 cap.release()
+uploader.close()
+reporter.close()
+metrics.dump()
 cv2.destroyAllWindows()
\ No newline at end of file
@@ -0,0 +1,306 @@
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+try:
+    import mediapipe as mp
+except ImportError:  # drawing and landmark replay still work without it
+    mp = None
+
+from .landmarks import POSE_CONNECTIONS, VIS, mirror, to_array
+from .roi import RoiTracker
+
+# ===================== MEDIAPIPE TASKS MODELS =====================
+# The Tasks PoseLandmarker loads its model from a .task file; one per
+# model_complexity, fetched on first use.
+RUNNING_MODES = ("solutions", "video", "live_stream")
+MODEL_VARIANTS = ("lite", "full", "heavy")
+MODEL_URL = ("https://storage.googleapis.com/mediapipe-models/pose_landmarker/"
+             "pose_landmarker_{variant}/float16/latest/pose_landmarker_{variant}.task")
+DEFAULT_MODEL_DIR = Path.home() / ".ai_fitness" / "models"
+
+# A live frame whose result hasn't arrived after this long counts as
+# dropped by MediaPipe, and the next frame is sent instead
+LIVE_TIMEOUT = 0.5
+
+
+def model_file(model_complexity=1, directory=DEFAULT_MODEL_DIR):
+    """Path of the PoseLandmarker model for a complexity, downloading it if missing"""
+    variant = MODEL_VARIANTS[model_complexity]
+    path = Path(directory) / f"pose_landmarker_{variant}.task"
+    if not path.exists():
+        import requests
+        url = MODEL_URL.format(variant=variant)
+        print(f"Downloading the pose model to {path} ...")
+        response = requests.get(url, timeout=(3.05, 60))
+        response.raise_for_status()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".part")
+        partial.write_bytes(response.content)
+        partial.replace(path)
+    return path
+
+
+class PoseEngine:
+    """Owns the MediaPipe Pose model and the per-frame inference pipeline.
+
+    Every trainer used to build its own mp_pose.Pose and run cvtColor +
+    process itself. Keeping it here gives one place to tune the hottest
+    call in the loop.
+
+    running_mode:      "solutions": the legacy mp.solutions.pose model,
+                       synchronous. "video": the Tasks PoseLandmarker on
+                       timestamped frames, synchronous (offline files).
+                       "live_stream": the PoseLandmarker running
+                       asynchronously; process() hands the frame over
+                       and returns the newest finished pose, so inference
+                       on frame N overlaps with counting and drawing of
+                       frame N - 1 (landmarks lag by about a frame)
+    model_path:        PoseLandmarker .task file for the Tasks modes
+                       (default: downloaded per model_complexity)
+    model_complexity:  0 (lite), 1 (full) or 2 (heavy)
+    input_width:       downscale frames to this width before inference
+                       (None = feed the frame as-is). Landmarks are
+                       normalized, so callers never see the difference.
+    static_image_mode: run detection on every frame instead of tracking
+                       (smooth_landmarks and this are "solutions" only)
+    roi:               crop inference to a box around the person tracked
+                       from the previous frame (see roi.RoiTracker); falls
+                       back to the full frame whenever the person is lost
+    scheduler:         optional scheduler.InferenceScheduler; process() then
+                       only runs the model on the frames it asks for and
+                       returns extrapolated landmarks in between (in
+                       live_stream mode the last pose is kept instead)
+    smoother:          optional landmark filter from filters.py (e.g.
+                       RepSpec.make_filter()); applied to every returned
+                       pose and reset whenever the person is lost
+    mirror:            return landmarks as if the frame had been flipped
+                       horizontally (the trainers' selfie view), without
+                       flipping any pixels; for callers that never show
+                       the frame
+
+    The RGB (and downscaled) model input lives in buffers reused from
+    frame to frame, and is handed to MediaPipe read-only so it is passed
+    by reference instead of copied.
+    """
+
+    def __init__(self, model_complexity=1, input_width=None,
+                 static_image_mode=False,
+                 min_detection_confidence=0.7,
+                 min_tracking_confidence=0.7,
+                 smooth_landmarks=True,
+                 roi=False,
+                 scheduler=None,
+                 smoother=None,
+                 mirror=False,
+                 running_mode="solutions",
+                 model_path=None):
+        if mp is None:
+            raise ImportError("PoseEngine needs mediapipe: pip install mediapipe")
+        if running_mode not in RUNNING_MODES:
+            raise ValueError(f"running_mode must be one of {RUNNING_MODES}, got {running_mode!r}")
+        self.input_width = input_width
+        self.running_mode = running_mode
+        if running_mode == "solutions":
+            self.pose = mp.solutions.pose.Pose(
+                static_image_mode=static_image_mode,
+                model_complexity=model_complexity,
+                smooth_landmarks=smooth_landmarks,
+                min_detection_confidence=min_detection_confidence,
+                min_tracking_confidence=min_tracking_confidence
+            )
+        else:
+            self.pose = self._landmarker(model_path or model_file(model_complexity),
+                                         min_detection_confidence, min_tracking_confidence)
+        self.roi = RoiTracker() if roi else None
+        self.scheduler = scheduler
+        self.smoother = smoother
+        self.mirror = mirror
+        self._frame_shape = None
+        self._small = None  # downscaled frame
+        self._rgb = None    # model input
+        # Raw result of the last inference (crop coordinates with roi)
+        self.results = None
+
+        # Tasks timestamps (ms, strictly increasing) and live_stream state
+        self._last_ms = -1
+        self._lock = threading.Lock()
+        self._arrived = None    # (result, timestamp_ms) from the callback
+        self._in_flight = None  # monotonic time the pending frame was sent
+        self._latest = None     # last pose returned in live_stream mode
+
+    def _landmarker(self, model_path, min_detection_confidence, min_tracking_confidence):
+        from mediapipe.tasks.python import BaseOptions, vision
+
+        live = self.running_mode == "live_stream"
+        options = vision.PoseLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=str(model_path)),
+            running_mode=vision.RunningMode.LIVE_STREAM if live else vision.RunningMode.VIDEO,
+            num_poses=1,
+            min_pose_detection_confidence=min_detection_confidence,
+            min_pose_presence_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+            result_callback=self._on_result if live else None,
+        )
+        return vision.PoseLandmarker.create_from_options(options)
+
+    def _timestamp(self, t):
+        """Seconds -> the strictly increasing milliseconds the Tasks API wants"""
+        ms = max(int(t * 1000), self._last_ms + 1)
+        self._last_ms = ms
+        return ms
+
+    def _image(self, rgb_image):
+        return mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_image)
+
+    def _resize(self, frame):
+        h, w = frame.shape[:2]
+        if not self.input_width or w <= self.input_width:
+            return frame
+        size = (self.input_width, int(h * self.input_width / w))
+        self._small = _reuse(self._small, (size[1], size[0], 3))
+        return cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+
+    def prepare(self, frame):
+        """BGR camera frame -> RGB model input (ROI crop, then downscale).
+
+        Returns the engine's input buffer, overwritten by the next call.
+        """
+        self._frame_shape = frame.shape
+        if self.roi is not None:
+            frame = self.roi.crop(frame)
+        frame = self._resize(frame)
+        self._rgb = _reuse(self._rgb, frame.shape)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb)
+
+    def infer(self, rgb_image, t=None):
+        """Runs the model on a prepared RGB image; same return as process().
+
+        t (seconds) timestamps the frame in "video" mode (default: now);
+        "live_stream" only runs through process().
+        """
+        rgb_image.flags.writeable = False  # MediaPipe takes it by reference
+        try:
+            if self.running_mode == "solutions":
+                self.results = self.pose.process(rgb_image)
+            elif self.running_mode == "video":
+                if t is None:
+                    t = time.monotonic()
+                self.results = self.pose.detect_for_video(self._image(rgb_image), self._timestamp(t))
+            else:
+                raise RuntimeError("live_stream mode runs through process()")
+        finally:
+            rgb_image.flags.writeable = True
+        return self._to_landmarks(self.results)
+
+    def _to_landmarks(self, results):
+        """Model result -> (33, 4) full-frame landmarks, or None; updates the ROI"""
+        if self.running_mode == "solutions":
+            found = results.pose_landmarks.landmark if results.pose_landmarks else None
+        else:
+            found = results.pose_landmarks[0] if results.pose_landmarks else None
+
+        if found is None:
+            if self.roi is not None:
+                self.roi.reset()
+            return None
+        landmarks = to_array(found)
+        if self.roi is not None:
+            self.roi.to_frame(landmarks, self._frame_shape)
+            self.roi.update(landmarks, self._frame_shape)
+        if self.mirror:
+            landmarks = mirror(landmarks)
+        return landmarks
+
+    def process(self, frame, t=None):
+        """Runs pose inference on a BGR frame.
+
+        Returns a (33, 4) float32 array of (x, y, z, visibility) in
+        normalized image coordinates, or None when no person is found.
+        t is the frame time in seconds (default: now); pass the recorded
+        timestamps when processing video faster or slower than real time.
+        """
+        if t is None:
+            t = time.monotonic()
+        if self.running_mode == "live_stream":
+            return self._process_live(frame, t)
+        if self.scheduler is None:
+            landmarks = self._process(frame, t)
+        elif self.scheduler.should_infer():
+            landmarks = self._process(frame, t)
+            self.scheduler.observe(landmarks, t)
+        else:
+            landmarks = self.scheduler.predict(t)
+        return self.smooth(landmarks, t)
+
+    def _process_live(self, frame, t):
+        # 1. Pick up the pose MediaPipe finished since the last frame. The
+        #    ROI still holds the box that frame was cropped with: only one
+        #    frame is ever in flight.
+        with self._lock:
+            arrived, self._arrived = self._arrived, None
+        if arrived is not None:
+            self.results, timestamp_ms = arrived
+            self._in_flight = None
+            landmarks = self._to_landmarks(self.results)
+            t_result = timestamp_ms / 1000
+            if self.scheduler is not None:
+                self.scheduler.observe(landmarks, t_result)
+            self._latest = self.smooth(landmarks, t_result)
+        elif self._in_flight is not None and time.monotonic() - self._in_flight > LIVE_TIMEOUT:
+            self._in_flight = None  # dropped inside MediaPipe, send a new one
+
+        # 2. Hand this frame over; its pose comes back during a later call
+        if self._in_flight is None and (self.scheduler is None or self.scheduler.should_infer()):
+            self._in_flight = time.monotonic()
+            self.pose.detect_async(self._image(self.prepare(frame)), self._timestamp(t))
+        return self._latest
+
+    def _on_result(self, result, image, timestamp_ms):
+        """live_stream callback, on MediaPipe's thread"""
+        with self._lock:
+            self._arrived = (result, timestamp_ms)
+
+    def smooth(self, landmarks, t):
+        """Applies the smoother (if any); resets it when nobody was found"""
+        if self.smoother is None:
+            return landmarks
+        if landmarks is None:
+            self.smoother.reset()
+            return None
+        return self.smoother(landmarks, t)
+
+    def _process(self, frame, t):
+        cropped = self.roi is not None and self.roi.box is not None
+        landmarks = self.infer(self.prepare(frame), t)
+        if landmarks is None and cropped:
+            # Lost inside the crop: look at the whole frame this time
+            landmarks = self.infer(self.prepare(frame), t)
+        return landmarks
+
+    @staticmethod
+    def draw(frame, landmarks, min_visibility=0.5):
+        """Draws the skeleton of a (33, 4) landmark array onto frame."""
+        h, w = frame.shape[:2]
+        pts = [tuple(p) for p in (landmarks[:, :2] * (w, h)).astype(int).tolist()]
+        visible = (landmarks[:, VIS] >= min_visibility).tolist()
+
+        for a, b in POSE_CONNECTIONS.tolist():
+            if visible[a] and visible[b]:
+                cv2.line(frame, pts[a], pts[b], (224, 224, 224), 2)
+        for p, v in zip(pts, visible):
+            if v:
+                cv2.circle(frame, p, 3, (0, 0, 255), -1)
+
+    def close(self):
+        self.pose.close()
+
+
+def _reuse(buf, shape):
+    """buf if it is a uint8 image of this shape, otherwise a new one"""
+    if buf is None or buf.shape != shape:
+        buf = np.empty(shape, dtype=np.uint8)
+    return buf
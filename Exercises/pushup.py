@@ -1,27 +1,48 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 import time
-import winsound  # Windows only
 
-# ===================== 1. SETUP & CONFIGURATION =====================
-mp_pose = mp.solutions.pose
-mp_draw = mp.solutions.drawing_utils
+from Exercises.audio import beep
+from Exercises.capture import FrameGrabber
+from Exercises.hud import HudLayer, ResultScreen
+from Exercises.metrics import FrameMetrics, MetricsReporter
+from Exercises.pose_engine import PoseEngine
+from Exercises.rep_counter import RepCounter
+from Exercises.scheduler import InferenceScheduler
+from Exercises.specs import PUSHUPS
+from Exercises.uploader import WorkoutUploader
 
-pose = mp_pose.Pose(
+# ===================== 1. SETUP & CONFIGURATION =====================
+engine = PoseEngine(
     min_detection_confidence=0.7,
-    min_tracking_confidence=0.7
+    min_tracking_confidence=0.7,
+    roi=True,  # Infer on a crop around the person, full frame when lost
+    # Skip inference while moving slowly, every frame near the thresholds
+    scheduler=InferenceScheduler.for_spec(PUSHUPS),
+    smoother=PUSHUPS.make_filter()  # Per-exercise landmark filter, see specs.py
 )
 
-cap = cv2.VideoCapture(0)
+cap = FrameGrabber(0, mirror=True)  # Threaded reader: newest frame, mirrored (selfie view)
+
+# Background uploads to the Django backend (spools to disk when offline)
+uploader = WorkoutUploader()
+
+# Per-stage frame timings, reported to the backend ("M" toggles the HUD)
+metrics = FrameMetrics("pushups")
+reporter = MetricsReporter(metrics)
+show_metrics = False
+
+# HUD panels, rendered once and redrawn only where something changed
+hud = HudLayer((380, 200))
+result_screen = ResultScreen()
 
 # ===================== CONSTANTS =====================
 TOTAL_TIME = 120  # 2 Minutes
 # Pushup Ratios (Arm Compression)
 # 1.0 = Fully straight arm
 # 0.6 = Deep pushup (90 degree bend)
-RATIO_UP = 0.95   
-RATIO_DOWN = 0.65 
+RATIO_UP = PUSHUPS.reset_at     # 0.95
+RATIO_DOWN = PUSHUPS.count_at   # 0.65
 
 # ===================== STATE VARIABLES =====================
 timer_running = False
@@ -30,7 +51,7 @@ elapsed = 0
 remaining = TOTAL_TIME
 
 pushup_count = 0
-stage = "up"
+counter = RepCounter(PUSHUPS)  # up/down stage hysteresis
 last_rep_time = 0
 
 triggered_alerts = set()
@@ -39,12 +60,6 @@ feedback_color = (0, 255, 255) # Yellow
 alert_active = False 
 
 # ===================== FUNCTIONS =====================
-def beep(freq=800, dur=100):
-    try:
-        winsound.Beep(freq, dur)
-    except:
-        pass
-
 def get_grade(count):
     # Grading criteria for 2 mins (Adjustable)
     if count >= 20:
@@ -54,22 +69,19 @@ def get_grade(count):
     else:
         return "BAD", (0, 0, 255)       
 
-def calculate_distance(a, b):
-    return np.sqrt((a.x - b.x)**2 + (a.y - b.y)**2)
-
 # ===================== MAIN LOOP =====================
 while cap.isOpened():
+    metrics.start()
     ret, frame = cap.read()
     if not ret:
         break
+    metrics.mark("read")
 
     # 1. Prepare Frame
     # For pushups, side view is best. 
-    # Flip is optional depending on where you place the camera.
-    frame = cv2.flip(frame, 1) 
     h, w, _ = frame.shape
-    rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(rgb_image)
+    landmarks = engine.process(frame)
+    metrics.mark("pose")
     
     # 2. Timer Logic
     current_time = time.time()
@@ -93,43 +105,24 @@ while cap.isOpened():
             timer_running = False
             feedback = "TIME OVER"
             beep(1500, 1000) 
+            uploader.submit("pushups", pushup_count, TOTAL_TIME, get_grade(pushup_count)[0])
 
     # 3. Pushup Logic (Arm Ratio)
     current_ratio = 0.0
-    if results.pose_landmarks:
-        lm = results.pose_landmarks.landmark
-        
-        # Check Visibility (Shoulder & Wrist)
-        # We use LEFT side by default. If you show your RIGHT side, swap to RIGHT_xxx
-        l_shoulder = lm[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        l_elbow = lm[mp_pose.PoseLandmark.LEFT_ELBOW.value]
-        l_wrist = lm[mp_pose.PoseLandmark.LEFT_WRIST.value]
-
-        if l_shoulder.visibility > 0.5 and l_wrist.visibility > 0.5:
-            
-            # --- RATIO CALCULATION ---
-            # Total length of the arm parts (Upper Arm + Forearm)
-            full_arm_length = calculate_distance(l_shoulder, l_elbow) + calculate_distance(l_elbow, l_wrist)
-            
-            # Current straight-line distance from Shoulder to Wrist
-            effective_length = calculate_distance(l_shoulder, l_wrist)
-
-            # Ratio: If arm is straight, Ratio is ~1.0. If bent, Ratio drops.
-            if full_arm_length > 0:
-                current_ratio = effective_length / full_arm_length
+    if landmarks is not None:
+        # --- RATIO CALCULATION ---
+        # Shoulder-to-Wrist distance / (Upper Arm + Forearm)
+        # Ratio: If arm is straight, Ratio is ~1.0. If bent, Ratio drops.
+        # We use LEFT side by default; NaN if shoulder/wrist not visible.
+        ratio = PUSHUPS.measure(landmarks)
+
+        if not np.isnan(ratio):
+            current_ratio = ratio
             
             # --- COUNTING LOGIC ---
             if timer_running:
-                # UP PHASE (Arm Straight)
-                if current_ratio > RATIO_UP:
-                    stage = "up"
-                    if not alert_active: 
-                        feedback = "GO DOWN"
-                        feedback_color = (255, 255, 255)
-                
-                # DOWN PHASE (Arm Bent)
-                elif current_ratio < RATIO_DOWN and stage == "up":
-                    stage = "down"
+                # DOWN PHASE (Arm Bent) after an UP PHASE
+                if counter.update(current_ratio):
                     pushup_count += 1
                     last_rep_time = time.time()
                     if not alert_active:
@@ -137,6 +130,12 @@ while cap.isOpened():
                         feedback_color = (0, 255, 0)
                     beep(1000, 150)
 
+                # UP PHASE (Arm Straight)
+                elif current_ratio > RATIO_UP:
+                    if not alert_active: 
+                        feedback = "GO DOWN"
+                        feedback_color = (255, 255, 255)
+
                 # --- DISTRACTION CHECK (8s) ---
                 if (time.time() - last_rep_time > 8) and not alert_active:
                     feedback = "KEEP MOVING!"
@@ -146,58 +145,55 @@ while cap.isOpened():
                 feedback = "SHOW FULL ARM"
                 feedback_color = (0, 0, 255)
 
+    metrics.mark("logic")
+
     # ===================== DRAWING UI =====================
     
     # 4. Result Screen
     if not timer_running and remaining == 0 and start_time != 0:
         grade_text, grade_color = get_grade(pushup_count)
         
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (50, 50), (w-50, h-50), (0,0,0), -1)
-        frame = cv2.addWeighted(overlay, 0.8, frame, 0.2, 0)
-        
-        cv2.putText(frame, "WORKOUT OVER", (w//2 - 180, h//2 - 60), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
-        cv2.putText(frame, f"PUSHUPS: {pushup_count}", (w//2 - 120, h//2), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
-        cv2.putText(frame, f"GRADE: {grade_text}", (w//2 - 160, h//2 + 80), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, grade_color, 4)
-        cv2.putText(frame, "Press 'S' to Restart", (w//2 - 130, h-80), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (200, 200, 200), 1)
+        result_screen.draw(frame, f"PUSHUPS: {pushup_count}", grade_text, grade_color)
 
     # 5. Active UI
     else:
-        cv2.rectangle(frame, (0, 0), (380, 200), (0, 0, 0), -1)
-
-        cv2.putText(frame, f"Elapsed: {elapsed}s", (20, 35), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
+        hud.text("elapsed", f"Elapsed: {elapsed}s", (20, 35), 0.7, (200, 200, 200), 2)
         
         time_color = (0, 0, 255) if remaining <= 10 else (0, 255, 255)
-        cv2.putText(frame, f"Left: {remaining}s", (200, 35), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, time_color, 2)
+        hud.text("left", f"Left: {remaining}s", (200, 35), 0.7, time_color, 2)
 
-        cv2.putText(frame, f"PUSHUPS: {pushup_count}", (20, 90), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
+        hud.text("score", f"PUSHUPS: {pushup_count}", (20, 90), 1.5, (0, 255, 0), 3)
 
         font_scale = 1.0 if alert_active else 0.7
-        cv2.putText(frame, feedback, (20, 150), 
-                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, feedback_color, 2)
+        hud.text("feedback", feedback, (20, 150), font_scale, feedback_color, 2)
         
         # Show Arm Ratio for debugging
-        cv2.putText(frame, f"Arm Ratio: {current_ratio:.2f}", (20, 185), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100, 100, 100), 1)
+        hud.text("value", f"Arm Ratio: {current_ratio:.2f}", (20, 185), 0.5, (100, 100, 100), 1)
+
+        hud.blit(frame)
 
-        if results.pose_landmarks:
-            mp_draw.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+        if landmarks is not None:
+            engine.draw(frame, landmarks)
+
+    if show_metrics:
+        metrics.draw(frame)
+    metrics.mark("overlay")
 
     cv2.imshow("AI Pushup Trainer", frame)
 
     # ===================== INPUTS =====================
     key = cv2.waitKey(1) & 0xFF
+    metrics.mark("display")
+    metrics.end(cap.dropped)
+
     if key == ord('q'):
         break
+    if key == ord('m'):
+        show_metrics = not show_metrics
+
     if key == ord('s'):
         pushup_count = 0
+        counter.reset()
         elapsed = 0
         remaining = TOTAL_TIME
         start_time = time.time()
@@ -208,4 +204,7 @@ while cap.isOpened():
         beep(800, 300)
 
 cap.release()
+uploader.close()
+reporter.close()
+metrics.dump()
 cv2.destroyAllWindows()
\ No newline at end of file
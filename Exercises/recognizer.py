@@ -0,0 +1,368 @@
+import argparse
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from .features import ANGLE, EXERCISE_FEATURES, EXTENSION, TILT, VERTICAL, exercise_features
+from .landmarks import ANKLE, ELBOW, HIP, KNEE, LEFT, NUM_LANDMARKS, RIGHT, SHOULDER, VIS, WRIST
+from .specs import SPECS
+
+# ===================== WINDOW DESCRIPTORS =====================
+# A window of frames is described by how far each feature of the table
+# moves (5th-95th percentile range, the more mobile side of the body) and
+# by the torso tilt (lying / upright). Ranges are divided by a typical
+# span per feature, so every dimension is roughly 0 (still) - 1 (a full
+# rep) and a plain Euclidean distance works across angles and ratios.
+# They are capped at MAX_MOTION: the vertical ratios blow up when the
+# torso is nearly horizontal, and one such feature shouldn't outweigh all
+# the others.
+WINDOW = 60        # frames, about 2 s at trainer frame rates
+STRIDE = 10        # frames between two decisions
+MIN_VISIBLE = 0.5  # fraction of the window the joints must be visible
+MAX_MOTION = 1.5   # spans; beyond that a feature just "moves a lot"
+MIN_MOTION = 0.5   # spans; a window where nothing moves more is not exercising
+DEFAULT_MODEL = Path.home() / ".ai_fitness" / "models" / "recognizer.npz"
+
+_KIND_SPAN = {ANGLE: 90.0, VERTICAL: 1.0, EXTENSION: 0.5, TILT: 45.0}
+
+
+def _spans():
+    """Typical range of motion per feature: the widest rep of any exercise
+    counted on it, or a default for its kind"""
+    spans = []
+    for name, kind, *_ in EXERCISE_FEATURES:
+        reps = [abs(s.reset_at - s.count_at) for s in SPECS.values() if s.metric == name]
+        spans.append(max(reps) if reps else _KIND_SPAN[kind])
+    return np.array(spans, dtype=np.float32)
+
+
+FEATURE_NAMES = [name for name, *_ in EXERCISE_FEATURES]
+DESCRIPTOR_NAMES = [f"{name}_motion" for name in FEATURE_NAMES] + ["torso_tilt_mean"]
+SPANS = _spans()
+_TILT = FEATURE_NAMES.index("torso_tilt")
+
+
+def window_values(landmarks, table=exercise_features, out=None):
+    """(..., 33, 4) poses -> (..., F) feature values, NaN where not visible"""
+    values = table(landmarks, out=out)
+    values[table.visibility(landmarks) < 0.5] = np.nan
+    return values
+
+
+def describe(values):
+    """(..., W, F) window(s) of feature values -> (..., D) descriptors.
+
+    All NaN when the joints were visible in less than MIN_VISIBLE of it.
+    """
+    sides = values.reshape(values.shape[:-1] + (len(FEATURE_NAMES), 2))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns
+        lo, hi = np.nanpercentile(sides, (5, 95), axis=-3)
+        motion = np.minimum(np.fmax((hi - lo)[..., 0], (hi - lo)[..., 1]) / SPANS, MAX_MOTION)
+        tilt = np.nanmean(sides[..., _TILT, :], axis=(-2, -1)) / 90.0
+
+    descriptor = np.concatenate([motion, tilt[..., None]], axis=-1).astype(np.float32)
+    seen = (~np.isnan(values)).any(axis=-1).mean(axis=-1)
+    descriptor[seen < MIN_VISIBLE] = np.nan
+    return descriptor
+
+
+def session_descriptors(landmarks, window=WINDOW, stride=STRIDE):
+    """Descriptors of every window of a recorded session, (N, D)"""
+    values = window_values(np.asarray(landmarks, dtype=np.float32))
+    if len(values) < window:
+        return np.empty((0, len(DESCRIPTOR_NAMES)), dtype=np.float32)
+    windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)[::stride]
+    return describe(np.moveaxis(windows, -1, -2))  # (N, W, F)
+
+
+# ===================== SYNTHETIC REPS =====================
+# The untrained prior is built from a stick figure doing each exercise, so
+# it knows what moves along with the counted metric and what stays still.
+# A pose is a few segment directions in degrees: limbs from straight down
+# (positive = the way the figure faces), the torso from straight up
+# (positive = leaning forward). Lengths are in torso lengths; no feature
+# depends on position or scale.
+BONES = {"torso": 1.0, "thigh": 0.9, "shin": 0.9, "upper_arm": 0.6, "forearm": 0.55}
+
+# exercise: (filmed side-on, phase -> directions); phase 0 is the rest
+# position, growing phases go into the rep. A (left, right) pair moves the
+# two sides differently; the left side faces a side-on camera.
+MOTIONS = {
+    "squats": (True, lambda p: dict(torso=45 * p, thigh=100 * p, shin=-40 * p,
+                                     upper_arm=80, forearm=80)),
+    "pushups": (True, lambda p: dict(torso=-80 - 8 * p, thigh=80 + 8 * p, shin=80 + 8 * p,
+                                      upper_arm=85 * p, forearm=0)),
+    "lunges": (True, lambda p: dict(torso=0, thigh=(90 * p, -15), shin=(0, -15 - 75 * p),
+                                     upper_arm=0, forearm=0)),
+    "curls": (True, lambda p: dict(torso=0, thigh=0, shin=0, upper_arm=0, forearm=150 * p)),
+    "tricep_dips": (True, lambda p: dict(torso=0, thigh=80, shin=0,
+                                          upper_arm=-15 - 80 * p, forearm=0)),
+    "crunches": (True, lambda p: dict(torso=-90 + 50 * p, thigh=140, shin=20,
+                                       upper_arm=90 - 50 * p, forearm=90 - 50 * p)),
+    "lateral_raises": (False, lambda p: dict(torso=0, thigh=3, shin=0,
+                                              upper_arm=10 + 80 * p, forearm=10 + 80 * p)),
+}
+_PHASES = np.linspace(-1.0, 2.0, 301)
+
+
+def _direction(degrees):
+    radians = np.radians(degrees)
+    return np.array([np.sin(radians), np.cos(radians)])
+
+
+def stick_figure(side_on, directions, bones=BONES):
+    """(33, 4) pose of the stick figure; joints outside the limbs stay 0"""
+    lm = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    for side, sign in ((LEFT, -1.0), (RIGHT, 1.0)):
+        d = {k: v[side] if isinstance(v, tuple) else v for k, v in directions.items()}
+        if side_on:
+            hip, turn, visibility = np.array([0.02 * sign, 0.0]), 1.0, (0.95 if side == LEFT else 0.7)
+            shoulder = hip
+        else:  # facing the camera: the left side moves to the left
+            hip, turn, visibility = np.array([0.12 * sign, 0.0]), sign, 0.95
+            shoulder = hip + [0.08 * sign, 0.0]
+        torso = np.radians(d["torso"])
+        shoulder = shoulder + bones["torso"] * np.array([np.sin(torso), -np.cos(torso)])
+        knee = hip + bones["thigh"] * _direction(turn * d["thigh"])
+        ankle = knee + bones["shin"] * _direction(turn * d["shin"])
+        elbow = shoulder + bones["upper_arm"] * _direction(turn * d["upper_arm"])
+        wrist = elbow + bones["forearm"] * _direction(turn * d["forearm"])
+        for joint, xy in ((SHOULDER, shoulder), (ELBOW, elbow), (WRIST, wrist),
+                          (HIP, hip), (KNEE, knee), (ANKLE, ankle)):
+            lm[joint[side], :2] = 0.5 + 0.2 * xy
+            lm[joint[side], VIS] = visibility
+    return lm
+
+
+def synthetic_reps(spec, frames=WINDOW, reps=2, overshoot=0.15, metric_range=None, bones=BONES):
+    """(frames, 33, 4) poses of the stick figure doing `reps` reps of spec.
+
+    The phase is scaled so spec's metric goes from reset_at to count_at
+    and `overshoot` of that further both ways, like a real rep, or over
+    metric_range=(start, end) exactly. ValueError if the figure can't
+    reach a value (or MOTIONS has no model of spec).
+    """
+    if spec.name not in MOTIONS:
+        raise ValueError(f"no stick figure motion for {spec.name!r}")
+    side_on, motion = MOTIONS[spec.name]
+    values = np.array([spec.measure(stick_figure(side_on, motion(p), bones)) for p in _PHASES])
+
+    def phase(value):
+        crossings = np.flatnonzero(np.diff(np.sign(values - value)) != 0)
+        if not len(crossings):
+            raise ValueError(f"{spec.name}: the stick figure never reaches {spec.metric} = {value}")
+        return _PHASES[crossings[np.argmin(np.abs(_PHASES[crossings]))]]
+
+    if metric_range is None:
+        start, end = phase(spec.reset_at), phase(spec.count_at)
+        start, end = start - overshoot * (end - start), end + overshoot * (end - start)
+    else:
+        start, end = phase(metric_range[0]), phase(metric_range[1])
+    sweep = (1.0 - np.cos(np.linspace(0.0, 2.0 * np.pi * reps, frames))) / 2.0
+    return np.stack([stick_figure(side_on, motion(start + (end - start) * x), bones) for x in sweep])
+
+
+# ===================== CLASSIFIER =====================
+class ExerciseRecognizer:
+    """Nearest-centroid exercise classifier over a sliding window of poses.
+
+    centroids: (K, D) descriptor per exercise; NaN dimensions are ignored,
+               so a centroid can constrain only the features it knows
+    labels:    K exercise names (keys of specs.SPECS)
+    max_distance: windows farther than this from every centroid are
+               "not exercising" (None), as are windows where no feature
+               moves MIN_MOTION
+    confirm:   consecutive matching decisions before update() switches
+
+    update() is the streaming side: one pose per frame in, the current
+    exercise out. It decides every STRIDE frames and only switches after
+    `confirm` agreeing decisions, so a stray window doesn't reset a set.
+    """
+
+    def __init__(self, centroids, labels, max_distance=0.5, confirm=3,
+                 window=WINDOW, stride=STRIDE):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.labels = list(labels)
+        self.max_distance = float(max_distance)
+        self.confirm = confirm
+        self.window = window
+        self.stride = stride
+        self._values = np.empty((window, len(exercise_features)), dtype=np.float32)
+        self.reset()
+
+    @classmethod
+    def prior(cls, specs=None, **kwargs):
+        """Untrained centroids from the rep thresholds in specs.py.
+
+        Each centroid describes the stick figure (MOTIONS) doing the
+        exercise through its spec's rep range, so every feature counts:
+        the ones that should move as well as the ones that should stay
+        still. A spec without a motion model only expects its own metric
+        to sweep its range. Train on recordings (fit / from_sessions) for
+        real bodies and camera angles.
+        """
+        specs = list(SPECS.values() if specs is None else specs)
+        centroids = np.full((len(specs), len(DESCRIPTOR_NAMES)), np.nan, dtype=np.float32)
+        for i, spec in enumerate(specs):
+            if spec.name in MOTIONS:
+                centroids[i] = describe(window_values(synthetic_reps(spec)))
+            else:
+                column = FEATURE_NAMES.index(spec.metric)
+                centroids[i, column] = abs(spec.reset_at - spec.count_at) / SPANS[column]
+        return cls(centroids, [spec.name for spec in specs], **kwargs)
+
+    @classmethod
+    def fit(cls, descriptors, labels, **kwargs):
+        """Centroids from labelled window descriptors (N, D) / N names.
+
+        max_distance defaults to 1.5x the 95th percentile distance of the
+        training windows to their own centroid.
+        """
+        descriptors = np.asarray(descriptors, dtype=np.float32)
+        labels = np.asarray(labels)
+        usable = ~np.isnan(descriptors).all(axis=1)
+        descriptors, labels = descriptors[usable], labels[usable]
+        names = sorted(set(labels.tolist()))
+        if not names:
+            raise ValueError("no usable training windows")
+        centroids = np.stack([np.nanmean(descriptors[labels == name], axis=0) for name in names])
+        if "max_distance" not in kwargs:
+            own = _distances(descriptors, centroids)[np.arange(len(labels)),
+                                                     np.searchsorted(names, labels)]
+            kwargs["max_distance"] = 1.5 * float(np.percentile(own, 95))
+        return cls(centroids, names, **kwargs)
+
+    @classmethod
+    def from_sessions(cls, paths, **kwargs):
+        """Trains on recorded sessions, labelled by their stored exercise"""
+        from .recorder import load_session
+
+        window = kwargs.get("window", WINDOW)
+        stride = kwargs.get("stride", STRIDE)
+        descriptors, labels = [], []
+        for path in paths:
+            _, landmarks, exercise = load_session(path)
+            if exercise not in SPECS:
+                raise ValueError(f"{path}: no known exercise recorded ({exercise!r})")
+            found = session_descriptors(landmarks, window, stride)
+            descriptors.append(found)
+            labels += [exercise] * len(found)
+        return cls.fit(np.concatenate(descriptors), labels, **kwargs)
+
+    def save(self, path=DEFAULT_MODEL):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, centroids=self.centroids, labels=np.array(self.labels),
+                 max_distance=self.max_distance, window=self.window, stride=self.stride)
+        return path
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL, **kwargs):
+        with np.load(path) as data:
+            kwargs.setdefault("max_distance", float(data["max_distance"]))
+            kwargs.setdefault("window", int(data["window"]))
+            kwargs.setdefault("stride", int(data["stride"]))
+            return cls(data["centroids"], [str(label) for label in data["labels"]], **kwargs)
+
+    @classmethod
+    def default(cls, path=DEFAULT_MODEL):
+        """The trained model if one was saved, otherwise the prior"""
+        return cls.load(path) if Path(path).exists() else cls.prior()
+
+    # --- Classification ---
+    def classify(self, descriptors):
+        """(..., D) descriptors -> (label indices, distances); -1 = none"""
+        distances = _distances(descriptors, self.centroids)
+        best = np.argmin(np.where(np.isnan(distances), np.inf, distances), axis=-1)
+        distance = np.take_along_axis(distances, best[..., None], axis=-1)[..., 0]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN windows
+            moving = np.nanmax(np.asarray(descriptors)[..., :len(FEATURE_NAMES)], axis=-1) >= MIN_MOTION
+        best = np.where((distance <= self.max_distance) & moving, best, -1)
+        return best, distance
+
+    def predict(self, descriptor):
+        """Exercise name for one descriptor, or None"""
+        best, _ = self.classify(descriptor)
+        return None if best < 0 else self.labels[best]
+
+    # --- Streaming ---
+    def reset(self):
+        self._values[:] = np.nan
+        self.frames = 0  # poses fed to update() since reset()
+        self._candidate = None
+        self._votes = 0
+        self.proposed_at = None  # first pose of the window that proposed _candidate
+        self.exercise = None  # current decision
+        self.distance = np.nan
+
+    def update(self, landmarks):
+        """Adds one pose (None = nobody in frame); returns the current exercise.
+
+        Keeps the last decision while nobody exercises, so a pause between
+        reps or a walk to the next station doesn't end the set.
+        """
+        row = self._values[self.frames % self.window]
+        if landmarks is None:
+            row[:] = np.nan
+        else:
+            window_values(landmarks, out=row)
+        self.frames += 1
+        if self.frames < self.window or self.frames % self.stride:
+            return self.exercise
+
+        # Percentiles and means don't care about order: no need to unroll the ring
+        best, distance = self.classify(describe(self._values))
+        self.distance = float(distance)
+        label = None if best < 0 else self.labels[best]
+        if label is None:
+            self._candidate, self._votes, self.proposed_at = None, 0, None
+            return self.exercise
+        if label == self._candidate:
+            self._votes += 1
+        else:
+            self._candidate, self._votes = label, 1
+            self.proposed_at = self.frames - self.window
+        if self._votes >= self.confirm:
+            self.exercise = label
+        return self.exercise
+
+
+def _distances(descriptors, centroids):
+    """RMS difference over the dimensions both sides know, (..., K)"""
+    diff = np.asarray(descriptors, dtype=np.float32)[..., None, :] - centroids
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # no shared dimension
+        return np.sqrt(np.nanmean(diff * diff, axis=-1))
+
+
+# ===================== TRAINING CLI =====================
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train the exercise recognizer on recorded sessions (labelled by their exercise)")
+    parser.add_argument("sessions", nargs="+", help=".lmk sessions recorded with --exercise")
+    parser.add_argument("--output", default=str(DEFAULT_MODEL), help="model file to write")
+    parser.add_argument("--window", type=int, default=WINDOW, help="frames per window")
+    parser.add_argument("--stride", type=int, default=STRIDE, help="frames between windows")
+    args = parser.parse_args()
+
+    recognizer = ExerciseRecognizer.from_sessions(args.sessions, window=args.window,
+                                                  stride=args.stride)
+    print(f"{len(recognizer.labels)} exercises, max distance {recognizer.max_distance:.3f}")
+
+    # Window accuracy on the training sessions themselves
+    from .recorder import load_session
+    for path in args.sessions:
+        _, landmarks, exercise = load_session(path)
+        best, _ = recognizer.classify(session_descriptors(landmarks, args.window, args.stride))
+        if len(best):
+            hits = np.mean([b >= 0 and recognizer.labels[b] == exercise for b in best])
+            print(f"  {path}: {exercise}, {hits:.0%} of {len(best)} windows")
+
+    print("Wrote", recognizer.save(args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import argparse
+import time
+from pathlib import Path
+
+from .session_file import SUFFIX, LandmarkWriter, open_landmarks
+
+
+class SessionRecorder:
+    """Records a trainer session as a landmark time series.
+
+    write() is called once per processed frame with the (33, 4) array from
+    PoseEngine.process (or None when nobody was detected, stored as NaN)
+    and appends it straight to an .lmk file (see session_file.py), so
+    memory use stays flat however long the session runs. Times are stored
+    as seconds since the first frame (continuing an existing file, one frame
+    after its last record), together with the exercise name the
+    session was recorded for ("" if unknown).
+
+    With video=True the frames passed to write() are also saved next to it
+    as <name>.mp4, so replay can run pose inference again on the same input.
+    """
+
+    def __init__(self, path, exercise="", video=False, fps=30.0, precision="float16"):
+        self.path = Path(path).with_suffix(SUFFIX)
+        self.exercise = exercise
+        self.video_path = self.path.with_suffix(".mp4") if video else None
+        self.fps = fps
+
+        self._file = LandmarkWriter(self.path, exercise, precision)
+        self._t0 = None
+        # Resumed file: new times carry on from its last record
+        self._offset = 0.0 if self._file.last_t is None else self._file.last_t + 1.0 / fps
+        self._writer = None
+
+    def __len__(self):
+        return self._file.count
+
+    def write(self, landmarks, frame=None, t=None):
+        if t is None:
+            t = time.monotonic()
+        if self._t0 is None:
+            self._t0 = t
+        self._file.write(landmarks, t - self._t0 + self._offset)
+
+        if self.video_path is not None and frame is not None:
+            if self._writer is None:
+                import cv2
+                h, w = frame.shape[:2]
+                self._writer = cv2.VideoWriter(str(self.video_path),
+                                               cv2.VideoWriter_fourcc(*"mp4v"),
+                                               self.fps, (w, h))
+            self._writer.write(frame)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+        self._file.close()
+        return self.path
+
+
+def load_session(path):
+    """Returns (times, landmarks, exercise) from a recorded .lmk session,
+    memory-mapped (read-only, stored precision)."""
+    return open_landmarks(path)
+
+
+# ===================== CAMERA RECORDING =====================
+def main():
+    parser = argparse.ArgumentParser(
+        description="Record a webcam session as landmarks (and optionally video) for offline replay")
+    parser.add_argument("output", help="session file to write (.lmk)")
+    parser.add_argument("--exercise", default="", help="exercise being performed, e.g. squats")
+    parser.add_argument("--video", action="store_true", help="also save the camera frames as .mp4")
+    parser.add_argument("--source", default=0, help="camera index or video file")
+    parser.add_argument("--precision", choices=("float16", "float32"), default="float16",
+                        help="landmark precision on disk (default: float16)")
+    args = parser.parse_args()
+
+    import cv2
+    from .capture import FrameGrabber
+    from .pose_engine import PoseEngine
+
+    source = int(args.source) if str(args.source).isdigit() else args.source
+    live = isinstance(source, int)
+    engine = PoseEngine()
+    # Mirrored like the trainers, so left/right match a live session. A
+    # camera goes through the threaded grabber (newest frame, real time);
+    # a file is read frame by frame and timed by its position in the file,
+    # so the .lmk times match the saved video and replay
+    cap = FrameGrabber(source, mirror=True) if live else cv2.VideoCapture(source)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    recorder = SessionRecorder(args.output, exercise=args.exercise, video=args.video, fps=fps,
+                               precision=args.precision)
+    index = 0
+
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        t = None
+        if not live:
+            frame = cv2.flip(frame, 1)
+            t = index / fps
+            index += 1
+        landmarks = engine.process(frame, t)
+        recorder.write(landmarks, frame, t)
+
+        # Already written out, so the preview can draw on the frame itself
+        if landmarks is not None:
+            engine.draw(frame, landmarks)
+        cv2.putText(frame, f"REC {len(recorder)}", (20, 35),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+        cv2.putText(frame, "Press 'Q' to stop", (20, 70),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
+        cv2.imshow("Session Recorder", frame)
+
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+
+    cap.release()
+    engine.close()
+    cv2.destroyAllWindows()
+    print("Saved", len(recorder), "frames to", recorder.close())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import time
+
+import numpy as np
+
+from .features import EXERCISE_FEATURES, KERNELS
+from .filters import make_filter
+from .landmarks import LEFT, RIGHT, VIS
+
+# Direction of the movement that completes a rep
+FALLING = "falling"   # metric drops below count_at (squat ratio, curl angle)
+RISING = "rising"     # metric climbs above count_at (crunch tilt, raise angle)
+
+# Zones a metric value can fall into
+BETWEEN, RESET, COUNT = 0, 1, 2
+
+_FEATURES = {name: (kind, a, b, c) for name, kind, a, b, c in EXERCISE_FEATURES}
+
+
+class RepSpec:
+    """Declarative description of one rep-counted exercise.
+
+    metric:    feature name from features.EXERCISE_FEATURES ("leg_ratio", ...)
+    reset_at:  value the metric must pass to re-arm the counter
+    count_at:  value the metric must pass (after re-arming) to count a rep
+    direction: FALLING or RISING, which way count_at is crossed
+    stages:    (reset stage, count stage) labels shown by the trainers
+    side:      LEFT / RIGHT, or a side-indexed joint (e.g. KNEE) meaning
+               "whichever side of that joint is more visible"
+    visible:   joints that must have visibility > 0.5 on the chosen side,
+               otherwise the metric is NaN (not measurable this frame)
+    min_dwell: seconds the metric must stay in a zone before the stage
+               changes (0 = switch on the first frame, the old behaviour)
+    smoothing: landmark filter for this exercise as (kind, params), see
+               filters.make_filter; None = raw landmarks
+    """
+
+    def __init__(self, name, metric, reset_at, count_at, direction,
+                 stages=("up", "down"), side=LEFT, visible=(), min_dwell=0.0,
+                 smoothing=None):
+        self.name = name
+        self.metric = metric
+        self.reset_at = reset_at
+        self.count_at = count_at
+        self.direction = direction
+        self.stages = stages
+        self.side = side
+        self.visible = visible
+        self.min_dwell = min_dwell
+        self.smoothing = smoothing
+
+        kind, a, b, c = _FEATURES[metric]
+        self._kernel = KERNELS[kind]
+        self._joints = tuple(np.array(j, dtype=np.intp) for j in (a, b, c))
+        # (2, k) visibility indices: row 0 = left joints, row 1 = right joints
+        self._visible = np.array([[j[LEFT] for j in visible], [j[RIGHT] for j in visible]],
+                                 dtype=np.intp).reshape(2, len(visible))
+
+    def make_filter(self):
+        """A fresh landmark filter for this exercise (None without smoothing)"""
+        return make_filter(self.smoothing)
+
+    def pick_side(self, lm):
+        """LEFT/RIGHT (array of them for stacked poses) the metric is read from"""
+        if self.side in (LEFT, RIGHT):
+            return self.side
+        joint = self.side
+        return np.where(lm[..., joint[LEFT], VIS] > lm[..., joint[RIGHT], VIS], LEFT, RIGHT)[()]
+
+    def measure(self, lm, side=None):
+        """Metric value for a (33, 4) pose or (..., 33, 4) session.
+
+        NaN where the required joints are not visible.
+        """
+        if side is None:
+            side = self.pick_side(lm)
+        both = self._kernel(lm, *self._joints)                 # (..., 2)
+        value = np.where(side == LEFT, both[..., LEFT], both[..., RIGHT])
+        if len(self.visible):
+            ok = (lm[..., self._visible, VIS] > 0.5).all(axis=-1)  # (..., 2)
+            value = np.where(np.where(side == LEFT, ok[..., LEFT], ok[..., RIGHT]), value, np.nan)
+        return value[()]
+
+    def zones(self, values):
+        """Vectorized RESET / COUNT / BETWEEN classification (NaN -> BETWEEN)"""
+        values = np.asarray(values)
+        if self.direction == FALLING:
+            reset, count = values > self.reset_at, values < self.count_at
+        else:
+            reset, count = values < self.reset_at, values > self.count_at
+        return np.where(reset, RESET, np.where(count, COUNT, BETWEEN))
+
+
+class RepCounter:
+    """Live, frame-by-frame hysteresis counter driven by a RepSpec."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._state = RESET
+        self.stage = self.spec.stages[0]
+        self._pending = BETWEEN
+        self._since = 0.0
+
+    def _zone(self, value):
+        spec = self.spec
+        if spec.direction == FALLING:
+            if value > spec.reset_at: return RESET
+            if value < spec.count_at: return COUNT
+        else:
+            if value < spec.reset_at: return RESET
+            if value > spec.count_at: return COUNT
+        return BETWEEN
+
+    def update(self, value, t=None):
+        """Feeds one metric sample. Returns True when it completes a rep."""
+        zone = self._zone(value)
+        if zone == BETWEEN or zone == self._state:
+            self._pending = BETWEEN
+            return False
+
+        if self.spec.min_dwell > 0:
+            if t is None:
+                t = time.monotonic()
+            if self._pending != zone:
+                self._pending, self._since = zone, t
+            if t - self._since < self.spec.min_dwell:
+                return False
+
+        self._pending = BETWEEN
+        self._state = zone
+        self.stage = self.spec.stages[zone - 1]
+        if zone == COUNT:
+            self.count += 1
+            return True
+        return False
+
+
+def count_reps(spec, values, times=None):
+    """Bulk version of RepCounter over a whole metric time series.
+
+    Returns the frame indices at which reps were counted; the result is
+    identical to feeding the same samples to a fresh RepCounter one by one.
+    `times` (seconds per sample) is required when spec.min_dwell > 0.
+    """
+    values = np.asarray(values)
+    n = len(values)
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+    if times is None:
+        if spec.min_dwell > 0:
+            raise ValueError("times are required when min_dwell > 0")
+        times = np.zeros(n)
+    times = np.asarray(times, dtype=np.float64)
+
+    # Run-length encode the zones: a run is a stretch of identical zones
+    zones = spec.zones(values)
+    starts = np.flatnonzero(np.concatenate(([True], zones[1:] != zones[:-1])))
+    ends = np.append(starts[1:], n)
+    run_zones = zones[starts]
+
+    # A run changes the stage at its first sample that satisfies the dwell
+    accept = np.searchsorted(times, times[starts] + spec.min_dwell, side="left")
+    accept = np.maximum(accept, starts)
+    keep = (run_zones != BETWEEN) & (accept < ends)
+    events, at = run_zones[keep], accept[keep]
+
+    # A rep is a COUNT event whose previous effective event was RESET
+    prev = np.concatenate(([RESET], events[:-1]))
+    return at[(events == COUNT) & (prev == RESET)]
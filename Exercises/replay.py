@@ -0,0 +1,113 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .filters import filter_session
+from .landmarks import NUM_LANDMARKS
+from .recorder import load_session
+from .rep_counter import count_reps
+from .session_file import SUFFIX
+from .specs import SPECS
+
+
+def count_session(spec, times, landmarks):
+    """Counts reps over a whole recorded session with the trainers' logic.
+
+    Landmarks go through the exercise's smoothing filter first, as in the
+    live engine. The trainers skip frames where the metric is not
+    measurable (NaN), so those are dropped before the samples go through
+    count_reps, which is equivalent to feeding them to a live RepCounter
+    one by one.
+    """
+    values = spec.measure(filter_session(spec.make_filter(), times, landmarks))
+    measured = ~np.isnan(values)
+    t = times[measured]
+    reps = count_reps(spec, values[measured], t)
+    return {
+        "exercise": spec.name,
+        "frames": int(len(times)),
+        "measured_frames": int(measured.sum()),
+        "count": int(len(reps)),
+        "rep_times": [round(float(x), 3) for x in t[reps]],
+    }
+
+
+def video_landmarks(path, engine=None):
+    """Runs pose inference over every frame of a video file, headless.
+
+    Frames are used as stored (recordings are already mirrored) and are
+    timestamped from the clip's frame rate, so an engine in "video" running
+    mode can be passed in as well. Returns (times, landmarks) in the same
+    layout as a recorded session, with NaN rows where nobody was detected.
+    """
+    import cv2
+    from .pose_engine import PoseEngine
+
+    own_engine = engine is None
+    if own_engine:
+        engine = PoseEngine()
+    cap = cv2.VideoCapture(str(path))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    times, rows = [], []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        landmarks = engine.process(frame, len(rows) / fps)
+        times.append(len(rows) / fps)
+        rows.append(landmarks if landmarks is not None
+                    else np.full((NUM_LANDMARKS, 4), np.nan, dtype=np.float32))
+
+    cap.release()
+    if own_engine:
+        engine.close()
+    landmarks = (np.stack(rows) if rows
+                 else np.empty((0, NUM_LANDMARKS, 4), dtype=np.float32))
+    return np.asarray(times, dtype=np.float64), landmarks
+
+
+def replay(path, exercise=None):
+    """Replays a landmark session (.lmk) or a video file; returns the result dict."""
+    path = Path(path)
+    start = time.perf_counter()
+    if path.suffix == SUFFIX:
+        times, landmarks, recorded_as = load_session(path)
+        exercise = exercise or recorded_as
+    else:
+        times, landmarks = video_landmarks(path)
+    if exercise not in SPECS:
+        raise ValueError(f"unknown exercise {exercise!r}, expected one of {sorted(SPECS)}")
+
+    result = count_session(SPECS[exercise], times, landmarks)
+    elapsed = time.perf_counter() - start
+    result["source"] = str(path)
+    result["replay_seconds"] = round(elapsed, 4)
+    result["replay_fps"] = round(len(times) / elapsed, 1) if elapsed > 0 else None
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Count reps in recorded sessions without a camera or display")
+    parser.add_argument("sessions", nargs="+", help=".lmk landmark sessions or video files")
+    parser.add_argument("--exercise", choices=sorted(SPECS),
+                        help="exercise to count (default: the one stored in the session)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args()
+
+    for path in args.sessions:
+        result = replay(path, args.exercise)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(f"{result['source']}: {result['exercise']} x {result['count']} "
+                  f"({result['measured_frames']}/{result['frames']} frames measured, "
+                  f"{result['replay_fps']} fps)")
+
+
+if __name__ == "__main__":
+    main()
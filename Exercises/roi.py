@@ -0,0 +1,83 @@
+import numpy as np
+
+from .landmarks import VIS, X, Y, Z
+
+
+class RoiTracker:
+    """Keeps a padded box around the person for cropped inference.
+
+    The box comes from the previous frame's landmarks, so pose inference
+    only sees the part of the frame the person is in. It is kept stable
+    while the body stays well inside it and only re-centred when a
+    landmark nears the edge (or the box grows far larger than needed).
+    MediaPipe's own frame-to-frame tracking works in crop coordinates, so
+    a box that jumps every frame would fight it. The box follows the
+    body's shape (wide for a plank, tall when standing); MediaPipe pads a
+    non-square input itself.
+
+    padding:        extra margin on each side, as a fraction of the body size
+    min_visibility: landmarks below this don't count towards the box
+    min_size:       smallest box side, as a fraction of the shorter frame side
+                    (a box that would cover the whole frame becomes None)
+    """
+
+    def __init__(self, padding=0.25, min_visibility=0.5, min_size=0.3, min_landmarks=6):
+        self.padding = padding
+        self.min_visibility = min_visibility
+        self.min_size = min_size
+        self.min_landmarks = min_landmarks
+        self.box = None  # (x0, y0, x1, y1) in pixels, or None = full frame
+
+    def reset(self):
+        self.box = None
+
+    def crop(self, frame):
+        """View of frame inside the current box (the whole frame without one)"""
+        if self.box is None:
+            return frame
+        x0, y0, x1, y1 = self.box
+        return frame[y0:y1, x0:x1]
+
+    def to_frame(self, landmarks, shape):
+        """Maps crop-normalized landmarks to full-frame coordinates, in place"""
+        if self.box is None:
+            return landmarks
+        h, w = shape[:2]
+        x0, y0, x1, y1 = self.box
+        cw, ch = x1 - x0, y1 - y0
+        landmarks[:, X] = (x0 + landmarks[:, X] * cw) / w
+        landmarks[:, Y] = (y0 + landmarks[:, Y] * ch) / h
+        landmarks[:, Z] *= cw / w  # z shares the x scale
+        return landmarks
+
+    def update(self, landmarks, shape):
+        """Moves the box to follow full-frame landmarks; resets when lost"""
+        h, w = shape[:2]
+        visible = landmarks[:, VIS] > self.min_visibility
+        if visible.sum() < self.min_landmarks:
+            self.box = None
+            return
+
+        xs = np.clip(landmarks[visible, X], 0.0, 1.0) * w
+        ys = np.clip(landmarks[visible, Y], 0.0, 1.0) * h
+        bx0, bx1, by0, by1 = xs.min(), xs.max(), ys.min(), ys.max()
+        body = max(bx1 - bx0, by1 - by0)
+        margin = self.padding * body
+
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            inside = (bx0 - x0 > margin / 2 and x1 - bx1 > margin / 2 and
+                      by0 - y0 > margin / 2 and y1 - by1 > margin / 2)
+            if inside and max(x1 - x0, y1 - y0) < 2 * (body + 2 * margin):
+                return
+
+        smallest = self.min_size * min(w, h)
+        bw = int(min(max(bx1 - bx0 + 2 * margin, smallest), w))
+        bh = int(min(max(by1 - by0 + 2 * margin, smallest), h))
+        if bw >= w and bh >= h:
+            self.box = None  # cropping wouldn't save anything
+            return
+        cx, cy = (bx0 + bx1) / 2, (by0 + by1) / 2
+        x0 = int(np.clip(cx - bw / 2, 0, w - bw))
+        y0 = int(np.clip(cy - bh / 2, 0, h - bh))
+        self.box = (x0, y0, x0 + bw, y0 + bh)
@@ -0,0 +1,100 @@
+import numpy as np
+
+from .landmarks import NUM_LANDMARKS, VIS
+
+
+class InferenceScheduler:
+    """Decides per frame whether pose inference has to run.
+
+    While the body moves slowly the interval between inferences grows
+    one frame at a time up to `max_skip`; skipped frames get landmarks
+    extrapolated from the last two inferred poses. Any fast motion, a
+    lost person, or a metric value within `band` of one of `thresholds`
+    (the rep / form limits) drops straight back to every-frame inference,
+    so counting decisions are always made on real landmarks.
+
+    measure:     lm -> metric value (e.g. RepSpec.measure); None = motion only
+    thresholds:  metric values where counting decisions happen
+    band:        how close to a threshold counts as "near"
+    still_speed: mean landmark speed (frame widths per second) below which
+                 the body counts as still
+    """
+
+    def __init__(self, measure=None, thresholds=(), band=0.0,
+                 max_skip=3, still_speed=0.1, min_visibility=0.5):
+        self.measure = measure
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.band = band
+        self.max_skip = max_skip
+        self.still_speed = still_speed
+        self.min_visibility = min_visibility
+
+        self._out = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+        self._velocity = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+        self.reset()
+
+    @classmethod
+    def for_spec(cls, spec, band_fraction=0.15, **kwargs):
+        """Scheduler that stays on every frame near a RepSpec's thresholds"""
+        band = band_fraction * abs(spec.reset_at - spec.count_at)
+        return cls(spec.measure, (spec.reset_at, spec.count_at), band, **kwargs)
+
+    def reset(self):
+        self._last = None        # last inferred (33, 4) pose
+        self._last_t = 0.0
+        self._has_velocity = False
+        self.interval = 1        # infer every `interval` frames
+        self._since = 0          # frames since the last inference
+        self.skipped = 0
+
+    def should_infer(self):
+        if self._last is None or self._since + 1 >= self.interval:
+            return True
+        self._since += 1
+        self.skipped += 1
+        return False
+
+    def observe(self, landmarks, t):
+        """Feeds the result of a real inference made at time t (seconds)."""
+        self._since = 0
+        if landmarks is None:
+            self._last = None
+            self._has_velocity = False
+            self.interval = 1
+            return
+
+        speed = np.inf
+        if self._last is not None and t > self._last_t:
+            dt = t - self._last_t
+            np.subtract(landmarks[:, :3], self._last[:, :3], out=self._velocity)
+            self._velocity /= dt
+            self._has_velocity = True
+            visible = landmarks[:, VIS] > self.min_visibility
+            if visible.any():
+                speed = float(np.abs(self._velocity[visible, :2]).mean())
+
+        self._last = landmarks.copy()
+        self._last_t = t
+
+        if speed < self.still_speed and not self._near_threshold(landmarks):
+            self.interval = min(self.interval + 1, self.max_skip)
+        else:
+            self.interval = 1
+
+    def _near_threshold(self, landmarks):
+        if self.measure is None or not len(self.thresholds):
+            return False
+        value = self.measure(landmarks)
+        if np.isnan(value):
+            return True
+        return bool((np.abs(self.thresholds - value) <= self.band).any())
+
+    def predict(self, t):
+        """Extrapolated pose for a skipped frame at time t.
+
+        Returns a shared buffer that is overwritten on the next call.
+        """
+        np.copyto(self._out, self._last)
+        if self._has_velocity:
+            self._out[:, :3] += self._velocity * (t - self._last_t)
+        return self._out
@@ -0,0 +1,205 @@
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+
+from .recognizer import DEFAULT_MODEL, ExerciseRecognizer
+from .rep_counter import RepCounter
+from .specs import SPECS
+
+# Number keys pin an exercise, in this order; "A" goes back to automatic
+PIN_KEYS = {ord(str(i + 1)): name for i, name in enumerate(SPECS)}
+
+
+class CircuitSession:
+    """Routes one pose stream to the counter of whatever is being performed.
+
+    The exercise comes from an ExerciseRecognizer, or is pinned by hand.
+    Switching swaps the spec, counter and landmark filter but keeps the
+    camera and the pose model, so moving to the next station of a circuit
+    costs nothing. The reps done while the new exercise was still being
+    recognised are counted once it is, from the poses since the window
+    that first proposed it (never the previous exercise's).
+
+    on_set(exercise, count, duration) is called for every finished set
+    with at least one rep (on a switch and on close()).
+    """
+
+    def __init__(self, recognizer, on_set=None):
+        self.recognizer = recognizer
+        self.on_set = on_set
+        self.pinned = None
+        self.spec = None
+        self.counter = None
+        self.smoother = None
+        self.set_start = 0.0
+        # (pose number, t, landmarks) seen while recognising: enough for a
+        # window plus the decisions it takes to confirm a switch
+        self._history = deque(maxlen=recognizer.window + recognizer.confirm * recognizer.stride)
+
+    @property
+    def exercise(self):
+        return None if self.spec is None else self.spec.name
+
+    def pin(self, exercise):
+        """Forces an exercise (None = back to automatic recognition)"""
+        self.pinned = exercise
+        self.recognizer.reset()
+        self._history.clear()
+        if exercise is not None:
+            self.switch(exercise)
+
+    def switch(self, exercise, t=None):
+        if t is None:
+            t = time.monotonic()
+        if exercise == self.exercise:
+            return
+        self.finish(t)
+        self.spec = SPECS[exercise]
+        self.counter = RepCounter(self.spec)
+        self.smoother = self.spec.make_filter()
+        self.set_start = t
+        # Catch up on the reps that happened before the switch was confirmed
+        since = self.recognizer.proposed_at
+        if since is not None:
+            for frame, t_pose, landmarks in self._history:
+                if frame >= since:
+                    self._count(landmarks, t_pose)
+        self._history.clear()
+
+    def finish(self, t=None):
+        """Ends the current set (reported through on_set if it has reps)"""
+        if t is None:
+            t = time.monotonic()
+        if self.counter is not None and self.counter.count and self.on_set is not None:
+            self.on_set(self.spec.name, self.counter.count, int(t - self.set_start))
+        if self.counter is not None:
+            self.counter.reset()
+        self.set_start = t
+
+    def update(self, landmarks, t=None):
+        """Feeds one pose (None = nobody in frame); True when it completes a rep"""
+        if t is None:
+            t = time.monotonic()
+        if self.pinned is None:
+            exercise = self.recognizer.update(landmarks)
+            if landmarks is not None:
+                self._history.append((self.recognizer.frames - 1, t, landmarks.copy()))
+            if exercise is not None and exercise != self.exercise:
+                self.switch(exercise, t)
+                return False
+        if self.spec is None:
+            return False
+        return self._count(landmarks, t)
+
+    def _count(self, landmarks, t):
+        if landmarks is None:
+            if self.smoother is not None:
+                self.smoother.reset()
+            return False
+        if self.smoother is not None:
+            landmarks = self.smoother(landmarks, t)
+        value = self.spec.measure(landmarks)
+        return not np.isnan(value) and self.counter.update(value, t)
+
+    def close(self, t=None):
+        self.finish(t)
+
+
+# ===================== CAMERA SESSION =====================
+def main():
+    parser = argparse.ArgumentParser(
+        description="One camera session for a whole circuit: recognises the exercise and counts reps")
+    parser.add_argument("--source", default=0, help="camera index or video file")
+    parser.add_argument("--exercise", choices=sorted(SPECS), help="pin an exercise instead of recognising it")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL),
+                        help="trained recognizer (python -m Exercises.recognizer); "
+                             "untrained defaults from specs.py if missing")
+    parser.add_argument("--running-mode", choices=("solutions", "live_stream"), default="solutions",
+                        help="pose API: legacy solutions, or the PoseLandmarker in live_stream mode "
+                             "(downloads its model on first run)")
+    args = parser.parse_args()
+
+    import cv2
+    from .capture import FrameGrabber
+    from .hud import HudLayer
+    from .metrics import FrameMetrics, MetricsReporter
+    from .pose_engine import PoseEngine
+    from .uploader import WorkoutUploader
+
+    source = int(args.source) if str(args.source).isdigit() else args.source
+    engine = PoseEngine(running_mode=args.running_mode, roi=True)
+    cap = FrameGrabber(source, mirror=True)
+    uploader = WorkoutUploader()
+    metrics = FrameMetrics("session")
+    reporter = MetricsReporter(metrics)
+    show_metrics = False
+
+    session = CircuitSession(ExerciseRecognizer.default(args.model),
+                             on_set=lambda exercise, count, duration: uploader.submit(
+                                 exercise, count, duration, ""))
+    if args.exercise:
+        session.pin(args.exercise)
+
+    hud = HudLayer((420, 160))
+    feedback, feedback_color = "START MOVING", (0, 255, 255)
+
+    while cap.isOpened():
+        metrics.start()
+        ret, frame = cap.read()
+        if not ret:
+            break
+        metrics.mark("read")
+
+        landmarks = engine.process(frame)
+        metrics.mark("pose")
+
+        if session.update(landmarks):
+            feedback, feedback_color = "GOOD REP!", (0, 255, 0)
+        elif landmarks is None:
+            feedback, feedback_color = "FULL BODY NOT VISIBLE", (0, 0, 255)
+        elif session.spec is None:
+            feedback, feedback_color = "START MOVING", (0, 255, 255)
+        metrics.mark("logic")
+
+        name = session.exercise.replace("_", " ").upper() if session.exercise else "DETECTING..."
+        mode = "PINNED" if session.pinned else "AUTO"
+        hud.text("exercise", f"{name} ({mode})", (20, 35), 0.7, (255, 255, 255), 2)
+        count = session.counter.count if session.counter else 0
+        hud.text("count", f"REPS: {count}", (20, 90), 1.5, (0, 255, 0), 3)
+        hud.text("feedback", feedback, (20, 135), 0.7, feedback_color, 2)
+        hud.blit(frame)
+        if landmarks is not None:
+            engine.draw(frame, landmarks)
+        if show_metrics:
+            metrics.draw(frame)
+        metrics.mark("overlay")
+
+        cv2.imshow("AI Fitness Session", frame)
+        key = cv2.waitKey(1) & 0xFF
+        metrics.mark("display")
+        metrics.end(cap.dropped)
+
+        if key == ord('q'):
+            break
+        if key == ord('m'):
+            show_metrics = not show_metrics
+        if key == ord('a'):
+            session.pin(None)
+        if key == ord('f'):
+            session.finish()
+        if key in PIN_KEYS:
+            session.pin(PIN_KEYS[key])
+
+    session.close()
+    cap.release()
+    engine.close()
+    uploader.close()
+    reporter.close()
+    metrics.dump()
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+from .landmarks import LEFT, SHOULDER, ELBOW, WRIST, HIP, KNEE, ANKLE
+from .rep_counter import FALLING, RISING, RepSpec
+
+# ===================== REP-COUNTED EXERCISES =====================
+# Thresholds live here so the live trainers, offline replay and any other
+# consumer count reps with exactly the same numbers.
+
+# Landmark filters (see filters.py). The ratio-based exercises jitter the
+# most, One-Euro keeps them steady without lagging behind fast reps.
+ONE_EURO = ("one_euro", {"min_cutoff": 1.0, "beta": 4.0})
+
+# Leg vertical height / torso height, left side only
+SQUATS = RepSpec(
+    "squats", "leg_ratio",
+    reset_at=1.6, count_at=1.0, direction=FALLING,
+    stages=("up", "down"), side=LEFT, visible=(HIP, ANKLE),
+    smoothing=ONE_EURO,
+)
+
+# Shoulder-wrist distance / arm length (1.0 = straight arm), left side only
+PUSHUPS = RepSpec(
+    "pushups", "arm_ratio",
+    reset_at=0.95, count_at=0.65, direction=FALLING,
+    stages=("up", "down"), side=LEFT, visible=(SHOULDER, WRIST),
+    smoothing=ONE_EURO,
+)
+
+# Thigh vertical height / torso height, on the more visible knee
+LUNGES = RepSpec(
+    "lunges", "thigh_ratio",
+    reset_at=0.8, count_at=0.35, direction=FALLING,
+    stages=("up", "down"), side=KNEE, visible=(HIP, KNEE),
+    smoothing=ONE_EURO,
+)
+
+# Elbow angle; the trainer locks the arm at start, ELBOW is the default pick
+CURLS = RepSpec(
+    "curls", "elbow_angle",
+    reset_at=160, count_at=50, direction=FALLING,
+    stages=("down", "up"), side=ELBOW,
+    smoothing=("moving_average", {"window": 5}),
+)
+
+TRICEP_DIPS = RepSpec(
+    "tricep_dips", "elbow_angle",
+    reset_at=160, count_at=90, direction=FALLING,
+    stages=("up", "down"), side=ELBOW,
+    smoothing=("moving_average", {"window": 7}),
+)
+
+# Torso angle against the ground
+CRUNCHES = RepSpec(
+    "crunches", "torso_tilt",
+    reset_at=15, count_at=45, direction=RISING,
+    stages=("down", "up"), side=HIP,
+)
+
+# Shoulder angle between hip and elbow
+LATERAL_RAISES = RepSpec(
+    "lateral_raises", "shoulder_angle",
+    reset_at=20, count_at=75, direction=RISING,
+    stages=("down", "up"), side=SHOULDER,
+)
+
+SPECS = {spec.name: spec for spec in (
+    SQUATS, PUSHUPS, LUNGES, CURLS, TRICEP_DIPS, CRUNCHES, LATERAL_RAISES,
+)}
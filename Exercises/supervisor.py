@@ -0,0 +1,250 @@
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import signal
+import time
+
+from .specs import SPECS
+
+STATUS_INTERVAL = 1.0  # seconds between status events per station
+
+
+def _pin(core):
+    """Pins the calling process to one CPU core (Linux only, no-op elsewhere)"""
+    if core is not None and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, {core})
+        except OSError:
+            pass
+
+
+# ===================== WORKER PROCESS =====================
+def _station_worker(name, source, exercise, core, commands, events):
+    """Runs one camera stream: capture, pose, rep counting. No UI.
+
+    Owns the only Pose instance in its process. Reassigning the exercise
+    swaps the spec, counter, scheduler and filter but keeps the model.
+    Ctrl+C reaches the whole process group: workers ignore it and finish
+    their set when the supervisor sends "stop".
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _pin(core)
+    import cv2
+    import numpy as np
+    from .capture import FrameGrabber
+    from .metrics import FrameMetrics
+    from .pose_engine import PoseEngine
+    from .rep_counter import RepCounter
+    from .scheduler import InferenceScheduler
+
+    cv2.setNumThreads(1)  # one core per station, no oversubscription
+    cap = FrameGrabber(source)
+    # No display, so the pixels are never flipped: the engine mirrors
+    # the landmarks instead, giving the trainers' left/right
+    engine = PoseEngine(roi=True, mirror=True)
+    metrics = FrameMetrics(name)
+
+    def assign(exercise):
+        spec = SPECS[exercise]
+        engine.scheduler = InferenceScheduler.for_spec(spec)
+        engine.smoother = spec.make_filter()
+        return spec, RepCounter(spec), time.monotonic()
+
+    def finish():
+        events.put(("set", name, {
+            "exercise": spec.name,
+            "count": counter.count,
+            "duration": int(time.monotonic() - set_start),
+        }))
+
+    spec, counter, set_start = assign(exercise)
+    last_status = 0.0
+    running = True
+
+    while running:
+        # --- Commands from the supervisor ---
+        while True:
+            try:
+                command, arg = commands.get_nowait()
+            except queue.Empty:
+                break
+            if command == "assign":
+                finish()
+                spec, counter, set_start = assign(arg)
+            elif command == "finish":
+                finish()
+                counter.reset()
+                set_start = time.monotonic()
+            elif command == "stop":
+                finish()
+                running = False
+        if not running:
+            break
+
+        # --- Frame ---
+        metrics.start()
+        ret, frame = cap.read()
+        if not ret:
+            events.put(("error", name, {"message": f"cannot read from {source!r}"}))
+            finish()
+            break
+        landmarks = engine.process(frame)
+        value = np.nan
+        if landmarks is not None:
+            value = spec.measure(landmarks)
+            if not np.isnan(value) and counter.update(value):
+                events.put(("rep", name, {"exercise": spec.name, "count": counter.count}))
+        metrics.end(cap.dropped)
+
+        now = time.monotonic()
+        if now - last_status >= STATUS_INTERVAL:
+            last_status = now
+            events.put(("status", name, {
+                "exercise": spec.name,
+                "count": counter.count,
+                "stage": counter.stage,
+                "tracking": landmarks is not None,
+                "fps": round(metrics.fps(), 1),
+                "dropped": cap.dropped,
+                "core": core,
+            }))
+
+    cap.release()
+    engine.close()
+    events.put(("stopped", name, {}))
+
+
+# ===================== SUPERVISOR =====================
+class Supervisor:
+    """Runs several camera stations on a pool of worker processes.
+
+    Every station gets its own process (and so its own Pose instance),
+    pinned round-robin to the available cores. All workers report to one
+    event queue; poll() drains it, keeps the latest status per station
+    and uploads every finished set through WorkoutUploader.
+
+    stations:     {name: (source, exercise)}
+    start_method: multiprocessing start method; "spawn" keeps OpenCV and
+                  MediaPipe state out of the children
+    """
+
+    def __init__(self, stations, pin=True, upload=True, start_method="spawn"):
+        self._ctx = mp.get_context(start_method)
+        self.events = self._ctx.Queue()
+        self.status = {name: {} for name in stations}
+        self.uploader = None
+        if upload:
+            from .uploader import WorkoutUploader
+            self.uploader = WorkoutUploader()
+
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        self._stations = {}
+        for i, (name, (source, exercise)) in enumerate(stations.items()):
+            if exercise not in SPECS:
+                raise ValueError(f"{name}: unknown exercise {exercise!r}")
+            core = cores[i % len(cores)] if pin and cores else None
+            commands = self._ctx.Queue()
+            process = self._ctx.Process(
+                target=_station_worker, name=f"station-{name}",
+                args=(name, source, exercise, core, commands, self.events),
+                daemon=True,
+            )
+            self._stations[name] = (process, commands)
+
+    def start(self):
+        for process, _ in self._stations.values():
+            process.start()
+
+    def _send(self, name, command, arg=None):
+        self._stations[name][1].put((command, arg))
+
+    def assign(self, name, exercise):
+        """Switches a station to another exercise (finishing the current set)"""
+        if exercise not in SPECS:
+            raise ValueError(f"unknown exercise {exercise!r}")
+        self._send(name, "assign", exercise)
+
+    def finish(self, name):
+        """Ends the station's current set; its result is uploaded on poll()"""
+        self._send(name, "finish")
+
+    def alive(self):
+        return [name for name, (process, _) in self._stations.items() if process.is_alive()]
+
+    def poll(self, timeout=0.1):
+        """Handles queued worker events; returns them as (kind, station, data)"""
+        handled = []
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                event = self.events.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            kind, name, data = event
+            if kind == "status":
+                self.status[name] = data
+            elif kind == "set" and data["count"] > 0 and self.uploader is not None:
+                self.uploader.submit(data["exercise"], data["count"], data["duration"], "")
+            handled.append(event)
+        return handled
+
+    def stop(self, timeout=10.0):
+        """Finishes every set, stops the workers and flushes the uploads"""
+        for name, (process, _) in self._stations.items():
+            if process.is_alive():
+                self._send(name, "stop")
+        deadline = time.monotonic() + timeout
+        while self.alive() and time.monotonic() < deadline:
+            self.poll(0.2)
+        self.poll(0.2)
+        for process, _ in self._stations.values():
+            if process.is_alive():
+                process.terminate()
+            process.join(1.0)
+        if self.uploader is not None:
+            self.uploader.close()
+
+
+def parse_station(text):
+    """"SOURCE:EXERCISE" -> (source, exercise); digits are camera indexes"""
+    source, _, exercise = text.rpartition(":")
+    if not source:
+        raise argparse.ArgumentTypeError(f"expected SOURCE:EXERCISE, got {text!r}")
+    return (int(source) if source.isdigit() else source), exercise
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run several camera stations on one host, one pinned process each")
+    parser.add_argument("stations", nargs="+", type=parse_station, metavar="SOURCE:EXERCISE",
+                        help="e.g. 0:squats 1:pushups rtsp://cam3/stream:lunges")
+    parser.add_argument("--no-pin", action="store_true", help="don't pin workers to cores")
+    parser.add_argument("--no-upload", action="store_true", help="don't send finished sets to the backend")
+    args = parser.parse_args()
+
+    stations = {f"station-{i}": station for i, station in enumerate(args.stations)}
+    supervisor = Supervisor(stations, pin=not args.no_pin, upload=not args.no_upload)
+    supervisor.start()
+    print(f"Running {len(stations)} stations, Ctrl+C to stop")
+
+    last_print = 0.0
+    try:
+        while supervisor.alive():
+            for kind, name, data in supervisor.poll(0.5):
+                if kind in ("rep", "set", "error"):
+                    print(f"[{name}] {kind}: {data}")
+            if time.monotonic() - last_print >= 5:
+                last_print = time.monotonic()
+                for name, status in supervisor.status.items():
+                    if status:
+                        print(f"  {name}: {status['exercise']} x {status['count']} "
+                              f"({status['fps']} fps, core {status['core']})")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
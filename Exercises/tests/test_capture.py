@@ -0,0 +1,89 @@
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from Exercises.capture import FrameGrabber
+
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in: frame i is filled with i and arrives after delays[i]"""
+
+    def __init__(self, delays):
+        self.delays = list(delays)
+        self.i = 0
+        self.released = False
+
+    def isOpened(self):
+        return True
+
+    def read(self, image=None):
+        if self.i == len(self.delays):
+            return False, None
+        time.sleep(self.delays[self.i])
+        if image is None:
+            image = np.empty((4, 6, 3), dtype=np.uint8)
+        image[...] = self.i
+        self.i += 1
+        return True, image
+
+    def get(self, prop_id):
+        return 0
+
+    def release(self):
+        self.released = True
+
+
+class FrameGrabberTests(unittest.TestCase):
+    def grabber(self, delays, timeout=0.2, **kwargs):
+        cap = FakeCapture(delays)
+        with mock.patch("Exercises.capture.cv2.VideoCapture", return_value=cap):
+            grabber = FrameGrabber(timeout=timeout, **kwargs)
+        self.addCleanup(grabber.release)
+        return grabber
+
+    def read_all(self, grabber):
+        frames = []
+        while True:
+            ret, frame = grabber.read()
+            if not ret:
+                return frames
+            frames.append(int(frame[0, 0, 0]))
+
+    def test_late_frame_is_a_stall_not_the_end(self):
+        grabber = self.grabber([0.0, 0.0, 0.5, 0.0])
+        self.assertEqual(self.read_all(grabber)[-1], 3)
+        self.assertEqual(grabber.stalls, 1)
+        self.assertFalse(grabber.isOpened())
+
+    def test_end_of_stream_returns_without_waiting(self):
+        grabber = self.grabber([0.01] * 5, timeout=5.0)
+        start = time.monotonic()
+        frames = self.read_all(grabber)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(frames, sorted(set(frames)))
+        self.assertEqual(frames[-1], 4)
+        self.assertEqual(grabber.stalls, 0)
+        self.assertEqual(grabber.read(), (False, None))
+
+    def test_newest_frame_wins(self):
+        grabber = self.grabber([0.0] * 3 + [0.3])
+        time.sleep(0.1)
+        ret, frame = grabber.read()
+        self.assertEqual(frame[0, 0, 0], 2)
+        self.assertEqual(grabber.dropped, 2)
+
+    def test_held_frame_is_left_alone_and_buffers_are_reused(self):
+        grabber = self.grabber([0.02] * 30, mirror=True)
+        ret, held = grabber.read()
+        value = int(held[0, 0, 0])
+        time.sleep(0.2)
+        self.assertEqual(held[0, 0, 0], value)
+        seen = {id(held)}
+        while True:
+            ret, frame = grabber.read()
+            if not ret:
+                break
+            seen.add(id(frame))
+        self.assertLessEqual(len(seen), 3)
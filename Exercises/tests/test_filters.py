@@ -0,0 +1,79 @@
+import unittest
+
+import numpy as np
+
+from Exercises.filters import FILTERS, MovingAverage, OneEuroFilter, filter_session, make_filter
+
+SETTINGS = {
+    "moving_average": {"window": 4},
+    "exponential": {"alpha": 0.3},
+    "one_euro": {"min_cutoff": 1.0, "beta": 4.0},
+}
+
+
+class FilterTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.times = np.arange(60) / 30
+        self.landmarks = rng.uniform(0.0, 1.0, (60, 33, 4))
+
+    def filters(self):
+        for kind, params in SETTINGS.items():
+            with self.subTest(kind=kind):
+                yield make_filter((kind, params))
+
+    def run_filter(self, filt, landmarks, times=None):
+        times = self.times if times is None else times
+        return np.array([filt(x, t).copy() for x, t in zip(landmarks, times)])
+
+    def test_every_filter_has_settings(self):
+        self.assertEqual(set(SETTINGS), set(FILTERS))
+        self.assertIsNone(make_filter(None))
+
+    def test_first_sample_and_constants_pass_through(self):
+        constant = np.full((10, 33, 4), 0.25)
+        for filt in self.filters():
+            out = self.run_filter(filt, self.landmarks[:1])
+            np.testing.assert_allclose(out[0], self.landmarks[0], rtol=1e-6)
+            filt.reset()
+            np.testing.assert_allclose(self.run_filter(filt, constant), constant, rtol=1e-6)
+
+    def test_reset_forgets_the_past(self):
+        for kind, params in SETTINGS.items():
+            with self.subTest(kind=kind):
+                filt = make_filter((kind, params))
+                self.run_filter(filt, self.landmarks[:30])
+                filt.reset()
+                after_reset = self.run_filter(filt, self.landmarks[30:], self.times[30:])
+                fresh = self.run_filter(make_filter((kind, params)), self.landmarks[30:], self.times[30:])
+                np.testing.assert_array_equal(after_reset, fresh)
+
+    def test_moving_average(self):
+        out = self.run_filter(MovingAverage(window=4), self.landmarks)
+        np.testing.assert_allclose(out[3:], (self.landmarks[:-3] + self.landmarks[1:-2] +
+                                             self.landmarks[2:-1] + self.landmarks[3:]) / 4, rtol=1e-5)
+        np.testing.assert_allclose(out[1], self.landmarks[:2].mean(axis=0), rtol=1e-5)
+
+    def test_one_euro_smooths_jitter_more_than_motion(self):
+        rng = np.random.default_rng(1)
+        jitter = 0.5 + rng.normal(0.0, 0.01, (90, 1))
+        motion = 0.5 + 0.2 * np.sin(2 * np.pi * 1.0 * np.arange(90) / 30)[:, None]
+        times = np.arange(90) / 30
+        still = self.run_filter(OneEuroFilter(), jitter, times)
+        moving = self.run_filter(OneEuroFilter(), motion, times)
+        self.assertLess(still[30:].std(), jitter[30:].std() / 2)
+        self.assertGreater(moving[30:].std(), motion[30:].std() * 0.8)
+
+    def test_session_nan_rows_reset_the_filter(self):
+        landmarks = self.landmarks.copy()
+        landmarks[20:25] = np.nan
+        for filt in self.filters():
+            out = filter_session(filt, self.times, landmarks)
+            self.assertTrue(np.isnan(out[20:25]).all())
+            self.assertFalse(np.isnan(out[25:]).any())
+            # The pose after the gap starts a fresh track instead of
+            # being averaged with the pose before it
+            np.testing.assert_allclose(out[25], landmarks[25], rtol=1e-6)
+            np.testing.assert_array_equal(out[:20], filter_session(filt, self.times[:20], landmarks[:20]))
+        np.testing.assert_array_equal(filter_session(None, self.times, landmarks), landmarks.astype(np.float32))
+
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from Exercises.recognizer import (
+    BONES, MOTIONS, ExerciseRecognizer, session_descriptors, stick_figure, synthetic_reps,
+)
+from Exercises.specs import SPECS
+
+
+class RecognizerPriorTests(unittest.TestCase):
+    """The untrained recognizer on synthetic sessions of every exercise"""
+
+    def setUp(self):
+        self.recognizer = ExerciseRecognizer.prior()
+        self.rng = np.random.default_rng(0)
+
+    def classify(self, poses):
+        poses = poses.copy()
+        poses[..., :2] += self.rng.normal(0.0, 0.004, poses[..., :2].shape)
+        best, _ = self.recognizer.classify(session_descriptors(poses))
+        return {self.recognizer.labels[i] if i >= 0 else None for i in best}
+
+    def test_each_exercise(self):
+        for spec in SPECS.values():
+            for overshoot in (0.05, 0.4):  # barely counting / well past both thresholds
+                for legs in (1.0, 1.15):
+                    bones = dict(BONES, thigh=BONES["thigh"] * legs, shin=BONES["shin"] * legs)
+                    with self.subTest(exercise=spec.name, overshoot=overshoot, legs=legs):
+                        poses = synthetic_reps(spec, 240, reps=8, overshoot=overshoot, bones=bones)
+                        self.assertEqual(self.classify(poses), {spec.name})
+
+    def test_squats_of_any_depth(self):
+        bones = dict(BONES, thigh=1.05, shin=1.05)
+        for metric_range in ((1.8, 0.8), (2.0, 0.6)):
+            with self.subTest(leg_ratio=metric_range):
+                poses = synthetic_reps(SPECS["squats"], 240, reps=8, metric_range=metric_range, bones=bones)
+                self.assertEqual(self.classify(poses), {"squats"})
+
+    def test_standing_still(self):
+        side_on, motion = MOTIONS["curls"]
+        poses = np.repeat(stick_figure(side_on, motion(0.0))[None], 120, axis=0)
+        self.assertEqual(self.classify(poses), {None})
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from Exercises.rep_counter import FALLING, RISING, RepCounter, RepSpec, count_reps
+
+
+def streamed(spec, values, times):
+    counter = RepCounter(spec)
+    return [i for i, (value, t) in enumerate(zip(values, times)) if counter.update(value, t)]
+
+
+class CountRepsTests(unittest.TestCase):
+    """count_reps over a whole session against a RepCounter fed frame by frame"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def session(self, n=600, gaps=0.1):
+        # Noisy oscillation around the thresholds with irregular frame times
+        # and NaN runs where the joints were not visible
+        t = np.cumsum(self.rng.uniform(0.02, 0.05, n))
+        values = 1.5 + 0.6 * np.sin(t * self.rng.uniform(2.0, 6.0)) + self.rng.normal(0.0, 0.15, n)
+        for start in self.rng.integers(0, n, int(n * gaps / 5)):
+            values[start:start + self.rng.integers(1, 10)] = np.nan
+        return values, t
+
+    def check(self, spec, values, times):
+        expected = streamed(spec, values, times)
+        np.testing.assert_array_equal(count_reps(spec, values, times), expected)
+        return expected
+
+    def test_matches_the_live_counter(self):
+        for direction, (reset_at, count_at) in ((FALLING, (1.8, 1.2)), (RISING, (1.2, 1.8))):
+            for min_dwell in (0.0, 0.05, 0.2):
+                spec = RepSpec("test", "leg_ratio", reset_at, count_at, direction, min_dwell=min_dwell)
+                for seed in range(5):
+                    with self.subTest(direction=direction, min_dwell=min_dwell, seed=seed):
+                        self.rng = np.random.default_rng(seed)
+                        self.assertTrue(self.check(spec, *self.session()))
+
+    def test_nan_does_not_rearm(self):
+        spec = RepSpec("test", "leg_ratio", 1.8, 1.2, FALLING)
+        values = [2.0, 1.0, np.nan, 1.0, np.nan, 2.0, np.nan, 1.0]
+        self.assertEqual(self.check(spec, values, np.arange(len(values))), [1, 7])
+
+    def test_dwell_ignores_short_excursions(self):
+        spec = RepSpec("test", "leg_ratio", 1.8, 1.2, FALLING, min_dwell=0.15)
+        times = np.arange(12) * 0.1
+        values = [2.0, 1.0, 1.0, 2.0, 2.0, 2.0, 1.0, 1.0, 1.0, 1.5, 1.0, 1.0]
+        # The first dip lasts 0.1 s; the second counts on its third frame, 0.2 s in
+        self.assertEqual(self.check(spec, values, times), [8])
+
+    def test_times_required_with_dwell(self):
+        spec = RepSpec("test", "leg_ratio", 1.8, 1.2, FALLING, min_dwell=0.1)
+        with self.assertRaises(ValueError):
+            count_reps(spec, [2.0, 1.0])
+        self.assertEqual(len(count_reps(spec, [], None)), 0)
@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+from Exercises.scheduler import InferenceScheduler
+
+
+def pose(x=0.5, visibility=0.9):
+    lm = np.full((33, 4), 0.5, dtype=np.float32)
+    lm[:, 0] = x
+    lm[:, 3] = visibility
+    return lm
+
+
+class SchedulerTests(unittest.TestCase):
+    def drive(self, scheduler, poses, fps=30.0):
+        """Runs the scheduler over poses; returns True/False per frame for inferred"""
+        inferred = []
+        for i, lm in enumerate(poses):
+            t = i / fps
+            if scheduler.should_infer():
+                scheduler.observe(lm, t)
+                inferred.append(True)
+            else:
+                scheduler.predict(t)
+                inferred.append(False)
+        return inferred
+
+    def longest_skip(self, inferred):
+        longest = run = 0
+        for infer in inferred:
+            run = 0 if infer else run + 1
+            longest = max(longest, run)
+        return longest
+
+    def test_still_body_skips_at_most_max_skip_minus_one(self):
+        for max_skip in (1, 2, 3, 5):
+            with self.subTest(max_skip=max_skip):
+                scheduler = InferenceScheduler(max_skip=max_skip)
+                inferred = self.drive(scheduler, [pose()] * 60)
+                self.assertEqual(self.longest_skip(inferred), max_skip - 1)
+                self.assertLessEqual(scheduler.interval, max_skip)
+                self.assertEqual(scheduler.skipped, inferred.count(False))
+
+    def test_interval_grows_one_frame_at_a_time(self):
+        scheduler = InferenceScheduler(max_skip=4)
+        inferred = self.drive(scheduler, [pose()] * 12)
+        # The first frame has no speed yet; then intervals of 2, 3, 4, 4
+        self.assertEqual(inferred, [True, True, False, True, False, False,
+                                    True, False, False, False, True, False])
+
+    def test_fast_motion_infers_every_frame(self):
+        scheduler = InferenceScheduler(max_skip=3, still_speed=0.1)
+        poses = [pose()] * 20 + [pose(0.5 + 0.01 * i) for i in range(20)]
+        inferred = self.drive(scheduler, poses)
+        self.assertGreater(inferred[:20].count(False), 0)
+        # One stale interval at most, then every frame is inferred
+        self.assertTrue(all(inferred[24:]))
+
+    def test_lost_person_and_thresholds_reset_the_interval(self):
+        scheduler = InferenceScheduler(max_skip=3)
+        self.drive(scheduler, [pose()] * 10)
+        self.assertEqual(scheduler.interval, 3)
+        scheduler.observe(None, 1.0)
+        self.assertEqual(scheduler.interval, 1)
+        self.assertTrue(scheduler.should_infer())
+
+        for value, near in ((0.5, True), (np.nan, True), (0.9, False)):
+            with self.subTest(metric=value):
+                scheduler = InferenceScheduler(lambda lm: value, thresholds=(0.45, 1.2), band=0.1)
+                self.drive(scheduler, [pose()] * 10)
+                self.assertEqual(scheduler.interval, 1 if near else 3)
+
+    def test_prediction_extrapolates_the_last_velocity(self):
+        scheduler = InferenceScheduler()
+        scheduler.observe(pose(0.50), 0.0)
+        scheduler.observe(pose(0.51), 0.1)
+        predicted = scheduler.predict(0.15)
+        np.testing.assert_allclose(predicted[:, 0], 0.515, rtol=1e-5)
+        np.testing.assert_array_equal(predicted[:, 3], np.float32(0.9))
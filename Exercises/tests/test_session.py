@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+from Exercises.recognizer import ExerciseRecognizer, synthetic_reps
+from Exercises.session import CircuitSession
+from Exercises.specs import SPECS
+
+
+class CircuitSessionTests(unittest.TestCase):
+    """Recognised circuits of synthetic sets"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.sets = []
+        self.t = 0.0
+
+    def circuit(self):
+        self.sets.clear()
+        return CircuitSession(ExerciseRecognizer.prior(),
+                              on_set=lambda exercise, count, duration: self.sets.append((exercise, count)))
+
+    def perform(self, session, exercise, reps=8):
+        poses = synthetic_reps(SPECS[exercise], 30 * reps, reps=reps)
+        poses[..., :2] += self.rng.normal(0.0, 0.004, poses[..., :2].shape)
+        for landmarks in poses:
+            session.update(landmarks, self.t)
+            self.t += 1 / 30
+
+    def test_catch_up_skips_the_previous_exercise(self):
+        for first, second in (("squats", "lunges"), ("pushups", "squats"), ("curls", "tricep_dips")):
+            with self.subTest(first=first, second=second):
+                session = self.circuit()
+                self.perform(session, first)
+                self.perform(session, second)
+                session.close(self.t)
+                self.assertEqual(self.sets, [(first, 8), (second, 8)])
+
+    def test_pinning_replays_nothing(self):
+        session = self.circuit()
+        self.perform(session, "squats")
+        session.pin("lunges")
+        self.assertEqual(session.counter.count, 0)
+        self.perform(session, "lunges", reps=3)
+        session.close(self.t)
+        self.assertEqual(self.sets, [("squats", 8), ("lunges", 3)])
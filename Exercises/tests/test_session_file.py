@@ -0,0 +1,70 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from Exercises.landmarks import NUM_LANDMARKS
+from Exercises.session_file import HEADER, LandmarkWriter, open_landmarks, read_header
+
+
+class LandmarkFileTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "session.lmk"
+        rng = np.random.default_rng(0)
+        self.landmarks = rng.uniform(0.0, 1.0, (5, NUM_LANDMARKS, 4))
+        self.times = np.arange(5) / 30
+
+    def write(self, precision="float16", missing=()):
+        with LandmarkWriter(self.path, "squats", precision) as writer:
+            for i, t in enumerate(self.times):
+                writer.write(None if i in missing else self.landmarks[i], t)
+
+    def test_round_trip(self):
+        for precision, tolerance in (("float16", 5e-4), ("float32", 1e-7)):
+            with self.subTest(precision=precision):
+                self.path.unlink(missing_ok=True)
+                self.write(precision, missing=(2,))
+                times, landmarks, exercise = open_landmarks(self.path)
+                self.assertEqual(exercise, "squats")
+                self.assertEqual(landmarks.dtype, np.dtype(precision))
+                np.testing.assert_array_equal(times, self.times)
+                self.assertTrue(np.isnan(landmarks[2]).all())
+                kept = [0, 1, 3, 4]
+                np.testing.assert_allclose(landmarks[kept], self.landmarks[kept], atol=tolerance)
+
+    def test_views_are_read_only(self):
+        self.write()
+        times, landmarks, _ = open_landmarks(self.path)
+        self.assertIsInstance(landmarks.base, np.memmap)
+        with self.assertRaises(ValueError):
+            landmarks[0, 0, 0] = 0.0
+        with self.assertRaises(ValueError):
+            times[0] = 1.0
+
+    def test_empty_file(self):
+        LandmarkWriter(self.path, "squats").close()
+        times, landmarks, exercise = open_landmarks(self.path)
+        self.assertEqual((times.shape, landmarks.shape, exercise), ((0,), (0, NUM_LANDMARKS, 4), "squats"))
+
+    def test_partial_record_is_dropped(self):
+        self.write()
+        record_size = read_header(self.path)["dtype"].itemsize
+        with open(self.path, "ab") as f:
+            f.write(b"\0" * (record_size // 2))
+        self.assertEqual(len(open_landmarks(self.path)[0]), 5)
+
+        # Continuing the file truncates the half-written record first
+        with LandmarkWriter(self.path, "curls", "float32") as writer:
+            self.assertEqual((writer.count, writer.last_t, writer.exercise), (5, self.times[-1], "squats"))
+            writer.write(self.landmarks[0], 1.0)
+        self.assertEqual(self.path.stat().st_size, HEADER.itemsize + 6 * record_size)
+        times, landmarks, _ = open_landmarks(self.path)
+        self.assertEqual((times[-1], landmarks.dtype), (1.0, np.float16))
+
+    def test_not_a_session_file(self):
+        self.path.write_bytes(b"x" * 100)
+        with self.assertRaises(ValueError):
+            open_landmarks(self.path)
@@ -0,0 +1,248 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import requests
+
+try:
+    import fcntl  # POSIX
+except ImportError:
+    fcntl = None
+    import msvcrt  # Windows
+
+log = logging.getLogger(__name__)
+
+DEFAULT_URL = "http://127.0.0.1:8000/api/workouts/bulk/"
+DEFAULT_SPOOL = Path.home() / ".ai_fitness" / "workout_spool.jsonl"
+BATCH_SIZE = 100  # records per request when draining the spool
+
+_STOP = object()
+
+
+class WorkoutUploader:
+    """Sends finished workouts to the Django backend from a background thread.
+
+    submit() never blocks the trainer loop. The worker posts to the bulk
+    endpoint through one pooled requests.Session with connect/read timeouts.
+    Anything that cannot be delivered is appended to a local JSON-lines
+    spool file and retried with exponential backoff; the spool is drained
+    in batches as soon as the backend answers again, including on the next
+    run of any trainer. Trainers running side by side share the spool
+    under a file lock, so none of them loses another's records.
+
+    Every workout carries a client_id generated here, so when a response
+    is lost after the backend committed (e.g. a read timeout) the retry
+    is recognised and not stored twice. Only records the backend names as
+    invalid are ever dropped; any other failure is retried.
+    """
+
+    def __init__(self, url=DEFAULT_URL, spool_path=DEFAULT_SPOOL,
+                 timeout=(3.05, 10), backoff=1.0, max_backoff=60.0):
+        self.url = url
+        self.spool_path = Path(spool_path)
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        self._queue = queue.Queue()
+        self._failures = 0
+        self._next_retry = 0.0
+
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    # ===================== PUBLIC API =====================
+    def submit(self, exercise, count, duration, grade):
+        self._queue.put({
+            "client_id": uuid.uuid4().hex,
+            "exercise": exercise,
+            "count": count,
+            "duration": duration,
+            "grade": grade,
+        })
+
+    def close(self, timeout=5.0):
+        """Stops the worker; undelivered workouts stay in the spool."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self.session.close()
+
+    # ===================== NETWORK =====================
+    def _send(self, records):
+        """True if the backend stored the batch (minus records it rejected
+        as invalid); False to keep it for a retry."""
+        try:
+            response = self.session.post(self.url, json={"workouts": records},
+                                         timeout=self.timeout)
+        except requests.RequestException as e:
+            log.warning("Upload failed: %s", e)
+            return False
+        if response.ok:
+            return True
+        bad = self._invalid_records(response)
+        if not bad:
+            # Server errors, rate limits, proxies' HTML pages...: try again later
+            log.warning("Upload failed: HTTP %s %s", response.status_code, response.text[:200])
+            return False
+        # Drop the records the backend named as invalid (retrying them can
+        # never succeed) and resend the rest
+        log.warning("Upload rejected: %d invalid workout(s) %s", len(bad), response.text[:200])
+        rest = [r for i, r in enumerate(records) if i not in bad]
+        if len(rest) == len(records):
+            return False  # indexes that aren't in this batch
+        return self._send(rest) if rest else True
+
+    @staticmethod
+    def _invalid_records(response):
+        """Indexes of the records a 400 response names as invalid (empty set
+        for any other failure)"""
+        if response.status_code != 400:
+            return set()
+        try:
+            errors = response.json().get("errors")
+            return {int(e["index"]) for e in errors}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return set()
+
+    def _succeeded(self):
+        self._failures = 0
+        self._next_retry = 0.0
+
+    def _failed(self):
+        self._failures += 1
+        delay = min(self.backoff * 2 ** (self._failures - 1), self.max_backoff)
+        self._next_retry = time.monotonic() + delay
+
+    # ===================== SPOOL =====================
+    @contextmanager
+    def _spool_lock(self):
+        """Exclusive lock on the spool, held across read-send-rewrite so an
+        append from another process can't land in between and be lost"""
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spool_path.with_suffix(".lock"), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        f.seek(0)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK gives up after ~10 s
+                        pass
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _spool(self, records):
+        with self._spool_lock():
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+
+    def _read_spool(self):
+        """Spooled records. Lines that aren't a JSON record (e.g. cut short
+        by a crash mid-append) are moved to <spool>.bad and skipped."""
+        if not self.spool_path.exists():
+            return []
+        records, bad = [], []
+        with open(self.spool_path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if isinstance(record, dict):
+                    records.append(record)
+                else:
+                    bad.append(line if line.endswith("\n") else line + "\n")
+        if bad:
+            log.warning("Skipping %d malformed line(s) of %s, kept in %s", len(bad),
+                        self.spool_path, self.spool_path.with_suffix(".bad"))
+            with open(self.spool_path.with_suffix(".bad"), "a", encoding="utf-8") as f:
+                f.writelines(bad)
+        for record in records:
+            # Spooled before client ids existed; give them one from now on
+            record.setdefault("client_id", uuid.uuid4().hex)
+        return records
+
+    def _rewrite_spool(self, records):
+        if not records:
+            self.spool_path.unlink(missing_ok=True)
+            return
+        tmp = self.spool_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp, self.spool_path)
+
+    def _drain(self):
+        with self._spool_lock():
+            pending = self._read_spool()
+            for i in range(0, len(pending), BATCH_SIZE):
+                if not self._send(pending[i:i + BATCH_SIZE]):
+                    self._rewrite_spool(pending[i:])
+                    self._failed()
+                    return
+            self._rewrite_spool([])
+        self._succeeded()
+
+    # ===================== WORKER =====================
+    def _worker(self):
+        while True:
+            wait = None
+            if self.spool_path.exists():
+                wait = max(0.0, self._next_retry - time.monotonic())
+            try:
+                record = self._queue.get(timeout=wait)
+            except queue.Empty:
+                record = None
+
+            if record is _STOP:
+                # Keep whatever is still queued for the next run
+                leftovers = []
+                while not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item is not _STOP:
+                        leftovers.append(item)
+                if leftovers:
+                    self._spool(leftovers)
+                return
+
+            try:
+                self._handle(record)
+            except Exception:
+                # Never let one surprise stop uploads for the rest of the run
+                log.exception("Upload worker error")
+                self._failed()
+
+    def _handle(self, record):
+        if record is not None:
+            try:
+                sent = self._failures == 0 and self._send([record])
+            except Exception:
+                log.exception("Upload failed")
+                sent = False
+            if sent:
+                self._succeeded()
+            else:
+                self._spool([record])
+                if self._failures == 0:
+                    self._failed()
+
+        if self.spool_path.exists() and time.monotonic() >= self._next_retry:
+            self._drain()
@@ -2,15 +2,44 @@
 ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; WebSocket connections to /ws/live/ go to the live
+rep counter in workouts/live.py. Run it with any ASGI server, e.g.
+``uvicorn core.asgi:application`` from the backend directory.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import sys
+from pathlib import Path
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+# The live endpoint reuses the trainers' counting code from Exercises/
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
+django_application = get_asgi_application()
+
+# Imported after setup, it uses the models
+from workouts.live import live_websocket  # noqa: E402
+
+WEBSOCKET_ROUTES = {
+    '/ws/live/': live_websocket,
+}
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        handler = WEBSOCKET_ROUTES.get(scope['path'])
+        if handler is None:
+            await receive()  # websocket.connect
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+        await handler(scope, receive, send)
+        return
+    await django_application(scope, receive, send)
@@ -87,6 +87,36 @@ DATABASES = {
 
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# 'default' holds the cached progress / stats / history responses and
+# 'workout_versions' the version tokens behind them and the API's ETags
+# (workouts/caching.py), so repeated dashboard reads skip the round trip
+# to the remote database.
+# Both must be shared by every worker process, hence files rather than the
+# per-process memory cache; use a shared server (Redis, Memcached) when the
+# app runs on more than one host.
+# A file cache deletes a random 1/CULL_FREQUENCY of its entries once it
+# holds MAX_ENTRIES. Responses are cheap to rebuild and outdated ones are
+# never read again, so they churn in their own directory. The tokens are
+# kept apart, where responses can't push them out: 8 per user (one per
+# exercise and one for all), so this covers about 6000 active users.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'responses',
+        'OPTIONS': {'MAX_ENTRIES': 10000, 'CULL_FREQUENCY': 4},
+    },
+    'workout_versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'versions',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 50000, 'CULL_FREQUENCY': 10},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Workout
+from .models import PipelineMetrics, Workout, WorkoutRollup
 
 admin.site.register(Workout)
+admin.site.register(WorkoutRollup)
+admin.site.register(PipelineMetrics)
 # Register your models here.
\ No newline at end of file
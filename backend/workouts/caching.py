@@ -0,0 +1,70 @@
+"""Version stamps and response caching for reads of workout data.
+
+Every user's workouts have version tokens in a cache of their own (the
+"workout_versions" alias of CACHES in core/settings.py, where cached
+responses can't push them out): one per exercise and one for all of
+them, replaced after each commit that adds workouts. Cached responses
+(the default cache) and ETags are
+derived from the token of what they show, so a new squat invalidates
+exactly that user's squat pages and their all-exercise pages, and
+nothing has to be deleted: entries of an old token are never read again
+and age out.
+
+A token that fell out of the cache is simply replaced by a new one: that
+costs one rebuilt response, never a stale one.
+"""
+import hashlib
+import uuid
+
+from django.core.cache import cache, caches
+from django.db import transaction
+
+# Cached responses are unreachable once their token changes; this only
+# bounds how long such leftovers take space
+RESPONSE_TIMEOUT = 24 * 60 * 60
+VERSION_CACHE = "workout_versions"
+
+
+def _version_key(user_id, exercise=None):
+    return f"workouts:version:{user_id or 'anon'}:{exercise or '*'}"
+
+
+def workouts_version(user_id, exercise=None):
+    """Current version token of one user's workouts (None = anonymous),
+    of one exercise or of all of them"""
+    versions = caches[VERSION_CACHE]
+    key = _version_key(user_id, exercise)
+    version = versions.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not versions.add(key, version, timeout=None):
+            version = versions.get(key, version)  # set by a concurrent request
+    return version
+
+
+def workouts_changed(workouts):
+    """Call in the transaction that saved `workouts`: their users get new
+    version tokens once it commits (before, readers still see the old rows)."""
+    keys = set()
+    for workout in workouts:
+        keys.add(_version_key(workout.user_id, workout.exercise))
+        keys.add(_version_key(workout.user_id))
+    transaction.on_commit(lambda: caches[VERSION_CACHE].set_many(
+        {key: uuid.uuid4().hex for key in keys}, timeout=None))
+
+
+def cached_json(name, user_id, exercise, params, build):
+    """build()'s JSON-serializable result for one endpoint and parameters,
+    from the cache while the user's workouts (of `exercise`) are unchanged.
+
+    The token is read before building, so a write that commits meanwhile
+    leaves its result under the old token, where nobody looks anymore.
+    """
+    version = workouts_version(user_id, exercise)
+    digest = hashlib.sha256(repr((version, exercise, params)).encode()).hexdigest()[:32]
+    key = f"workouts:{name}:{user_id or 'anon'}:{digest}"
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, RESPONSE_TIMEOUT)
+    return data
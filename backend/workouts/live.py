@@ -0,0 +1,274 @@
+"""Live rep counting over a WebSocket (routed in core/asgi.py).
+
+Connect to /ws/live/?exercise=squats, then send one message per frame:
+
+  - landmarks (preferred): binary, a little-endian float64 timestamp in
+    seconds followed by 33 x 4 float32 (x, y, z, visibility) = 536 bytes,
+    or text {"type": "landmarks", "t": 1.23, "landmarks": [[x, y, z, v], ...]}
+    with NaN / null rows for joints that aren't visible
+  - a frame: binary JPEG or PNG; pose inference then runs on the server
+    (needs mediapipe installed there)
+
+Sets are saved for the user logged in to the site when the socket
+connects (Django's session cookie, sent along with the handshake), or
+anonymously without one.
+
+Control messages are text: {"type": "reset"}, {"type": "exercise",
+"exercise": "pushups"} and {"type": "finish", "duration": 60, "grade": ""},
+which saves the set as a Workout.
+
+The server answers with {"type": "state", ...} whenever the count, stage
+or feedback changes, so a steady stream of frames costs almost nothing
+on the way back.
+"""
+import asyncio
+import json
+import logging
+import time
+from http.cookies import SimpleCookie
+from importlib import import_module
+from urllib.parse import parse_qs
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import transaction
+from django.http import HttpRequest
+
+from Exercises.landmarks import NUM_LANDMARKS, VIS
+from Exercises.rep_counter import RepCounter
+from Exercises.specs import SPECS
+
+from .caching import workouts_changed
+from .models import Workout
+from .rollups import record_workouts
+
+logger = logging.getLogger(__name__)
+
+LANDMARK_MESSAGE = np.dtype([("t", "<f8"), ("lm", "<f4", (NUM_LANDMARKS, 4))])
+IMAGE_MAGIC = (b"\xff\xd8", b"\x89PNG")
+MAX_MESSAGE_BYTES = 2 * 1024 * 1024
+
+# WebSocket close codes (4000-4999 are application defined)
+CLOSE_BAD_REQUEST = 4400
+
+
+class LiveSession:
+    """Rep-counting state of one connection; the socket-free part, so it
+    can be driven synchronously as well."""
+
+    def __init__(self, exercise, user=None):
+        self.engine = None
+        self.user = user  # owner of the saved sets, None = anonymous
+        self.set_exercise(exercise)
+
+    def set_exercise(self, exercise):
+        if exercise not in SPECS:
+            raise ValueError(f"unknown exercise {exercise!r}")
+        self.spec = SPECS[exercise]
+        self.counter = RepCounter(self.spec)
+        self.smoother = self.spec.make_filter()
+        self._last = None  # last filtered pose
+        self.started = time.monotonic()
+        self.feedback = ""
+        self._sent = None
+
+    def reset(self):
+        self.set_exercise(self.spec.name)
+
+    def state(self, rep=False, value=None):
+        return {
+            "type": "state",
+            "exercise": self.spec.name,
+            "count": self.counter.count,
+            "stage": self.counter.stage,
+            "feedback": self.feedback,
+            "rep": rep,
+            "value": None if value is None or np.isnan(value) else round(float(value), 3),
+        }
+
+    def feed(self, landmarks, t=None):
+        """Counts one pose (None = nobody in frame). Returns a state dict
+        when something the client shows has changed, otherwise None."""
+        if t is None:
+            t = time.monotonic()
+        value, rep = np.nan, False
+        if landmarks is None or np.isnan(landmarks).all():
+            if self.smoother is not None:
+                self.smoother.reset()
+                self._last = None
+            self.feedback = "FULL BODY NOT VISIBLE"
+        else:
+            if self.smoother is not None:
+                landmarks = self._smooth(landmarks, t)
+            value = self.spec.measure(landmarks)
+            if np.isnan(value):
+                self.feedback = "FULL BODY NOT VISIBLE"
+            elif self.counter.update(value, t):
+                rep = True
+                self.feedback = "GOOD REP!"
+            elif self.counter.stage == self.spec.stages[0]:
+                self.feedback = f"GO {self.spec.stages[1].upper()}"
+
+        key = (self.counter.count, self.counter.stage, self.feedback)
+        if rep or key != self._sent:
+            self._sent = key
+            return self.state(rep, value)
+        return None
+
+    def _smooth(self, landmarks, t):
+        """Filters a pose whose missing joints (NaN rows) must not reach the
+        filter: one NaN would stay in its state for good. They go in as the
+        last filtered position with visibility 0 and come out with no
+        position and visibility 0, so measure() skips them."""
+        missing = np.isnan(landmarks).any(axis=-1)
+        if missing.any():
+            landmarks = landmarks.copy()
+            landmarks[missing] = 0.0 if self._last is None else self._last[missing]
+            landmarks[missing, VIS] = 0.0
+        out = self.smoother(landmarks, t)
+        self._last = out.copy()
+        if missing.any():
+            out = self._last.copy()
+            out[missing, :VIS] = np.nan
+            out[missing, VIS] = 0.0
+        return out
+
+    def feed_frame(self, data):
+        """Decodes a JPEG/PNG frame and runs server-side pose inference"""
+        import cv2
+        from Exercises.pose_engine import PoseEngine
+
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("could not decode image")
+        if self.engine is None:
+            self.engine = PoseEngine(roi=True)
+        return self.feed(self.engine.process(frame))
+
+    def close(self):
+        if self.engine is not None:
+            self.engine.close()
+            self.engine = None
+
+
+def parse_landmarks(data):
+    """Binary landmark message -> (t, (33, 4) float32 array)"""
+    record = np.frombuffer(data, dtype=LANDMARK_MESSAGE)[0]
+    return float(record["t"]), record["lm"].copy()
+
+
+def parse_landmark_json(message):
+    rows = message.get("landmarks")
+    if rows is None:
+        return None
+    landmarks = np.array(rows, dtype=np.float32)  # null -> NaN
+    if landmarks.shape != (NUM_LANDMARKS, 4):
+        raise ValueError(f"landmarks must be {NUM_LANDMARKS} x 4")
+    return landmarks
+
+
+@sync_to_async
+def connection_user(scope):
+    """The logged-in user of the handshake's session cookie, or None"""
+    cookies = SimpleCookie()
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            cookies.load(value.decode("latin-1"))
+    morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    request = HttpRequest()
+    request.session = import_module(settings.SESSION_ENGINE).SessionStore(morsel.value)
+    user = get_user(request)
+    return user if user.is_authenticated else None
+
+
+@sync_to_async
+def save_set(exercise, count, duration, grade, user=None):
+    with transaction.atomic():
+        workout = Workout.objects.create(user=user, exercise=exercise, count=count,
+                                         duration=duration, grade=grade)
+        record_workouts([workout])
+        workouts_changed([workout])
+    return workout.id
+
+
+async def _handle(session, event):
+    """Processes one websocket.receive event; returns the replies to send"""
+    data = event.get("bytes")
+    if data is not None:
+        if len(data) == LANDMARK_MESSAGE.itemsize:
+            t, landmarks = parse_landmarks(data)
+            return [session.feed(landmarks, t)]
+        if data.startswith(IMAGE_MAGIC):
+            # Inference would block the event loop; run it on a thread
+            try:
+                return [await asyncio.get_running_loop().run_in_executor(None, session.feed_frame, data)]
+            except (ValueError, ImportError):
+                raise
+            except Exception as e:
+                # A failing model shouldn't cost the client its connection
+                logger.exception("Pose inference failed")
+                return [{"type": "error", "message": f"pose inference failed: {e}"}]
+        raise ValueError(f"binary messages must be {LANDMARK_MESSAGE.itemsize}-byte landmarks or JPEG/PNG")
+
+    message = json.loads(event.get("text") or "")
+    if not isinstance(message, dict):
+        raise ValueError("message must be an object")
+    kind = message.get("type")
+    if kind == "landmarks":
+        return [session.feed(parse_landmark_json(message), message.get("t"))]
+    if kind == "reset":
+        session.reset()
+        return [session.state()]
+    if kind == "exercise":
+        session.set_exercise(message.get("exercise"))
+        return [session.state()]
+    if kind == "finish":
+        count = session.counter.count
+        duration = message.get("duration", int(time.monotonic() - session.started))
+        grade = message.get("grade", "")
+        if not isinstance(duration, int) or duration < 0 or not isinstance(grade, str):
+            raise ValueError("duration must be a non-negative integer and grade a string")
+        workout_id = await save_set(session.spec.name, count, duration, grade[:20], session.user)
+        session.reset()
+        return [{"type": "saved", "id": workout_id, "exercise": session.spec.name, "count": count}]
+    raise ValueError(f"unknown message type {kind!r}")
+
+
+async def live_websocket(scope, receive, send):
+    """ASGI WebSocket application for /ws/live/"""
+    event = await receive()
+    if event["type"] != "websocket.connect":
+        return
+
+    params = parse_qs(scope.get("query_string", b"").decode())
+    try:
+        session = LiveSession(params.get("exercise", ["squats"])[0], await connection_user(scope))
+    except ValueError:
+        await send({"type": "websocket.close", "code": CLOSE_BAD_REQUEST})
+        return
+
+    await send({"type": "websocket.accept"})
+    await send({"type": "websocket.send", "text": json.dumps(session.state())})
+    try:
+        while True:
+            event = await receive()
+            if event["type"] == "websocket.disconnect":
+                break
+            if event["type"] != "websocket.receive":
+                continue
+            size = len(event.get("bytes") or event.get("text") or "")
+            try:
+                if size > MAX_MESSAGE_BYTES:
+                    raise ValueError("message too large")
+                replies = await _handle(session, event)
+            except (ValueError, TypeError, KeyError, ImportError) as e:
+                replies = [{"type": "error", "message": str(e)}]
+            for reply in replies:
+                if reply is not None:
+                    await send({"type": "websocket.send", "text": json.dumps(reply)})
+    finally:
+        session.close()
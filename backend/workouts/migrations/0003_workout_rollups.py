@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:01
+
+from collections import defaultdict
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fold(workouts):
+    """workouts.rollups.fold as of this migration: sums workouts into
+    {(user_id, exercise, period, period_start): delta}. A copy, so later
+    changes to the app code can't change what this migration does."""
+    deltas = defaultdict(lambda: {
+        "sessions": 0, "total_reps": 0, "best_count": 0,
+        "total_duration": 0, "grade_counts": defaultdict(int),
+    })
+    for workout in workouts:
+        day = timezone.localdate(workout.created_at)
+        for period, start in (("day", day), ("week", day - timedelta(days=day.weekday()))):
+            delta = deltas[(workout.user_id, workout.exercise, period, start)]
+            delta["sessions"] += 1
+            delta["total_reps"] += workout.count
+            delta["best_count"] = max(delta["best_count"], workout.count)
+            delta["total_duration"] += workout.duration
+            if workout.grade:
+                delta["grade_counts"][workout.grade] += 1
+    return deltas
+
+
+def backfill_rollups(apps, schema_editor):
+    Workout = apps.get_model("workouts", "Workout")
+    WorkoutRollup = apps.get_model("workouts", "WorkoutRollup")
+    deltas = fold(Workout.objects.only("user_id", "exercise", "count", "duration", "grade", "created_at").iterator())
+    WorkoutRollup.objects.bulk_create([
+        WorkoutRollup(
+            user_id=user_id, exercise=exercise, period=period, period_start=start,
+            sessions=d["sessions"], total_reps=d["total_reps"], best_count=d["best_count"],
+            total_duration=d["total_duration"], grade_counts=dict(d["grade_counts"]),
+        )
+        for (user_id, exercise, period, start), d in deltas.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0002_workout_user_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exercise', models.CharField(max_length=50)),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=4)),
+                ('period_start', models.DateField()),
+                ('sessions', models.IntegerField(default=0)),
+                ('total_reps', models.IntegerField(default=0)),
+                ('best_count', models.IntegerField(default=0)),
+                ('total_duration', models.IntegerField(default=0)),
+                ('grade_counts', models.JSONField(default=dict)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='workout_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'period', 'exercise', 'period_start'), name='workout_rollup_unique_period')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0003_workout_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device', models.CharField(max_length=100)),
+                ('exercise', models.CharField(blank=True, max_length=50)),
+                ('frames', models.IntegerField()),
+                ('dropped', models.IntegerField(default=0)),
+                ('fps', models.FloatField()),
+                ('frame_p95_ms', models.FloatField(blank=True, null=True)),
+                ('stages', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['device', '-created_at'], name='metrics_device_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0004_pipeline_metrics'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='workout',
+            name='workout_user_ex_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='workout',
+            name='workout_user_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['user', 'exercise', '-created_at', '-id'], name='workout_user_ex_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='workout_user_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0005_workout_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workout',
+            name='client_id',
+            field=models.UUIDField(blank=True, null=True, unique=True),
+        ),
+    ]
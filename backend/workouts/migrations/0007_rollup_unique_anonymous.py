@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_duplicate_rollups(apps, schema_editor):
+    """Folds anonymous rollups created twice for the same key into one,
+    so the constraint below can be created"""
+    WorkoutRollup = apps.get_model("workouts", "WorkoutRollup")
+    keep = {}
+    for rollup in WorkoutRollup.objects.filter(user__isnull=True).order_by("id"):
+        key = (rollup.exercise, rollup.period, rollup.period_start)
+        first = keep.setdefault(key, rollup)
+        if first is rollup:
+            continue
+        first.sessions += rollup.sessions
+        first.total_reps += rollup.total_reps
+        first.best_count = max(first.best_count, rollup.best_count)
+        first.total_duration += rollup.total_duration
+        grades = dict(first.grade_counts)
+        for grade, n in rollup.grade_counts.items():
+            grades[grade] = grades.get(grade, 0) + n
+        first.grade_counts = grades
+        first.save()
+        rollup.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0006_workout_client_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rollups, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='workoutrollup',
+            name='workout_rollup_unique_period',
+        ),
+        migrations.AddConstraint(
+            model_name='workoutrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'period', 'exercise', 'period_start'), name='workout_rollup_unique_period', nulls_distinct=False),
+        ),
+    ]
@@ -1,11 +1,98 @@
+from django.conf import settings
 from django.db import models
 
 class Workout(models.Model):
+    # Nullable so anonymous uploads from the trainers keep working
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="workouts",
+    )
     exercise = models.CharField(max_length=50)
     count = models.IntegerField()
     duration = models.IntegerField()  # seconds
     grade = models.CharField(max_length=20)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Generated by the uploading client, so a batch retried after a lost
+    # response is not stored twice (see save_workouts_bulk)
+    client_id = models.UUIDField(null=True, blank=True, unique=True)
+
+    class Meta:
+        indexes = [
+            # One user's history of one exercise, newest first. id breaks
+            # created_at ties, so keyset pages are read straight off the index
+            models.Index(fields=["user", "exercise", "-created_at", "-id"], name="workout_user_ex_created_id_idx"),
+            # One user's history across all exercises, newest first
+            models.Index(fields=["user", "-created_at", "-id"], name="workout_user_created_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.exercise} - {self.count}"
+
+
+class WorkoutRollup(models.Model):
+    """Per-user, per-exercise totals for one day or one week.
+
+    Maintained incrementally by workouts.rollups on every insert, so the
+    progress API reads one row per period instead of scanning Workout.
+    """
+    DAY = "day"
+    WEEK = "week"
+    PERIOD_CHOICES = [(DAY, "Day"), (WEEK, "Week")]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="workout_rollups",
+    )
+    exercise = models.CharField(max_length=50)
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    period_start = models.DateField()  # the day itself, or the Monday of the week
+    sessions = models.IntegerField(default=0)
+    total_reps = models.IntegerField(default=0)
+    best_count = models.IntegerField(default=0)
+    total_duration = models.IntegerField(default=0)  # seconds
+    grade_counts = models.JSONField(default=dict)    # {"GOOD": 3, "BAD": 1}
+
+    class Meta:
+        constraints = [
+            # Doubles as the index for "one user's days/weeks in a range".
+            # Anonymous rows (user NULL) must be unique too, or concurrent
+            # first uploads of a day each create one.
+            models.UniqueConstraint(
+                fields=["user", "period", "exercise", "period_start"],
+                name="workout_rollup_unique_period",
+                nulls_distinct=False,
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.exercise} {self.period} {self.period_start} - {self.total_reps}"
+
+
+class PipelineMetrics(models.Model):
+    """A frame-timing snapshot posted by a trainer (Exercises/metrics.py).
+
+    Lets the backend see when a kiosk's CPU can't keep up: low FPS, a high
+    frame p95 or a growing dropped-frame count.
+    """
+    device = models.CharField(max_length=100)
+    exercise = models.CharField(max_length=50, blank=True)
+    frames = models.IntegerField()
+    dropped = models.IntegerField(default=0)
+    fps = models.FloatField()
+    frame_p95_ms = models.FloatField(null=True, blank=True)
+    stages = models.JSONField(default=dict)  # stage -> {"p50", "p95", "p99", "mean"} in ms
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["device", "-created_at"], name="metrics_device_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.device} {self.exercise} - {self.fps:.1f} fps"
@@ -0,0 +1,63 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import WorkoutRollup
+
+PERIODS = (WorkoutRollup.DAY, WorkoutRollup.WEEK)
+
+
+def period_start(period, day):
+    """First day of the rollup period containing `day` (weeks start Monday)."""
+    if period == WorkoutRollup.WEEK:
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def fold(workouts):
+    """Sums workouts into {(user_id, exercise, period, period_start): delta}.
+
+    Pure Python and model-agnostic, so the backfill migration can reuse it.
+    """
+    deltas = defaultdict(lambda: {
+        "sessions": 0, "total_reps": 0, "best_count": 0,
+        "total_duration": 0, "grade_counts": defaultdict(int),
+    })
+    for workout in workouts:
+        day = timezone.localdate(workout.created_at)
+        for period in PERIODS:
+            delta = deltas[(workout.user_id, workout.exercise, period, period_start(period, day))]
+            delta["sessions"] += 1
+            delta["total_reps"] += workout.count
+            delta["best_count"] = max(delta["best_count"], workout.count)
+            delta["total_duration"] += workout.duration
+            if workout.grade:
+                delta["grade_counts"][workout.grade] += 1
+    return deltas
+
+
+def record_workouts(workouts):
+    """Adds freshly inserted workouts to their daily and weekly rollups.
+
+    Call inside the transaction that inserted them: each touched rollup row
+    is locked with SELECT ... FOR UPDATE, so concurrent uploads for the same
+    user and day serialize instead of losing increments.
+    """
+    deltas = fold(workouts)
+    # Fixed lock order so two batches touching the same rows can't deadlock
+    keys = sorted(deltas, key=lambda k: (k[0] or 0, k[1], k[2], k[3]))
+    for user_id, exercise, period, start in keys:
+        delta = deltas[(user_id, exercise, period, start)]
+        rollup, _ = WorkoutRollup.objects.select_for_update().get_or_create(
+            user_id=user_id, exercise=exercise, period=period, period_start=start,
+        )
+        rollup.sessions += delta["sessions"]
+        rollup.total_reps += delta["total_reps"]
+        rollup.best_count = max(rollup.best_count, delta["best_count"])
+        rollup.total_duration += delta["total_duration"]
+        grades = dict(rollup.grade_counts)
+        for grade, n in delta["grade_counts"].items():
+            grades[grade] = grades.get(grade, 0) + n
+        rollup.grade_counts = grades
+        rollup.save()
@@ -1,3 +1,202 @@
-from django.test import TestCase
+import json
+import uuid
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Workout, WorkoutRollup
+from .rollups import period_start
+from .views import MAX_BULK_WORKOUTS
+
+# Per-process caches, emptied before every test
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "responses"},
+    "workout_versions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                         "LOCATION": "versions", "TIMEOUT": None},
+}
+
+
+def workout(exercise="squats", count=10, duration=30, grade="GOOD", **extra):
+    return dict(exercise=exercise, count=count, duration=duration, grade=grade, **extra)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class WorkoutsTestCase(TestCase):
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+
+    def post_bulk(self, records):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/workouts/bulk/", json.dumps({"workouts": records}),
+                                    content_type="application/json")
+
+
+class BulkWorkoutTests(WorkoutsTestCase):
+    def test_stores_every_record(self):
+        response = self.post_bulk([workout(), workout(" curls ", 12, grade="")])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["created"], body["duplicates"]), (2, 0))
+        stored = Workout.objects.in_bulk(body["ids"])
+        self.assertEqual([stored[i].exercise for i in body["ids"]], ["squats", "curls"])
+        self.assertEqual(stored[body["ids"][1]].count, 12)
+        self.assertIsNone(stored[body["ids"][0]].user)
+
+    def test_authenticated_user_owns_the_workouts(self):
+        user = User.objects.create_user("athlete")
+        self.client.force_login(user)
+        ids = self.post_bulk([workout()]).json()["ids"]
+        self.assertEqual(Workout.objects.get(id=ids[0]).user, user)
+
+    def test_invalid_record_rejects_the_batch(self):
+        response = self.post_bulk([workout(), workout(count=-1), workout(exercise=""),
+                                   workout(duration=True), workout(grade="x" * 21),
+                                   workout(client_id="not-a-uuid"), "squats"])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e["index"] for e in response.json()["errors"]], [1, 2, 3, 4, 5, 6])
+        self.assertFalse(Workout.objects.exists())
+        self.assertFalse(WorkoutRollup.objects.exists())
+
+    def test_malformed_requests(self):
+        def post(body):
+            return self.client.post("/api/workouts/bulk/", body, content_type="application/json")
+
+        self.assertEqual(post("{").status_code, 400)
+        self.assertEqual(post(json.dumps({"workouts": []})).status_code, 400)
+        self.assertEqual(post(json.dumps({"workouts": {}})).status_code, 400)
+        self.assertEqual(post(json.dumps([workout()] * (MAX_BULK_WORKOUTS + 1))).status_code, 400)
+        self.assertEqual(self.client.get("/api/workouts/bulk/").status_code, 405)
+        self.assertFalse(Workout.objects.exists())
+
+    def test_retried_batch_is_not_stored_twice(self):
+        first, second = str(uuid.uuid4()), str(uuid.uuid4())
+        ids = self.post_bulk([workout(client_id=first)]).json()["ids"]
+        body = self.post_bulk([workout(client_id=first), workout(client_id=second), workout()]).json()
+        self.assertEqual((body["created"], body["duplicates"]), (2, 1))
+        self.assertEqual(body["ids"][0], ids[0])
+        self.assertEqual(Workout.objects.count(), 3)
+
+    def test_updates_daily_and_weekly_rollups(self):
+        self.post_bulk([workout(count=10, grade="GOOD"), workout(count=14, grade="BAD")])
+        self.post_bulk([workout(count=6, grade="GOOD"), workout("curls", 8)])
+
+        today = timezone.localdate()
+        for period in (WorkoutRollup.DAY, WorkoutRollup.WEEK):
+            rollup = WorkoutRollup.objects.get(user=None, exercise="squats", period=period)
+            self.assertEqual(rollup.period_start, period_start(period, today))
+            self.assertEqual((rollup.sessions, rollup.total_reps, rollup.best_count, rollup.total_duration),
+                             (3, 30, 14, 90))
+            self.assertEqual(rollup.grade_counts, {"GOOD": 2, "BAD": 1})
+        # One row per user, exercise and period, anonymous uploads included
+        self.assertEqual(WorkoutRollup.objects.count(), 4)
+
+
+class WorkoutHistoryTests(WorkoutsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ids = self.post_bulk([workout(["squats", "curls"][i % 2], i) for i in range(25)]).json()["ids"]
+        # One timestamp for all: only the id orders them
+        Workout.objects.update(created_at=timezone.now())
+
+    def pages(self, query="limit=10"):
+        pages, cursor = [], None
+        while True:
+            url = f"/api/workouts/?{query}" + (f"&cursor={cursor}" if cursor else "")
+            body = self.client.get(url).json()
+            pages.append([w["id"] for w in body["workouts"]])
+            cursor = body["next"]
+            if cursor is None:
+                return pages
+
+    def test_keyset_pages_cover_every_workout_once(self):
+        pages = self.pages()
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(sum(pages, []), sorted(self.ids, reverse=True))
+
+    def test_filters(self):
+        curls = sum(self.pages("exercise=curls&limit=5"), [])
+        self.assertEqual(curls, sorted(self.ids[1::2], reverse=True))
+        today = timezone.localdate()
+        self.assertEqual(len(sum(self.pages(f"from={today}&to={today}&limit=200"), [])), 25)
+        self.assertEqual(self.pages("from=2020-01-01&to=2020-01-02"), [[]])
+
+    def test_other_users_workouts_are_hidden(self):
+        self.client.force_login(User.objects.create_user("athlete"))
+        self.assertEqual(self.pages(), [[]])
+
+    def test_invalid_parameters(self):
+        for query in ("limit=0", "limit=201", "limit=x", "from=yesterday", "cursor=@@@", "cursor=YWJj"):
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/workouts/?{query}")
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.has_header("ETag"))
+        self.assertEqual(self.client.post("/api/workouts/").status_code, 405)
+
+    def test_unchanged_page_is_not_modified(self):
+        response = self.client.get("/api/workouts/?limit=10")
+        etag = response["ETag"]
+        self.assertIn("no-cache", response["Cache-Control"])
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/workouts/?limit=10", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Another page or exercise is another ETag
+        self.assertNotEqual(self.client.get("/api/workouts/?limit=5")["ETag"], etag)
+        self.assertNotEqual(self.client.get("/api/workouts/?limit=10&exercise=curls")["ETag"], etag)
+
+    def test_new_workout_changes_the_etag(self):
+        etag = self.client.get("/api/workouts/?limit=10")["ETag"]
+        new_id = self.post_bulk([workout()]).json()["ids"][0]
+        response = self.client.get("/api/workouts/?limit=10", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["workouts"][0]["id"], new_id)
+
+
+class ResponseCacheTests(WorkoutsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.post_bulk([workout(count=5), workout("curls", 7)])
+
+    def test_repeated_reads_skip_the_database(self):
+        for url in ("/api/progress/", "/api/progress/?exercise=curls&period=week", "/api/stats/",
+                    "/api/workouts/?exercise=squats"):
+            with self.subTest(url=url):
+                first = self.client.get(url).json()
+                with self.assertNumQueries(0):
+                    self.assertEqual(self.client.get(url).json(), first)
+
+    def test_write_invalidates_only_what_it_changes(self):
+        urls = ("/api/progress/?exercise=squats", "/api/progress/?exercise=curls", "/api/progress/",
+                "/api/stats/", "/api/stats/?exercise=curls")
+        for url in urls:
+            self.client.get(url)
+        self.post_bulk([workout(count=9)])
+
+        for url, changed in zip(urls, (True, False, True, True, False)):
+            with self.subTest(url=url):
+                with self.assertNumQueries(1 if changed else 0):
+                    self.client.get(url)
+        squats = self.client.get("/api/stats/?exercise=squats").json()["stats"]
+        self.assertEqual((squats[0]["sessions"], squats[0]["total_reps"]), (2, 14))
+
+    def test_single_squat_endpoint_invalidates(self):
+        before = self.client.get("/api/stats/").json()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/workout/squat/", json.dumps({"count": 3, "duration": 10, "grade": "BAD"}),
+                             content_type="application/json")
+        self.assertNotEqual(self.client.get("/api/stats/").json(), before)
+
+    def test_users_are_cached_apart(self):
+        anonymous = self.client.get("/api/stats/").json()
+        self.client.force_login(User.objects.create_user("athlete"))
+        self.assertEqual(self.client.get("/api/stats/").json()["stats"], [])
+        self.assertNotEqual(anonymous["stats"], [])
+
+    def test_version_tokens_survive_response_eviction(self):
+        etag = self.client.get("/api/workouts/")["ETag"]
+        caches["default"].clear()
+        response = self.client.get("/api/workouts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
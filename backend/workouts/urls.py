@@ -1,6 +1,11 @@
 from django.urls import path
-from .views import save_squat_workout
+from .views import pipeline_metrics, progress, save_squat_workout, save_workouts_bulk, stats, workouts
 
 urlpatterns = [
     path("api/workout/squat/", save_squat_workout),
+    path("api/workouts/", workouts),
+    path("api/workouts/bulk/", save_workouts_bulk),
+    path("api/progress/", progress),
+    path("api/stats/", stats),
+    path("api/metrics/", pipeline_metrics),
 ]
@@ -1,7 +1,39 @@
+import base64
+import hashlib
 import json
+import math
+import uuid
+from datetime import date, datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Max, Q, Sum
 from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
-from .models import Workout
+from django.views.decorators.http import condition
+from .caching import cached_json, workouts_changed, workouts_version
+from .models import PipelineMetrics, Workout, WorkoutRollup
+from .rollups import period_start, record_workouts
+
+MAX_BULK_WORKOUTS = 500
+# Page sizes of the workout history API
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Default window of the progress API, in periods
+DEFAULT_PERIODS = {WorkoutRollup.DAY: 7, WorkoutRollup.WEEK: 12}
+MAX_PROGRESS_DAYS = 366 * 2
+
+
+def _request_user(request):
+    """Authenticated user to own new workouts, or None for anonymous uploads."""
+    user = getattr(request, "user", None)
+    return user if user is not None and user.is_authenticated else None
+
+
+def _request_user_id(request):
+    user = _request_user(request)
+    return user.id if user is not None else None
+
 
 @csrf_exempt
 def save_squat_workout(request):
@@ -11,12 +43,16 @@ def save_squat_workout(request):
     try:
         data = json.loads(request.body)
 
-        workout = Workout.objects.create(
-            exercise="squats",
-            count=data.get("count"),
-            duration=data.get("duration"),
-            grade=data.get("grade")
-        )
+        with transaction.atomic():
+            workout = Workout.objects.create(
+                user=_request_user(request),
+                exercise="squats",
+                count=data.get("count"),
+                duration=data.get("duration"),
+                grade=data.get("grade")
+            )
+            record_workouts([workout])
+            workouts_changed([workout])
 
         return JsonResponse({
             "status": "success",
@@ -28,3 +64,378 @@ def save_squat_workout(request):
             "status": "error",
             "message": str(e)
         }, status=500)
+
+
+def _max_length(field, model=Workout):
+    return model._meta.get_field(field).max_length
+
+
+def _parse_workout(record, user=None):
+    """Validates one bulk record and returns an unsaved Workout."""
+    if not isinstance(record, dict):
+        raise ValueError("workout must be an object")
+
+    exercise = record.get("exercise")
+    if not isinstance(exercise, str) or not exercise.strip():
+        raise ValueError("exercise is required")
+    if len(exercise) > _max_length("exercise"):
+        raise ValueError("exercise is too long")
+
+    grade = record.get("grade", "")
+    if not isinstance(grade, str):
+        raise ValueError("grade must be a string")
+    if len(grade) > _max_length("grade"):
+        raise ValueError("grade is too long")
+
+    values = {}
+    for field in ("count", "duration"):
+        value = record.get(field)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(f"{field} must be a non-negative integer")
+        values[field] = value
+
+    client_id = record.get("client_id")
+    if client_id is not None:
+        try:
+            client_id = uuid.UUID(client_id)
+        except (ValueError, TypeError, AttributeError):
+            raise ValueError("client_id must be a UUID string")
+
+    return Workout(user=user, exercise=exercise.strip(), grade=grade, client_id=client_id, **values)
+
+
+@csrf_exempt
+def save_workouts_bulk(request):
+    """Stores a batch of workouts for any exercise in one INSERT.
+
+    Body: {"workouts": [{"exercise", "count", "duration", "grade", "client_id"}, ...]}
+    The whole batch is validated first; nothing is written if any record
+    is invalid, and the response lists the failing indexes. Records whose
+    optional client_id is already stored are skipped, so retrying a batch
+    whose response was lost doesn't duplicate it; "ids" still lists the
+    stored id of every record, in order.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST allowed"}, status=405)
+
+    try:
+        data = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+
+    records = data.get("workouts") if isinstance(data, dict) else data
+    if not isinstance(records, list) or not records:
+        return JsonResponse({"status": "error", "message": "workouts must be a non-empty list"}, status=400)
+    if len(records) > MAX_BULK_WORKOUTS:
+        return JsonResponse({"status": "error", "message": f"at most {MAX_BULK_WORKOUTS} workouts per request"}, status=400)
+
+    user = _request_user(request)
+    workouts, errors = [], []
+    for index, record in enumerate(records):
+        try:
+            workouts.append(_parse_workout(record, user))
+        except ValueError as e:
+            errors.append({"index": index, "message": str(e)})
+
+    if errors:
+        return JsonResponse({"status": "error", "errors": errors}, status=400)
+
+    with transaction.atomic():
+        client_ids = [w.client_id for w in workouts if w.client_id is not None]
+        stored = dict(Workout.objects.filter(client_id__in=client_ids).values_list("client_id", "id"))
+        new, seen = [], set(stored)
+        for workout in workouts:
+            if workout.client_id is None or workout.client_id not in seen:
+                new.append(workout)
+                seen.add(workout.client_id)
+        created = Workout.objects.bulk_create(new)
+        if created:
+            record_workouts(created)
+            workouts_changed(created)
+
+    stored.update((w.client_id, w.id) for w in created if w.client_id is not None)
+    return JsonResponse({
+        "status": "success",
+        "created": len(created),
+        "duplicates": len(workouts) - len(created),
+        "ids": [stored[w.client_id] if w.client_id is not None else w.id for w in workouts]
+    })
+
+
+def _encode_cursor(workout):
+    raw = f"{workout.created_at.isoformat()}|{workout.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    """Cursor -> (created_at, id) of the last workout of the previous page"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, workout_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(workout_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("invalid cursor")
+
+
+def _history_query(request):
+    """Validated parameters of a workout history request, as a dict"""
+    query = {"exercise": request.GET.get("exercise") or None, "start": None, "end": None,
+             "cursor": request.GET.get("cursor") or None}
+    try:
+        for param, key in (("from", "start"), ("to", "end")):
+            if param in request.GET:
+                query[key] = date.fromisoformat(request.GET[param])
+    except ValueError:
+        raise ValueError("from/to must be YYYY-MM-DD")
+    try:
+        query["limit"] = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= query["limit"] <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be 1-{MAX_PAGE_SIZE}")
+    if query["cursor"]:
+        _decode_cursor(query["cursor"])
+    return query
+
+
+def _workouts_etag(request):
+    """Strong ETag of a history page: the user's workout version plus the
+    query. Needs no database query, so an unchanged page costs nothing."""
+    if request.method not in ("GET", "HEAD"):
+        return None
+    try:
+        query = _history_query(request)
+    except ValueError:
+        return None
+    user_id = _request_user_id(request)
+    key = "|".join(str(part) for part in (
+        workouts_version(user_id, query["exercise"]), user_id, query["exercise"],
+        query["start"], query["end"], query["limit"], query["cursor"],
+    ))
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+@cache_control(private=True, no_cache=True)  # browsers keep pages but revalidate them
+@condition(etag_func=_workouts_etag)
+def workouts(request):
+    """Workout history, newest first, one page at a time.
+
+    Query: ?exercise=squats&from=YYYY-MM-DD&to=YYYY-MM-DD&limit=50&cursor=...
+    Pages are cut by keyset on (created_at, id): pass the "next" cursor of
+    a page to get the one after it, at the same cost however deep it is.
+    Responses carry an ETag; If-None-Match with it returns 304 while no
+    workouts were added, without touching the database. Pages are also
+    cached server-side (caching.cached_json) for clients without one.
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Only GET allowed"}, status=405)
+
+    try:
+        query = _history_query(request)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+    def build():
+        rows = Workout.objects.filter(user=_request_user(request))
+        if query["exercise"]:
+            rows = rows.filter(exercise=query["exercise"])
+        # Day bounds as datetimes, so the created_at index stays usable
+        tz = timezone.get_current_timezone()
+        if query["start"]:
+            rows = rows.filter(created_at__gte=datetime.combine(query["start"], time.min, tzinfo=tz))
+        if query["end"]:
+            rows = rows.filter(created_at__lt=datetime.combine(query["end"] + timedelta(days=1),
+                                                               time.min, tzinfo=tz))
+        if query["cursor"]:
+            created_at, workout_id = _decode_cursor(query["cursor"])
+            rows = rows.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=workout_id))
+
+        limit = query["limit"]
+        page = list(rows.order_by("-created_at", "-id")[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        return {
+            "status": "success",
+            "workouts": [
+                {
+                    "id": w.id,
+                    "exercise": w.exercise,
+                    "count": w.count,
+                    "duration": w.duration,
+                    "grade": w.grade,
+                    "created_at": w.created_at.isoformat(),
+                }
+                for w in page
+            ],
+            "next": _encode_cursor(page[-1]) if has_more else None,
+        }
+
+    params = (query["start"], query["end"], query["limit"], query["cursor"])
+    return JsonResponse(cached_json("workouts", _request_user_id(request), query["exercise"],
+                                    params, build))
+
+
+def progress(request):
+    """Chart data from the daily/weekly rollups, never from raw workouts.
+
+    Query: ?period=day|week&exercise=squats&from=YYYY-MM-DD&to=YYYY-MM-DD
+    All parameters are optional; the default window is the last 7 days or
+    the last 12 weeks. Days without workouts are simply absent.
+    Responses are cached per user and exercise until a workout is added.
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Only GET allowed"}, status=405)
+
+    period = request.GET.get("period", WorkoutRollup.DAY)
+    if period not in DEFAULT_PERIODS:
+        return JsonResponse({"status": "error", "message": "period must be 'day' or 'week'"}, status=400)
+
+    try:
+        end = date.fromisoformat(request.GET["to"]) if "to" in request.GET else timezone.localdate()
+        if "from" in request.GET:
+            start = date.fromisoformat(request.GET["from"])
+        else:
+            step = 7 if period == WorkoutRollup.WEEK else 1
+            start = end - timedelta(days=step * (DEFAULT_PERIODS[period] - 1))
+    except ValueError:
+        return JsonResponse({"status": "error", "message": "from/to must be YYYY-MM-DD"}, status=400)
+    if start > end or (end - start).days > MAX_PROGRESS_DAYS:
+        return JsonResponse({"status": "error", "message": f"range must be 0-{MAX_PROGRESS_DAYS} days"}, status=400)
+
+    exercise = request.GET.get("exercise") or None
+
+    def build():
+        rollups = WorkoutRollup.objects.filter(
+            user=_request_user(request),
+            period=period,
+            period_start__gte=period_start(period, start),
+            period_start__lte=end,
+        )
+        if exercise:
+            rollups = rollups.filter(exercise=exercise)
+
+        return {
+            "status": "success",
+            "period": period,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "rollups": [
+                {
+                    "exercise": r.exercise,
+                    "period_start": r.period_start.isoformat(),
+                    "sessions": r.sessions,
+                    "total_reps": r.total_reps,
+                    "best_count": r.best_count,
+                    "total_duration": r.total_duration,
+                    "grades": r.grade_counts,
+                }
+                for r in rollups.order_by("period_start", "exercise")
+            ]
+        }
+
+    return JsonResponse(cached_json("progress", _request_user_id(request), exercise,
+                                    (period, start, end), build))
+
+
+def stats(request):
+    """All-time totals per exercise, summed from the weekly rollups.
+
+    Query: ?exercise=squats (optional, default: every exercise).
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Only GET allowed"}, status=405)
+
+    exercise = request.GET.get("exercise") or None
+
+    def build():
+        rollups = WorkoutRollup.objects.filter(user=_request_user(request), period=WorkoutRollup.WEEK)
+        if exercise:
+            rollups = rollups.filter(exercise=exercise)
+        totals = (rollups.values("exercise")
+                  .annotate(sessions=Sum("sessions"), total_reps=Sum("total_reps"),
+                            best_count=Max("best_count"), total_duration=Sum("total_duration"))
+                  .order_by("exercise"))
+        return {"status": "success", "stats": list(totals)}
+
+    return JsonResponse(cached_json("stats", _request_user_id(request), exercise, (), build))
+
+
+def _is_non_negative_number(value):
+    return (not isinstance(value, bool) and isinstance(value, (int, float))
+            and math.isfinite(value) and value >= 0)
+
+
+def _metrics_snapshot(data):
+    """Validates a FrameMetrics snapshot and returns an unsaved PipelineMetrics."""
+    if not isinstance(data, dict):
+        raise ValueError("body must be an object")
+    device = data.get("device")
+    if not isinstance(device, str) or not device.strip():
+        raise ValueError("device is required")
+    frames, dropped, fps = data.get("frames"), data.get("dropped", 0), data.get("fps")
+    for field, value in (("frames", frames), ("dropped", dropped)):
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(f"{field} must be a non-negative integer")
+    if not _is_non_negative_number(fps):
+        raise ValueError("fps must be a non-negative number")
+    stages = data.get("stages") or {}
+    if not isinstance(stages, dict):
+        raise ValueError("stages must be an object")
+    frame = data.get("frame") or {}
+    if not isinstance(frame, dict):
+        raise ValueError("frame must be an object")
+    frame_p95 = frame.get("p95")
+    if frame_p95 is not None and not _is_non_negative_number(frame_p95):
+        raise ValueError("frame.p95 must be a non-negative number")
+
+    return PipelineMetrics(
+        device=device.strip()[:_max_length("device", PipelineMetrics)],
+        exercise=str(data.get("name", ""))[:_max_length("exercise", PipelineMetrics)],
+        frames=frames,
+        dropped=dropped,
+        fps=fps,
+        frame_p95_ms=frame_p95,
+        stages=stages,
+    )
+
+
+@csrf_exempt
+def pipeline_metrics(request):
+    """POST: store a trainer's frame-timing snapshot.
+    GET: the latest snapshot of every device (?device= for one device's history).
+    """
+    if request.method == "POST":
+        try:
+            snapshot = _metrics_snapshot(json.loads(request.body))
+        except (ValueError, UnicodeDecodeError) as e:
+            return JsonResponse({"status": "error", "message": str(e)}, status=400)
+        snapshot.save()
+        return JsonResponse({"status": "success", "id": snapshot.id})
+
+    if request.method != "GET":
+        return JsonResponse({"error": "Only GET and POST allowed"}, status=405)
+
+    device = request.GET.get("device")
+    if device:
+        snapshots = PipelineMetrics.objects.filter(device=device).order_by("-created_at")[:100]
+    else:
+        latest = PipelineMetrics.objects.values("device").annotate(last=Max("id")).values("last")
+        snapshots = PipelineMetrics.objects.filter(id__in=latest).order_by("device")
+
+    return JsonResponse({
+        "status": "success",
+        "metrics": [
+            {
+                "device": m.device,
+                "exercise": m.exercise,
+                "frames": m.frames,
+                "dropped": m.dropped,
+                "fps": m.fps,
+                "frame_p95_ms": m.frame_p95_ms,
+                "stages": m.stages,
+                "created_at": m.created_at.isoformat(),
+            }
+            for m in snapshots
+        ]
+    })